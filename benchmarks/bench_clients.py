@@ -0,0 +1,163 @@
+"""Concurrent browser clients a running BertiBox can hold.
+
+Simulates open player pages against a running BertiBox: every client keeps
+a Socket.IO connection, asks for the full player status like the page does
+after a missed update, and loads the tag list over HTTP like the main page.
+The number of clients is raised step by step; a step is held when every
+client stays connected, no request fails and the 95th percentile of both
+latencies stays below --max-p95-ms.
+
+Run it from another machine against the box, so the load generator does not
+compete with the server for the Pi's CPU. Needs the Socket.IO client extras:
+pip install "python-socketio[client]"
+
+Usage:
+    python benchmarks/bench_clients.py --url http://bertibox.local:8080 [--clients 10,25,50,100,200]
+        [--duration 30] [--interval 2] [--max-p95-ms 500]
+"""
+
+import argparse
+import threading
+import time
+
+import requests
+import socketio
+
+
+class BrowserClient:
+    """One player page: a Socket.IO connection plus the tag list requests of the main page."""
+
+    def __init__(self, url):
+        self.url = url
+        self.sio = socketio.Client(reconnection=False)
+        self.http = requests.Session()
+        self.status_latencies = []
+        self.http_latencies = []
+        self.errors = 0
+        self.updates = 0
+        self.disconnected = False
+        self._status_requested_at = None
+        self.sio.on('player_status', self._on_player_status)
+        self.sio.on('disconnect', self._on_disconnect)
+
+    def _on_player_status(self, message):
+        if message.get('full') and self._status_requested_at is not None:
+            self.status_latencies.append(time.perf_counter() - self._status_requested_at)
+            self._status_requested_at = None
+        else:
+            self.updates += 1
+
+    def _on_disconnect(self, reason=None):
+        self.disconnected = True
+
+    def connect(self):
+        self.sio.connect(self.url, transports=['websocket'], wait_timeout=10)
+
+    def tick(self):
+        """Do what an open page does in one interval."""
+        if self._status_requested_at is not None:
+            # The previous status request was never answered
+            self.errors += 1
+        self._status_requested_at = time.perf_counter()
+        try:
+            self.sio.emit('request_player_status')
+        except socketio.exceptions.SocketIOError:
+            self.errors += 1
+
+        started = time.perf_counter()
+        try:
+            response = self.http.get(f'{self.url}/api/tags', timeout=10)
+            if response.ok:
+                self.http_latencies.append(time.perf_counter() - started)
+            else:
+                self.errors += 1
+        except requests.RequestException:
+            self.errors += 1
+
+    def close(self):
+        self.sio.disconnect()
+        self.http.close()
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1000 if values else 0.0
+
+
+def _run_client(client, stop, interval, offset):
+    # Spread the clients over the interval like independently opened pages
+    if stop.wait(offset):
+        return
+    while not stop.is_set():
+        client.tick()
+        stop.wait(interval)
+
+
+def run_step(url, clients, duration, interval):
+    """Connect the given number of clients and let them poll for the duration."""
+    connected = []
+    connect_failures = 0
+    for _ in range(clients):
+        client = BrowserClient(url)
+        try:
+            client.connect()
+            connected.append(client)
+        except socketio.exceptions.ConnectionError:
+            connect_failures += 1
+
+    stop = threading.Event()
+    threads = [threading.Thread(target=_run_client, args=(client, stop, interval, interval * number / clients))
+               for number, client in enumerate(connected)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    # Answers still in flight after the last tick
+    time.sleep(interval)
+
+    result = {
+        'connected': len(connected),
+        'connect_failures': connect_failures,
+        'disconnects': sum(client.disconnected for client in connected),
+        'errors': sum(client.errors for client in connected),
+        'status_p50_ms': _percentile([v for c in connected for v in c.status_latencies], 0.50),
+        'status_p95_ms': _percentile([v for c in connected for v in c.status_latencies], 0.95),
+        'http_p50_ms': _percentile([v for c in connected for v in c.http_latencies], 0.50),
+        'http_p95_ms': _percentile([v for c in connected for v in c.http_latencies], 0.95),
+    }
+    for client in connected:
+        client.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://localhost:8080')
+    parser.add_argument('--clients', default='10,25,50,100,200', help='comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds per step')
+    parser.add_argument('--interval', type=float, default=2.0, help='seconds between requests of a client')
+    parser.add_argument('--max-p95-ms', type=float, default=500.0)
+    args = parser.parse_args()
+
+    print(f"{args.url}, {args.duration:.0f}s per step, one status request and one tag list per client "
+          f"every {args.interval:g}s")
+    print(f"{'clients':>8} {'connected':>10} {'dropped':>8} {'errors':>7} "
+          f"{'status p50':>11} {'status p95':>11} {'http p50':>9} {'http p95':>9}")
+    held = 0
+    for clients in (int(count) for count in args.clients.split(',')):
+        result = run_step(args.url, clients, args.duration, args.interval)
+        print(f"{clients:>8} {result['connected']:>10} {result['disconnects']:>8} {result['errors']:>7} "
+              f"{result['status_p50_ms']:>9.1f}ms {result['status_p95_ms']:>9.1f}ms "
+              f"{result['http_p50_ms']:>7.1f}ms {result['http_p95_ms']:>7.1f}ms")
+        ok = (result['connected'] == clients and not result['disconnects'] and not result['errors']
+              and max(result['status_p95_ms'], result['http_p95_ms']) <= args.max_p95_ms)
+        if not ok:
+            break
+        held = clients
+    print(f"Held {held} concurrent clients with p95 <= {args.max_p95_ms:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Concurrent SQLite read/write throughput per database engine profile.
+
+Runs reader threads (playlist item lookups, like the player and the web UI)
+against writer threads (item inserts with a commit each, like upload and
+playlist handlers) on a fresh database for every profile in
+config.DB_ENGINE_PROFILES and prints throughput, read latency and the
+number of "database is locked" errors.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py [--readers 4] [--writers 2] [--duration 5]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from src import config
+from src.database.engine import create_db_engine
+from src.database.models import Base, Tag, Playlist, PlaylistItem
+
+PLAYLISTS = 20
+ITEMS_PER_PLAYLIST = 50
+
+
+def _seed(Session):
+    session = Session()
+    try:
+        for index in range(PLAYLISTS):
+            tag = Tag(tag_id=f'BENCH{index}', name=f'Bench {index}')
+            session.add(tag)
+            session.flush()
+            playlist = Playlist(name=f'Bench {index}', tag_id=tag.id)
+            session.add(playlist)
+            session.flush()
+            session.add_all(PlaylistItem(playlist_id=playlist.id, mp3_file=f'bench/{index}/{pos}.mp3',
+                                         position=pos) for pos in range(ITEMS_PER_PLAYLIST))
+        session.commit()
+    finally:
+        session.close()
+
+
+def _reader(Session, stop, stats, number):
+    playlist_id = 1 + number % PLAYLISTS
+    while not stop.is_set():
+        started = time.perf_counter()
+        session = Session()
+        try:
+            session.query(PlaylistItem).filter_by(playlist_id=playlist_id)\
+                .order_by(PlaylistItem.position).all()
+            stats['latencies'].append(time.perf_counter() - started)
+            stats['reads'] += 1
+        except OperationalError:
+            stats['locked'] += 1
+        finally:
+            session.close()
+        playlist_id = 1 + playlist_id % PLAYLISTS
+
+
+def _writer(Session, stop, stats, number):
+    position = ITEMS_PER_PLAYLIST
+    while not stop.is_set():
+        session = Session()
+        try:
+            session.add(PlaylistItem(playlist_id=1 + number % PLAYLISTS,
+                                     mp3_file=f'bench/writer{number}/{position}.mp3', position=position))
+            session.commit()
+            stats['writes'] += 1
+            position += 1
+        except OperationalError:
+            session.rollback()
+            stats['locked'] += 1
+        finally:
+            session.close()
+
+
+def run_profile(profile, readers, writers, duration):
+    """Run the workload against a fresh database using the given engine profile."""
+    tmp_dir = tempfile.mkdtemp(prefix='bertibox-bench-')
+    engine = create_db_engine(os.path.join(tmp_dir, 'bench.db'), profile)
+    try:
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        _seed(Session)
+
+        stop = threading.Event()
+        reader_stats = [{'reads': 0, 'locked': 0, 'latencies': []} for _ in range(readers)]
+        writer_stats = [{'writes': 0, 'locked': 0} for _ in range(writers)]
+        threads = [threading.Thread(target=_reader, args=(Session, stop, stats, number))
+                   for number, stats in enumerate(reader_stats)]
+        threads += [threading.Thread(target=_writer, args=(Session, stop, stats, number))
+                    for number, stats in enumerate(writer_stats)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        latencies = sorted(latency for stats in reader_stats for latency in stats['latencies'])
+        return {
+            'reads_per_sec': sum(stats['reads'] for stats in reader_stats) / duration,
+            'writes_per_sec': sum(stats['writes'] for stats in writer_stats) / duration,
+            'read_p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+            'locked': sum(stats['locked'] for stats in reader_stats + writer_stats)
+        }
+    finally:
+        engine.dispose()
+        shutil.rmtree(tmp_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per profile')
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.duration:.0f}s per profile")
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'read p99 ms':>12} {'locked':>8}")
+    for profile in config.DB_ENGINE_PROFILES:
+        result = run_profile(profile, args.readers, args.writers, args.duration)
+        print(f"{profile:<10} {result['reads_per_sec']:>10.0f} {result['writes_per_sec']:>10.0f} "
+              f"{result['read_p99_ms']:>12.2f} {result['locked']:>8}")
+
+
+if __name__ == '__main__':
+    main()
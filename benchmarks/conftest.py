@@ -0,0 +1,129 @@
+"""Shared fixtures for the BertiBox benchmark suite.
+
+Seeds one synthetic database and MP3 tree per session. The size can be
+changed with environment variables so runs stay comparable:
+
+    BERTIBOX_BENCH_TAGS       number of tags (default 200)
+    BERTIBOX_BENCH_PLAYLISTS  number of playlists, spread over the tags (default 400)
+    BERTIBOX_BENCH_ITEMS      items per playlist (default 50)
+    BERTIBOX_BENCH_DEPTH      folder depth of the MP3 tree (default 4)
+    BERTIBOX_BENCH_FANOUT     subfolders per folder (default 3)
+    BERTIBOX_BENCH_FILES      MP3 files per folder (default 10)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import config
+
+TAGS = int(os.environ.get('BERTIBOX_BENCH_TAGS', 200))
+PLAYLISTS = int(os.environ.get('BERTIBOX_BENCH_PLAYLISTS', 400))
+ITEMS_PER_PLAYLIST = int(os.environ.get('BERTIBOX_BENCH_ITEMS', 50))
+TREE_DEPTH = int(os.environ.get('BERTIBOX_BENCH_DEPTH', 4))
+TREE_FANOUT = int(os.environ.get('BERTIBOX_BENCH_FANOUT', 3))
+FILES_PER_FOLDER = int(os.environ.get('BERTIBOX_BENCH_FILES', 10))
+
+# The database singleton and the API modules read these when they are first imported
+_bench_dir = tempfile.mkdtemp(prefix='bertibox-bench-')
+config.DATABASE_FILE = os.path.join(_bench_dir, 'bench.db')
+config.MP3_DIR = os.path.join(_bench_dir, 'mp3')
+
+from src.database import Database
+from src.database.models import Tag, Playlist, PlaylistItem
+from src.database.playlist_manager import POSITION_STEP
+
+
+def _build_tree(base_dir):
+    """Create the MP3 tree and return (folders, files) as paths relative to base_dir."""
+    folders = []
+    files = []
+    level = ['']
+    for depth in range(TREE_DEPTH):
+        next_level = []
+        for parent in level:
+            for index in range(TREE_FANOUT):
+                folder = f'{parent}/folder{depth}_{index}'.lstrip('/')
+                os.makedirs(os.path.join(base_dir, folder))
+                for number in range(FILES_PER_FOLDER):
+                    path = f'{folder}/track{number:03d}.mp3'
+                    with open(os.path.join(base_dir, path), 'wb') as mp3:
+                        mp3.write(b'\xff\xfb' + b'\x00' * 126)
+                    files.append(path)
+                next_level.append(folder)
+        folders.extend(next_level)
+        level = next_level
+    return folders, files
+
+
+def _seed_database(db, files):
+    """Insert tags, playlists and items that reference files of the tree."""
+    session = db.get_session()
+    try:
+        tags = [Tag(tag_id=f'BENCH{index:06d}', name=f'Bench Tag {index}') for index in range(TAGS)]
+        session.add_all(tags)
+        session.flush()
+
+        playlists = [Playlist(name=f'Bench Playlist {index}', tag_id=tags[index % TAGS].id)
+                     for index in range(PLAYLISTS)]
+        session.add_all(playlists)
+        session.flush()
+
+        items = []
+        for number, playlist in enumerate(playlists):
+            for position in range(ITEMS_PER_PLAYLIST):
+                mp3_file = files[(number * ITEMS_PER_PLAYLIST + position) % len(files)]
+                items.append(PlaylistItem(playlist_id=playlist.id, mp3_file=mp3_file,
+                                          position=(position + 1) * POSITION_STEP))
+        session.add_all(items)
+        session.commit()
+        return [tag.tag_id for tag in tags], [playlist.id for playlist in playlists]
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope='session')
+def bench_env():
+    """Seed the database and MP3 tree once for the whole session."""
+    folders, files = _build_tree(config.MP3_DIR)
+    db = Database()
+    db.init_db()
+    tag_ids, playlist_ids = _seed_database(db, files)
+    db.refresh_library(config.MP3_DIR)
+    # Measure the endpoints without metadata extraction running in the background
+    db.metadata.shutdown()
+
+    yield {
+        'db': db,
+        'folders': folders,
+        'files': files,
+        'tag_ids': tag_ids,
+        'playlist_ids': playlist_ids,
+    }
+
+    db.cleanup()
+    db.engine.dispose()
+    shutil.rmtree(_bench_dir, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def db(bench_env):
+    return bench_env['db']
+
+
+@pytest.fixture(scope='session')
+def client(bench_env):
+    """Flask test client with the API blueprints registered."""
+    from flask import Flask
+    from src.api import tags_bp, playlists_bp, media_bp
+
+    app = Flask(__name__)
+    for blueprint in (tags_bp, playlists_bp, media_bp):
+        app.register_blueprint(blueprint, url_prefix='/api')
+    app.config['TESTING'] = True
+    return app.test_client()
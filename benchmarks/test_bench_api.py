@@ -0,0 +1,33 @@
+"""Benchmarks for the media API endpoints."""
+
+import pytest
+
+pytestmark = pytest.mark.benchmark(group='api')
+
+
+def test_get_mp3_files(benchmark, client):
+    response = benchmark(client.get, '/api/mp3-files')
+    assert response.status_code == 200
+
+
+def test_list_media_root(benchmark, client):
+    response = benchmark(client.get, '/api/media')
+    assert response.status_code == 200
+
+
+def test_list_media_deep_folder(benchmark, client, bench_env):
+    response = benchmark(client.get, '/api/media', query_string={'path': bench_env['folders'][-1]})
+    assert response.status_code == 200
+    assert response.get_json()['items']
+
+
+@pytest.mark.parametrize('query', ['tr', 'folder2 track00'])
+def test_search_media(benchmark, client, query):
+    response = benchmark(client.get, '/api/media/search', query_string={'query': query})
+    assert response.status_code == 200
+    assert response.get_json()['results']
+
+
+def test_get_tags(benchmark, client):
+    response = benchmark(client.get, '/api/tags')
+    assert response.status_code == 200
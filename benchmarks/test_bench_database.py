@@ -0,0 +1,35 @@
+"""Benchmarks for the database manager operations."""
+
+import pytest
+
+pytestmark = pytest.mark.benchmark(group='database')
+
+
+def test_get_all_tags(benchmark, db):
+    tags = benchmark(db.get_all_tags)
+    assert tags
+
+
+def test_get_playlist_items(benchmark, db, bench_env):
+    playlist_id = bench_env['playlist_ids'][len(bench_env['playlist_ids']) // 2]
+    items = benchmark(db.get_playlist_items, playlist_id)
+    assert items
+
+
+def test_are_files_in_folder_used(benchmark, db, bench_env):
+    # A top level folder covers a large share of the referenced files
+    used = benchmark(db.are_files_in_folder_used, bench_env['folders'][0])
+    assert used
+
+
+def test_update_path_references(benchmark, db, bench_env):
+    """Rename a folder and back; one round covers two set-wide path updates."""
+    folder = bench_env['folders'][0]
+    renamed = f'{folder}_renamed'
+
+    def rename_and_back():
+        db.update_path_references(folder, renamed)
+        db.update_path_references(renamed, folder)
+
+    benchmark(rename_and_back)
+    assert not db.are_files_in_folder_used(renamed)
@@ -0,0 +1,47 @@
+"""Benchmark for swapping RFID tags, from tag event to playback start.
+
+pygame.mixer is replaced by a mock, so the numbers cover tag resolution,
+playlist loading and the controller bookkeeping but not audio decoding.
+The RFID hardware modules are stubbed when they are not installed.
+"""
+
+import sys
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+for _module in ('RPi', 'RPi.GPIO', 'mfrc522'):
+    try:
+        __import__(_module)
+    except ImportError:
+        sys.modules[_module] = MagicMock()
+
+from src.core.playback_controller import PlaybackController
+from src.core.tag_handler import TagHandler
+
+pytestmark = pytest.mark.benchmark(group='player')
+
+
+@pytest.fixture
+def player(db):
+    audio_manager = MagicMock()
+    audio_manager.is_initialized.return_value = True
+    controller = PlaybackController(audio_manager, db, None)
+    handler = TagHandler(db, None)
+    with patch('src.core.playback_controller.pygame.mixer') as mixer, \
+            patch.object(controller, '_start_playback_check'):
+        mixer.music.get_pos.return_value = 0
+        yield handler, controller
+
+
+def test_tag_swap(benchmark, player, bench_env):
+    """Place one tag after the other, as when a child swaps figures."""
+    handler, controller = player
+    first, second = bench_env['tag_ids'][0], bench_env['tag_ids'][1]
+
+    def swap():
+        handler.handle_tag(first, controller)
+        handler.handle_tag(second, controller)
+
+    benchmark(swap)
+    assert controller.is_playing
@@ -4,19 +4,10 @@
 import sys
 import os
 
-# Add src to Python path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+# Make the src package importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import app, socketio, init_berti_box
-import config
+from src.startup import main
 
 if __name__ == "__main__":
-    # Initialize and start BertiBox in background
-    init_berti_box()
-    
-    # Run Flask-SocketIO server
-    print(f"Starting BertiBox Web Interface on {config.HOST}:{config.PORT}")
-    socketio.run(app, 
-                 host=config.HOST, 
-                 port=config.PORT, 
-                 debug=config.DEBUG)
\ No newline at end of file
+    main()
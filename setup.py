@@ -32,10 +32,15 @@ setup(
     python_requires=">=3.9",
     install_requires=requirements,
     extras_require={
+        "server": [
+            "gevent>=21.1.0",
+            "gevent-websocket>=0.10.1",
+        ],
         "dev": [
             "pytest>=7.4.3",
             "pytest-cov>=4.1.0",
             "pytest-mock>=3.12.0",
+            "pytest-benchmark>=4.0.0",
             "black>=23.0.0",
             "flake8>=6.0.0",
         ],
@@ -5,5 +5,9 @@ from .playlists import bp as playlists_bp
 from .media import bp as media_bp
 from .player import bp as player_bp
 from .upload import bp as upload_bp
+from .metrics import bp as metrics_bp, instrument_blueprint
 
-__all__ = ['tags_bp', 'playlists_bp', 'media_bp', 'player_bp', 'upload_bp']
\ No newline at end of file
+for _blueprint in (tags_bp, playlists_bp, media_bp, player_bp, upload_bp, metrics_bp):
+    instrument_blueprint(_blueprint)
+
+__all__ = ['tags_bp', 'playlists_bp', 'media_bp', 'player_bp', 'upload_bp', 'metrics_bp']
\ No newline at end of file
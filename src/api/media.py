@@ -1,10 +1,15 @@
 """Media explorer API endpoints - simplified version."""
 
-from flask import Blueprint, jsonify, request
+import logging
+from flask import Blueprint, jsonify, request, send_file
 import os
 import shutil
 from .. import config
 from ..database import Database
+from ..utils.helpers import update_berti_box_current_playlist
+from .upload import allowed_file
+
+logger = logging.getLogger(__name__)
 
 bp = Blueprint('media', __name__)
 db = Database()
@@ -13,16 +18,12 @@ db = Database()
 def get_mp3_files():
     """Get list of all MP3 files."""
     try:
-        mp3_files = []
-        for root, dirs, files in os.walk(config.MP3_DIR):
-            for file in files:
-                if file.endswith('.mp3'):
-                    relative_path = os.path.relpath(os.path.join(root, file), config.MP3_DIR)
-                    mp3_files.append(relative_path.replace(os.sep, '/'))
+        db.refresh_library(config.MP3_DIR, config.LIBRARY_RESCAN_INTERVAL)
+        mp3_files = db.get_library_files()
         
         return jsonify({'success': True, 'files': mp3_files})
     except Exception as e:
-        print(f"Error getting MP3 files: {e}")
+        logger.error("Error getting MP3 files: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/media', methods=['GET'])
@@ -45,24 +46,33 @@ def list_media():
         if not os.path.exists(full_path):
             return jsonify({'success': False, 'error': 'Path not found'}), 404
         
+        db.refresh_library(config.MP3_DIR, config.LIBRARY_RESCAN_INTERVAL)
+        subfolders, files = db.list_library_folder(folder_path)
+        
+        # One query for the whole listing instead of one per file
+        assigned_files = db.get_assigned_files_in_folder(folder_path)
+        
         items = []
-        for item in os.listdir(full_path):
-            item_path = os.path.join(full_path, item)
-            relative_path = os.path.relpath(item_path, config.MP3_DIR).replace(os.sep, '/')
-            
-            if os.path.isdir(item_path):
-                items.append({
-                    'name': item,
-                    'type': 'folder',
-                    'path': relative_path
-                })
-            elif item.endswith('.mp3'):
-                items.append({
-                    'name': item,
-                    'type': 'file',
-                    'path': relative_path,
-                    'assigned': db.is_file_in_playlist(relative_path)
-                })
+        for subfolder in subfolders:
+            items.append({
+                'name': subfolder.rsplit('/', 1)[-1],
+                'type': 'folder',
+                'path': subfolder
+            })
+        for media_file in files:
+            items.append({
+                'name': media_file['name'],
+                'type': 'file',
+                'path': media_file['path'],
+                'size': media_file['size'],
+                'duration': media_file['duration'],
+                'title': media_file['title'],
+                'artist': media_file['artist'],
+                'album': media_file['album'],
+                'track_number': media_file['track_number'],
+                'bitrate': media_file['bitrate'],
+                'assigned': media_file['path'] in assigned_files
+            })
         
         # Sort: folders first, then files
         items.sort(key=lambda x: (x['type'] != 'folder', x['name'].lower()))
@@ -74,7 +84,81 @@ def list_media():
         })
         
     except Exception as e:
-        print(f"Error listing media: {e}")
+        logger.error("Error listing media: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/media/search', methods=['GET'])
+def search_media():
+    """Search the library index by file name, folder and ID3 tags with prefix matching."""
+    try:
+        query = request.args.get('query', '').strip()
+        try:
+            limit = int(request.args.get('limit', config.SEARCH_PAGE_SIZE))
+            offset = int(request.args.get('offset', 0))
+        except ValueError:
+            return jsonify({'success': False, 'error': 'limit and offset must be integers'}), 400
+        limit = max(1, min(limit, config.SEARCH_MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        
+        db.refresh_library(config.MP3_DIR, config.LIBRARY_RESCAN_INTERVAL)
+        total, files = db.search_library(query, limit, offset)
+        assigned_files = db.get_assigned_files([media_file['path'] for media_file in files])
+        
+        results = [dict(media_file, type='file', is_assigned=media_file['path'] in assigned_files)
+                   for media_file in files]
+        
+        return jsonify({
+            'success': True,
+            'query': query,
+            'results': results,
+            'total': total,
+            'offset': offset,
+            'limit': limit
+        })
+        
+    except Exception as e:
+        logger.error("Error searching media: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/media/stream', methods=['GET'])
+def stream_media():
+    """Stream an MP3 file for preview in the browser.
+    
+    Supports Range requests for seeking and answers If-None-Match with 304
+    using a strong ETag built from size and mtime.
+    """
+    try:
+        file_path = (request.args.get('path') or '').lstrip('/')
+        
+        if not file_path:
+            return jsonify({'success': False, 'error': 'File path is required'}), 400
+        
+        full_path = os.path.join(config.MP3_DIR, file_path)
+        full_path = os.path.abspath(full_path)
+        
+        # Security check
+        if not full_path.startswith(os.path.abspath(config.MP3_DIR)):
+            return jsonify({'success': False, 'error': 'Invalid path'}), 403
+        
+        if not full_path.lower().endswith('.mp3'):
+            return jsonify({'success': False, 'error': 'Only MP3 files can be streamed'}), 400
+        
+        if not os.path.isfile(full_path):
+            return jsonify({'success': False, 'error': 'File not found'}), 404
+        
+        stat = os.stat(full_path)
+        # Werkzeug answers Range/If-Range and If-None-Match itself and hands the
+        # file to wsgi.file_wrapper (or X-Sendfile if USE_X_SENDFILE is set)
+        return send_file(
+            full_path,
+            mimetype='audio/mpeg',
+            conditional=True,
+            etag=f'{stat.st_size:x}-{stat.st_mtime_ns:x}',
+            last_modified=stat.st_mtime
+        )
+        
+    except Exception as e:
+        logger.error("Error streaming media: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/media/folder', methods=['POST'])
@@ -106,6 +190,7 @@ def create_folder():
             return jsonify({'success': False, 'error': 'Folder already exists'}), 409
         
         os.makedirs(full_path)
+        db.invalidate_library()
         
         return jsonify({
             'success': True,
@@ -114,7 +199,63 @@ def create_folder():
         })
         
     except Exception as e:
-        print(f"Error creating folder: {e}")
+        logger.error("Error creating folder: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/media/rename', methods=['PUT'])
+def rename_media():
+    """Rename a file or folder and rewrite the playlist items that reference it."""
+    try:
+        data = request.json or {}
+        old_path = (data.get('old_path') or '').strip('/')
+        new_name = (data.get('new_name') or '').strip()
+        
+        if not old_path or not new_name:
+            return jsonify({'success': False, 'error': 'Old path and new name are required'}), 400
+        
+        if '/' in new_name or '\\' in new_name or new_name in ('.', '..'):
+            return jsonify({'success': False, 'error': 'Invalid name'}), 400
+        
+        new_path = os.path.join(os.path.dirname(old_path), new_name)
+        full_old_path = os.path.abspath(os.path.join(config.MP3_DIR, old_path))
+        full_new_path = os.path.abspath(os.path.join(config.MP3_DIR, new_path))
+        
+        # Security check
+        base_dir = os.path.abspath(config.MP3_DIR)
+        if not full_old_path.startswith(base_dir) or not full_new_path.startswith(base_dir):
+            return jsonify({'success': False, 'error': 'Invalid path'}), 403
+        
+        if not os.path.exists(full_old_path):
+            return jsonify({'success': False, 'error': 'Path not found'}), 404
+        
+        # A file renamed to another type would drop out of the library
+        if os.path.isfile(full_old_path) and not allowed_file(new_name):
+            return jsonify({'success': False, 'error': 'Invalid file type'}), 400
+        
+        if os.path.exists(full_new_path):
+            return jsonify({'success': False, 'error': 'Target already exists'}), 409
+        
+        os.rename(full_old_path, full_new_path)
+        updated = db.update_path_references(old_path, new_path)
+        if updated is None:
+            # Keep files and playlists consistent
+            os.rename(full_new_path, full_old_path)
+            return jsonify({'success': False, 'error': 'Failed to update playlist references'}), 500
+        
+        db.invalidate_library()
+        if updated:
+            # The player holds its own copy of the items with the old paths
+            update_berti_box_current_playlist()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Renamed successfully',
+            'new_path': new_path,
+            'updated_references': updated
+        })
+        
+    except Exception as e:
+        logger.error("Error renaming media: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/media/file', methods=['DELETE'])
@@ -141,11 +282,12 @@ def delete_media_file():
             return jsonify({'success': False, 'error': 'File is in use by a playlist'}), 409
         
         os.remove(full_path)
+        db.invalidate_library()
         
         return jsonify({'success': True, 'message': 'File deleted successfully'})
         
     except Exception as e:
-        print(f"Error deleting file: {e}")
+        logger.error("Error deleting file: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/media/folder', methods=['DELETE'])
@@ -168,13 +310,19 @@ def delete_media_folder():
             return jsonify({'success': False, 'error': 'Folder not found'}), 404
         
         # Check if any files in folder are in use
-        if db.are_files_in_folder_used(folder_path, config.MP3_DIR):
-            return jsonify({'success': False, 'error': 'Folder contains files in use'}), 409
+        used_files = db.get_used_files_in_folder(folder_path)
+        if used_files:
+            return jsonify({
+                'success': False,
+                'error': 'Folder contains files in use',
+                'used_files': used_files
+            }), 409
         
         shutil.rmtree(full_path)
+        db.invalidate_library()
         
         return jsonify({'success': True, 'message': 'Folder deleted successfully'})
         
     except Exception as e:
-        print(f"Error deleting folder: {e}")
+        logger.error("Error deleting folder: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""Metrics API endpoints."""
+
+import time
+from flask import Blueprint, Response, g, jsonify, request
+from ..utils import metrics
+
+bp = Blueprint('metrics', __name__)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def instrument_blueprint(blueprint):
+    """Time every request to a blueprint's routes and count responses by status."""
+
+    @blueprint.before_request
+    def _start_request_timer():
+        g.metrics_started = time.perf_counter()
+
+    @blueprint.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unknown'
+            metrics.get_histogram('http_request_seconds', labels={'endpoint': endpoint})\
+                .observe(time.perf_counter() - started)
+            metrics.get_counter('http_responses_total',
+                                labels={'endpoint': endpoint, 'status': response.status_code}).inc()
+        return response
+
+    return blueprint
+
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Get all metrics in the Prometheus text format."""
+    return Response(metrics.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@bp.route('/metrics.json', methods=['GET'])
+def get_metrics_json():
+    """Get a JSON snapshot of all counters and histograms."""
+    return jsonify({'success': True, **metrics.snapshot()})
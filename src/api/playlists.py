@@ -1,9 +1,12 @@
 """Playlist management API endpoints."""
 
+import logging
 from flask import Blueprint, jsonify, request
 from ..database import Database
 from ..utils.helpers import update_berti_box_playlist
 
+logger = logging.getLogger(__name__)
+
 bp = Blueprint('playlists', __name__)
 db = Database()
 
@@ -29,17 +32,17 @@ def add_playlist():
         return jsonify({'success': False, 'error': 'Failed to create playlist'}), 500
         
     except Exception as e:
-        print(f"Error creating playlist: {e}")
+        logger.error("Error creating playlist: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/playlists/<int:playlist_id>/items', methods=['GET'])
 def get_playlist_items(playlist_id):
     """Get all items in a playlist."""
     try:
-        items = db.get_playlist_items(playlist_id)
+        items = db.get_playlist_items_with_metadata(playlist_id)
         return jsonify({'success': True, 'items': items})
     except Exception as e:
-        print(f"Error getting playlist items: {e}")
+        logger.error("Error getting playlist items: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/playlists/<int:playlist_id>/items', methods=['POST'])
@@ -66,7 +69,7 @@ def add_playlist_item(playlist_id):
         return jsonify({'success': False, 'error': 'Failed to add item'}), 500
         
     except Exception as e:
-        print(f"Error adding playlist item: {e}")
+        logger.error("Error adding playlist item: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/playlists/<int:playlist_id>/items/batch', methods=['POST'])
@@ -93,7 +96,35 @@ def add_playlist_items_batch(playlist_id):
         return jsonify({'success': False, 'error': 'Failed to add items'}), 500
         
     except Exception as e:
-        print(f"Error batch adding playlist items: {e}")
+        logger.error("Error batch adding playlist items: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@bp.route('/playlists/<int:playlist_id>/order', methods=['PUT'])
+def reorder_playlist_items(playlist_id):
+    """Set the order of all items in a playlist at once."""
+    try:
+        data = request.json or {}
+        item_ids = data.get('item_ids')
+        
+        if not isinstance(item_ids, list) or not all(isinstance(i, int) for i in item_ids):
+            return jsonify({'success': False, 'error': 'item_ids must be a list of item IDs'}), 400
+        
+        result = db.reorder_playlist_items(playlist_id, item_ids)
+        if result is None:
+            return jsonify({'success': False, 'error': 'Failed to reorder items'}), 500
+        if not result:
+            return jsonify({
+                'success': False,
+                'error': 'item_ids must contain every item of the playlist exactly once'
+            }), 400
+        
+        # Update BertiBox if this playlist is currently playing
+        update_berti_box_playlist(playlist_id)
+        
+        return jsonify({'success': True, 'message': 'Playlist order updated successfully'})
+        
+    except Exception as e:
+        logger.error("Error reordering playlist %s: %s", playlist_id, e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/playlist-items/<int:item_id>', methods=['PUT'])
@@ -112,7 +143,7 @@ def update_playlist_item_position(item_id):
             return jsonify({'success': False, 'error': 'Failed to update position'}), 500
             
     except Exception as e:
-        print(f"Error updating playlist item position: {e}")
+        logger.error("Error updating playlist item position: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/playlist-items/<int:item_id>', methods=['DELETE'])
@@ -125,5 +156,5 @@ def delete_playlist_item(item_id):
             return jsonify({'success': False, 'error': 'Item not found'}), 404
             
     except Exception as e:
-        print(f"Error deleting playlist item: {e}")
+        logger.error("Error deleting playlist item: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
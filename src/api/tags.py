@@ -1,8 +1,11 @@
 """Tag management API endpoints."""
 
-from flask import Blueprint, jsonify, request
+import logging
+from flask import Blueprint, jsonify, request, make_response
 from ..database import Database
 
+logger = logging.getLogger(__name__)
+
 bp = Blueprint('tags', __name__)
 db = Database()
 
@@ -10,10 +13,21 @@ db = Database()
 def get_tags():
     """Get all tags with their playlists."""
     try:
+        # Read the version before the data so a concurrent write can only make the ETag older
+        etag = db.get_tags_version()
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+        
         tags = db.get_all_tags()
-        return jsonify({'success': True, 'tags': tags})
+        response = jsonify({'success': True, 'tags': tags})
+        response.set_etag(etag)
+        # Let browsers keep the list but revalidate it on every use
+        response.cache_control.no_cache = True
+        return response
     except Exception as e:
-        print(f"Error getting tags: {e}")
+        logger.error("Error getting tags: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/tags', methods=['POST'])
@@ -50,7 +64,7 @@ def add_tag():
         return jsonify({'success': False, 'error': 'Failed to create tag'}), 500
         
     except Exception as e:
-        print(f"Error adding tag: {e}")
+        logger.error("Error adding tag: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/tags/<tag_id>', methods=['DELETE'])
@@ -62,7 +76,7 @@ def delete_tag(tag_id):
         else:
             return jsonify({'success': False, 'error': 'Tag not found'}), 404
     except Exception as e:
-        print(f"Error deleting tag {tag_id}: {e}")
+        logger.error("Error deleting tag %s: %s", tag_id, e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @bp.route('/tags/<tag_id>/playlist', methods=['GET'])
@@ -75,7 +89,7 @@ def get_tag_playlist(tag_id):
         
         if tag.get('playlists'):
             playlist_id = tag['playlists'][0]['id']
-            items = db.get_playlist_items(playlist_id)
+            items = db.get_playlist_items_with_metadata(playlist_id)
             return jsonify({
                 'success': True,
                 'id': playlist_id,  # Frontend expects 'id' not 'playlist_id'
@@ -86,5 +100,5 @@ def get_tag_playlist(tag_id):
         return jsonify({'success': True, 'id': None, 'playlist_id': None, 'items': []})
         
     except Exception as e:
-        print(f"Error getting playlist for tag {tag_id}: {e}")
+        logger.error("Error getting playlist for tag %s: %s", tag_id, e)
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
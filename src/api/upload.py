@@ -1,11 +1,25 @@
 """File upload API endpoints."""
 
+import logging
 from flask import Blueprint, jsonify, request
 from werkzeug.utils import secure_filename
 import os
+import shutil
+import threading
+import time
+import uuid
 from .. import config
+from ..database import Database
+from ..utils.helpers import partial_upload_path, upload_staging_dir
+
+logger = logging.getLogger(__name__)
 
 bp = Blueprint('upload', __name__)
+db = Database()
+
+# Active resumable uploads by upload ID
+_upload_sessions = {}
+_sessions_lock = threading.Lock()
 
 def allowed_file(filename):
     """Check if file extension is allowed."""
@@ -42,6 +56,7 @@ def upload_mp3():
                 return jsonify({'success': False, 'error': 'File already exists'}), 409
             
             file.save(filepath)
+            db.invalidate_library()
             
             # Calculate relative path for database
             relative_path = os.path.relpath(filepath, config.MP3_DIR).replace(os.sep, '/')
@@ -56,5 +71,216 @@ def upload_mp3():
         return jsonify({'success': False, 'error': 'Invalid file type'}), 400
         
     except Exception as e:
-        print(f"Error uploading file: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
+        logger.error("Error uploading file: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _resolve_target_folder(target_folder):
+    """Get the absolute target directory, or None if it escapes MP3_DIR."""
+    target_folder = (target_folder or '').strip('/')
+    target_path = os.path.abspath(os.path.join(config.MP3_DIR, target_folder))
+    if not target_path.startswith(os.path.abspath(config.MP3_DIR)):
+        return None
+    return target_path
+
+
+def _get_session(upload_id):
+    """Get an upload session and mark it as active."""
+    _expire_sessions()
+    with _sessions_lock:
+        session = _upload_sessions.get(upload_id)
+        if session is not None:
+            session['last_active'] = time.monotonic()
+        return session
+
+
+def _expire_sessions():
+    """Discard sessions idle for longer than UPLOAD_SESSION_TTL and remove their temp files."""
+    idle_since = time.monotonic() - config.UPLOAD_SESSION_TTL
+    with _sessions_lock:
+        # A session whose lock is held is receiving a chunk right now
+        expired = [(upload_id, session) for upload_id, session in _upload_sessions.items()
+                   if session['last_active'] < idle_since and not session['lock'].locked()]
+        for upload_id, _ in expired:
+            del _upload_sessions[upload_id]
+
+    for upload_id, session in expired:
+        logger.info("Discarding idle upload %s of %s", upload_id, session['filename'])
+        with session['lock']:
+            _remove_temp_file(session)
+
+
+def _remove_temp_file(session):
+    try:
+        os.remove(session['temp_path'])
+    except FileNotFoundError:
+        pass
+
+
+def _current_offset(session):
+    """Get the number of bytes already received, which is the size of the temp file."""
+    try:
+        return os.path.getsize(session['temp_path'])
+    except OSError:
+        return 0
+
+
+@bp.route('/uploads', methods=['POST'])
+def init_upload():
+    """Start a resumable upload and return its ID."""
+    try:
+        data = request.get_json(silent=True) or {}
+        filename = data.get('filename', '')
+        size = data.get('size')
+
+        if not filename:
+            return jsonify({'success': False, 'error': 'No file selected'}), 400
+        if not allowed_file(filename):
+            return jsonify({'success': False, 'error': 'Invalid file type'}), 400
+        # bool is an int subclass, so true and false would pass as sizes
+        if not isinstance(size, int) or isinstance(size, bool) or size < 0:
+            return jsonify({'success': False, 'error': 'Invalid file size'}), 400
+        if size > config.UPLOAD_MAX_FILE_SIZE:
+            return jsonify({'success': False, 'error': 'File too large'}), 413
+
+        target_path = _resolve_target_folder(data.get('target_folder', ''))
+        if target_path is None:
+            return jsonify({'success': False, 'error': 'Invalid path'}), 403
+
+        filename = secure_filename(filename)
+        filepath = os.path.join(target_path, filename)
+        if os.path.exists(filepath):
+            return jsonify({'success': False, 'error': 'File already exists'}), 409
+
+        _expire_sessions()
+        os.makedirs(target_path, exist_ok=True)
+        os.makedirs(upload_staging_dir(config.MP3_DIR), exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        temp_path = partial_upload_path(config.MP3_DIR, upload_id)
+
+        with _sessions_lock:
+            # Space still needed by running uploads is taken, even if not written yet
+            reserved = sum(session['size'] - _current_offset(session) for session in _upload_sessions.values())
+            if size + reserved > shutil.disk_usage(target_path).free:
+                return jsonify({'success': False, 'error': 'Not enough free space'}), 507
+            open(temp_path, 'wb').close()
+            _upload_sessions[upload_id] = {
+                'filename': filename,
+                'filepath': filepath,
+                'temp_path': temp_path,
+                'size': size,
+                'lock': threading.Lock(),
+                'last_active': time.monotonic()
+            }
+
+        return jsonify({'success': True, 'upload_id': upload_id, 'offset': 0, 'size': size})
+
+    except Exception as e:
+        logger.error("Error starting upload: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    """Get the offset from which an interrupted upload can be resumed."""
+    session = _get_session(upload_id)
+    if session is None:
+        return jsonify({'success': False, 'error': 'Upload not found'}), 404
+
+    return jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'offset': _current_offset(session),
+        'size': session['size']
+    })
+
+
+@bp.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Append the request body to an upload at the given offset."""
+    try:
+        session = _get_session(upload_id)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Upload not found'}), 404
+
+        offset = request.args.get('offset', type=int)
+        if offset is None:
+            return jsonify({'success': False, 'error': 'No offset provided'}), 400
+
+        with session['lock']:
+            current_offset = _current_offset(session)
+            if offset != current_offset:
+                # Client is out of sync, e.g. after a dropped response; it resumes from our offset
+                return jsonify({'success': False, 'error': 'Offset mismatch', 'offset': current_offset}), 409
+
+            written = 0
+            with open(session['temp_path'], 'ab') as f:
+                while True:
+                    chunk = request.stream.read(config.UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if current_offset + written + len(chunk) > session['size']:
+                        f.truncate(current_offset)
+                        return jsonify({'success': False, 'error': 'Chunk exceeds file size',
+                                        'offset': current_offset}), 400
+                    f.write(chunk)
+                    written += len(chunk)
+
+        return jsonify({'success': True, 'upload_id': upload_id, 'offset': current_offset + written})
+
+    except Exception as e:
+        logger.error("Error writing upload chunk: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """Move a completely received upload into place."""
+    try:
+        session = _get_session(upload_id)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Upload not found'}), 404
+
+        with session['lock']:
+            offset = _current_offset(session)
+            if offset != session['size']:
+                return jsonify({'success': False, 'error': 'Upload incomplete', 'offset': offset}), 409
+            if os.path.exists(session['filepath']):
+                return jsonify({'success': False, 'error': 'File already exists'}), 409
+
+            os.replace(session['temp_path'], session['filepath'])
+
+        with _sessions_lock:
+            _upload_sessions.pop(upload_id, None)
+        db.invalidate_library()
+
+        relative_path = os.path.relpath(session['filepath'], config.MP3_DIR).replace(os.sep, '/')
+        return jsonify({
+            'success': True,
+            'message': 'File uploaded successfully',
+            'filename': session['filename'],
+            'path': relative_path
+        })
+
+    except Exception as e:
+        logger.error("Error finalizing upload: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@bp.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    """Abort an upload and remove its temp file."""
+    try:
+        with _sessions_lock:
+            session = _upload_sessions.pop(upload_id, None)
+        if session is None:
+            return jsonify({'success': False, 'error': 'Upload not found'}), 404
+
+        with session['lock']:
+            _remove_temp_file(session)
+
+        return jsonify({'success': True, 'message': 'Upload aborted'})
+
+    except Exception as e:
+        logger.error("Error aborting upload: %s", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -1,56 +1,63 @@
-"""Main Flask application for BertiBox."""
+"""Flask application for the BertiBox web interface.
+
+Imported by the startup sequence once the player runs; see startup.py.
+"""
 
 import os
-import atexit
-import threading
+import logging
 from flask import Flask, render_template
 from flask_socketio import SocketIO
-from database import Database
-from core import BertiBox
-from utils import helpers
-import config
+from .database import Database
+from .server import WorkerModel, resolve_async_mode
+from . import config
 
 # Import API blueprints
-from api import (
+from .api import (
     tags_bp, 
     playlists_bp, 
     media_bp, 
     player_bp, 
-    upload_bp
+    upload_bp,
+    metrics_bp
 )
 
 # Import WebSocket handlers
-from websocket import register_handlers
+from .websocket import register_handlers
+
+logger = logging.getLogger(__name__)
 
 # Initialize Flask app with correct template and static paths
-import os
 app = Flask(__name__, 
             template_folder=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates'),
             static_folder=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static'))
 app.config['SECRET_KEY'] = config.SECRET_KEY
 app.config['MAX_CONTENT_LENGTH'] = config.MAX_CONTENT_LENGTH
 
+# Executors for views and player commands; see server.py for the thread layout
+workers = WorkerModel(resolve_async_mode())
+
+# Views run on the I/O pool; wrapped before SocketIO so Socket.IO traffic stays on the event loop
+app.wsgi_app = workers.wrap_wsgi_app(app.wsgi_app)
+
 # Initialize SocketIO
-socketio = SocketIO(app)
+socketio = SocketIO(app, async_mode=workers.async_mode)
 
 # Initialize database
 db = Database()
 
-# Initialize BertiBox (will be done after app context is ready)
+# The running BertiBox, set by attach_berti_box()
 berti_box = None
 
-# Create MP3 directory if it doesn't exist
-os.makedirs(config.MP3_DIR, exist_ok=True)
-
 # Register API blueprints
 app.register_blueprint(tags_bp, url_prefix='/api')
 app.register_blueprint(playlists_bp, url_prefix='/api')
 app.register_blueprint(media_bp, url_prefix='/api')
 app.register_blueprint(player_bp, url_prefix='/api')
 app.register_blueprint(upload_bp, url_prefix='/api')
+app.register_blueprint(metrics_bp, url_prefix='/api')
 
 # Register WebSocket handlers
-register_handlers(socketio, lambda: berti_box)
+register_handlers(socketio, lambda: berti_box, workers.run_command)
 
 # Basic routes
 @app.route('/')
@@ -60,7 +67,7 @@ def index():
         tags = db.get_all_tags()
         return render_template('index.html', tags=tags)
     except Exception as e:
-        print(f"Error loading index page: {e}")
+        logger.error("Error loading index page: %s", e)
         return render_template('index.html', tags=[])
 
 @app.route('/player')
@@ -70,7 +77,7 @@ def player():
         tags = db.get_all_tags()
         return render_template('player.html', tags=tags)
     except Exception as e:
-        print(f"Error loading player page: {e}")
+        logger.error("Error loading player page: %s", e)
         return render_template('player.html', tags=[])
 
 @app.route('/explorer')
@@ -83,39 +90,8 @@ def catch_all(path):
     """Catch-all route for undefined paths."""
     return render_template('404.html'), 404
 
-def cleanup():
-    """Cleanup function called on exit."""
-    if berti_box:
-        berti_box.stop()
-    print("Cleanup completed.")
-
-def init_berti_box():
-    """Initialize BertiBox in a separate thread."""
+def attach_berti_box(instance):
+    """Connect the running BertiBox to the web interface."""
     global berti_box
-    print("Starting Flask app and BertiBox...")
-    
-    # Initialize database
-    db.init_db()
-    
-    # Initialize BertiBox
-    berti_box = BertiBox(socketio, db)
-    
-    # Set the BertiBox instance in helpers module
-    helpers.set_berti_box_instance(berti_box)
-    
-    print("BertiBox initialized successfully, starting background thread...")
-    
-    # Start BertiBox in a separate thread
-    berti_thread = threading.Thread(target=berti_box.start)
-    berti_thread.daemon = True
-    berti_thread.start()
-
-# Register cleanup function
-atexit.register(cleanup)
-
-if __name__ == '__main__':
-    # Initialize BertiBox before starting Flask app
-    init_berti_box()
-    
-    # Run the Flask app with SocketIO
-    socketio.run(app, host=config.HOST, port=config.PORT, debug=config.DEBUG)
\ No newline at end of file
+    berti_box = instance
+    berti_box.set_socketio(workers.player_socketio(socketio))
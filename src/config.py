@@ -6,24 +6,72 @@ import os
 MP3_DIR = 'mp3'
 DATABASE_FILE = 'bertibox.db'
 
+# SQLite engine profiles: connection PRAGMAs and pool sizing ('default' keeps the driver defaults)
+DB_ENGINE_PROFILE = os.environ.get('BERTIBOX_DB_PROFILE', 'tuned')
+DB_ENGINE_PROFILES = {
+    'default': {},
+    'tuned': {
+        'journal_mode': 'WAL',  # Readers no longer block on a writer
+        'synchronous': 'NORMAL',  # Safe with WAL, skips the fsync per commit
+        'busy_timeout': 5000,  # Milliseconds a writer waits for the lock before failing
+        'mmap_size': 64 * 1024 * 1024,
+        'cache_size': -8192,  # Negative values are KiB, i.e. 8 MB page cache per connection
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+    },
+}
+
+# Settings persistence
+SETTINGS_FLUSH_DELAY = 2.0  # Seconds without setting changes before they are written to the database
+
+# Resume positions per tag
+RESUME_CHECKPOINT_INTERVAL = 15.0  # Seconds between position checkpoints while a tag's playlist plays
+RESUME_FLUSH_DELAY = 2.0  # Seconds checkpoints are collected before one database write
+
+# Startup warm-up
+WARMUP_READAHEAD_BYTES = 512 * 1024  # Bytes of each tag's first track read into the page cache at startup
+
+# Logging configuration
+LOG_LEVEL = os.environ.get('BERTIBOX_LOG_LEVEL', 'INFO')
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
 # Flask configuration
 SECRET_KEY = os.environ.get('SECRET_KEY', 'your_secret_key_here!')  # TODO: Use environment variable
 HOST = '0.0.0.0'
 PORT = 8080
 DEBUG = False
 
+# Web server: 'gevent', 'threading' (Werkzeug, development only) or 'auto' (gevent if installed)
+ASYNC_MODE = os.environ.get('BERTIBOX_ASYNC_MODE', 'auto')
+IO_WORKERS = 4  # Threads running Flask views (SQLite and filesystem work) in gevent mode
+
 # Audio configuration
 AUDIO_FREQUENCY = 44100
 AUDIO_SIZE = -16
 AUDIO_CHANNELS = 2
 AUDIO_BUFFER = 16384
 DEFAULT_VOLUME = 0.8
+GAPLESS_PLAYBACK = True  # Queue the next playlist item in the mixer while the current one plays
 
 # RFID configuration
 TAG_TIMEOUT = 2.0  # Seconds before a tag is considered removed
-PLAYBACK_CHECK_INTERVAL = 0.2  # Seconds between playback status checks
+PLAYBACK_CHECK_INTERVAL = 0.1  # Seconds between end-of-track checks while a track is playing; gapless tracks start without it
 MAIN_LOOP_INTERVAL = 0.05  # Seconds between RFID reader checks
+STATUS_COALESCE_INTERVAL = 0.05  # Seconds status changes are collected before one broadcast
+
+# Media library index configuration
+LIBRARY_RESCAN_INTERVAL = 10.0  # Seconds an index scan stays fresh before listings rescan
+LIBRARY_FILE_CHECK_INTERVAL = 600.0  # Seconds between rescans that also stat every file, for files overwritten in place
+SEARCH_PAGE_SIZE = 50  # Default number of media search results per page
+SEARCH_MAX_PAGE_SIZE = 200
+METADATA_WORKERS = 2  # Background threads parsing ID3 tags and MP3 frame headers
+METADATA_BATCH_SIZE = 50  # Files parsed per worker task and written in one transaction
 
 # File upload configuration
 ALLOWED_EXTENSIONS = {'mp3'}
-MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50 MB max file size
\ No newline at end of file
+MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50 MB max file size
+UPLOAD_MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024  # Largest file a resumable upload may announce
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read from the request stream per write of a resumable upload
+UPLOAD_SESSION_TTL = 6 * 60 * 60  # Seconds a resumable upload may be idle before it is discarded
+UPLOAD_STAGING_DIR = '.uploads'  # Folder below MP3_DIR receiving resumable uploads; not part of the library
\ No newline at end of file
@@ -5,5 +5,7 @@ from .audio_manager import AudioManager
 from .playback_controller import PlaybackController
 from .tag_handler import TagHandler
 from .sleep_timer import SleepTimer
+from .status_publisher import StatusPublisher
+from .warmup import warm_up
 
-__all__ = ['BertiBox', 'AudioManager', 'PlaybackController', 'TagHandler', 'SleepTimer']
\ No newline at end of file
+__all__ = ['BertiBox', 'AudioManager', 'PlaybackController', 'TagHandler', 'SleepTimer', 'StatusPublisher', 'warm_up']
\ No newline at end of file
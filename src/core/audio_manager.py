@@ -1,9 +1,12 @@
 """Audio management module for BertiBox - handles pygame mixer and volume control."""
 
+import logging
 import pygame
 import subprocess
 from .. import config
 
+logger = logging.getLogger(__name__)
+
 
 class AudioManager:
     """Manages audio initialization, volume control and pygame mixer."""
@@ -25,12 +28,12 @@ class AudioManager:
             initial_volume_str = self.db.get_setting('global_volume', str(config.DEFAULT_VOLUME))
             self.current_volume = float(initial_volume_str)
             if not (0.0 <= self.current_volume <= 1.0):
-                print(f"Warning: Invalid volume '{self.current_volume}' loaded from DB, resetting to {config.DEFAULT_VOLUME}")
+                logger.warning("Invalid volume '%s' loaded from DB, resetting to %s", self.current_volume, config.DEFAULT_VOLUME)
                 self.current_volume = config.DEFAULT_VOLUME
                 self.db.set_setting('global_volume', str(self.current_volume))
-            print(f"Initial volume loaded from DB: {self.current_volume}")
+            logger.info("Initial volume loaded from DB: %s", self.current_volume)
         except (ValueError, TypeError) as e:
-            print(f"Warning: Could not parse volume from DB. Using default {config.DEFAULT_VOLUME}. Error: {e}")
+            logger.warning("Could not parse volume from DB. Using default %s. Error: %s", config.DEFAULT_VOLUME, e)
             self.current_volume = config.DEFAULT_VOLUME
             self.db.set_setting('global_volume', str(self.current_volume))
     
@@ -39,15 +42,18 @@ class AudioManager:
         try:
             subprocess.run(['amixer', 'set', 'PCM', '100%'], check=True)
             subprocess.run(['amixer', 'set', 'PCM', 'unmute'], check=True)
-            print("Audio output configured.")
+            logger.info("Audio output configured.")
         except Exception as e:
-            print(f"Warning: Could not configure audio output via amixer: {e}")
-            print("Playback might use default output or fail.")
+            logger.warning("Could not configure audio output via amixer: %s", e)
+            logger.info("Playback might use default output or fail.")
     
     def _initialize_pygame(self):
-        """Initialize Pygame and audio mixer."""
+        """Initialize the Pygame audio mixer.
+        
+        Only the mixer is used, so pygame.init() and its display, joystick
+        and other subsystems are skipped.
+        """
         try:
-            pygame.init()
             pygame.mixer.init(
                 frequency=config.AUDIO_FREQUENCY,
                 size=config.AUDIO_SIZE,
@@ -56,22 +62,22 @@ class AudioManager:
             )
             pygame.mixer.set_num_channels(1)
             pygame.mixer.music.set_volume(self.current_volume)
-            print("Pygame Mixer initialized with increased buffer.")
+            logger.info("Pygame Mixer initialized with increased buffer.")
             self.pygame_initialized = True
             self.mixer_initialized = True
         except pygame.error as e:
-            print(f"Error initializing Pygame Mixer: {e}")
-            print("Audio playback will not be available.")
+            logger.error("Error initializing Pygame Mixer: %s", e)
+            logger.warning("Audio playback will not be available.")
             self.mixer_initialized = False
     
     def set_volume(self, volume_float):
         """Set the playback volume (0.0 to 1.0)."""
         if not isinstance(volume_float, (int, float)):
-            print(f"Invalid volume type: {type(volume_float)}")
+            logger.warning("Invalid volume type: %s", type(volume_float))
             return False
         
         if not (0.0 <= volume_float <= 1.0):
-            print(f"Invalid volume value: {volume_float}. Must be between 0.0 and 1.0")
+            logger.warning("Invalid volume value: %s. Must be between 0.0 and 1.0", volume_float)
             return False
         
         self.current_volume = float(volume_float)
@@ -82,7 +88,7 @@ class AudioManager:
         
         # Save to database
         self.db.set_setting('global_volume', str(self.current_volume))
-        print(f"Volume set to {self.current_volume}")
+        logger.info("Volume set to %s", self.current_volume)
         return True
     
     def get_volume(self):
@@ -91,7 +97,7 @@ class AudioManager:
     
     def reset_audio_subsystem(self):
         """Reset the audio subsystem to recover from errors."""
-        print("Resetting audio subsystem...")
+        logger.info("Resetting audio subsystem...")
         
         try:
             # Quit pygame mixer if initialized
@@ -102,10 +108,10 @@ class AudioManager:
             # Re-initialize
             self._initialize_pygame()
             
-            print("Audio subsystem reset complete.")
+            logger.info("Audio subsystem reset complete.")
             return True
         except Exception as e:
-            print(f"Error resetting audio subsystem: {e}")
+            logger.error("Error resetting audio subsystem: %s", e)
             return False
     
     def is_initialized(self):
@@ -1,9 +1,21 @@
 """Playback control module for BertiBox - handles play, pause, stop, navigation."""
 
+import logging
 import pygame
 import os
 import threading
+import time
 from .. import config
+from ..utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Number of monitor iterations while a track is playing
+MONITOR_WAKEUPS = metrics.get_counter('playback_monitor_wakeups_total')
+# Time from the last poll that saw the old track playing to play() of the next one
+TRANSITION_LAG = metrics.get_histogram('track_transition_lag_seconds')
+# Track changes handled by the mixer queue without a reload
+GAPLESS_TRANSITIONS = metrics.get_counter('gapless_transitions_total')
 
 
 class PlaybackController:
@@ -13,6 +25,8 @@ class PlaybackController:
         self.audio_manager = audio_manager
         self.db = db_instance
         self.socketio = socketio_instance
+        # Set by BertiBox; status changes are broadcast through it
+        self.status_publisher = None
         
         # Playback state
         self.is_playing = False
@@ -21,90 +35,223 @@ class PlaybackController:
         self.current_playlist_items = []
         self.current_playlist_index = 0
         self.current_track_filename = None
-        self.playback_check_timer = None
         self.stop_requested_by_tag_removal = False
         self.just_attempted_play = False
+        self.last_play_started_at = None
+        
+        # Playback monitor: one long-lived thread, idle while nothing plays
+        self.monitor_thread = None
+        self.monitor_running = False
+        self.monitor_wakeup = threading.Event()
+        self.check_interval = config.PLAYBACK_CHECK_INTERVAL
+        self.last_busy_at = None
+        self._lock = threading.RLock()
+        
+        # Gapless playback: index of the item queued in the mixer, if any
+        self.gapless = config.GAPLESS_PLAYBACK
+        self.queued_index = None
+        self.last_pos = 0
+        
+        # Resume positions: tag whose position is checkpointed, offset the current
+        # track was started at, and offset the next play_current_track() starts at
+        self.resume_tag_id = None
+        self.track_start_offset = 0.0
+        self.pending_start = 0.0
+        self.checkpoint_interval = config.RESUME_CHECKPOINT_INTERVAL
+        self.last_checkpoint_at = None
     
-    def load_playlist(self, playlist_id):
-        """Load a playlist and prepare for playback."""
+    def load_playlist(self, playlist_id, items=None, tag_id=None):
+        """Load a playlist and prepare for playback.
+        
+        Args:
+            playlist_id: The ID of the playlist to load
+            items: Already resolved playlist items; fetched from the database if None
+            tag_id: Tag the playlist was loaded for; its saved position is restored
+                and the position is checkpointed for it while playing
+        """
+        if items is None:
+            items = self.db.get_playlist_items(playlist_id)
         self.current_playlist = playlist_id
-        self.current_playlist_items = self.db.get_playlist_items(playlist_id)
+        self.current_playlist_items = list(items)
         self.current_playlist_index = 0
+        self.resume_tag_id = tag_id
+        self.pending_start = 0.0
         
         if not self.current_playlist_items:
-            print(f"Playlist {playlist_id} is empty")
+            logger.info("Playlist %s is empty", playlist_id)
             return False
         
-        print(f"Loaded playlist {playlist_id} with {len(self.current_playlist_items)} items")
+        if tag_id is not None:
+            self._restore_resume_position(tag_id)
+        
+        logger.info("Loaded playlist %s with %s items", playlist_id, len(self.current_playlist_items))
         return True
     
+    def _restore_resume_position(self, tag_id):
+        """Continue at the saved track and offset if they still match the playlist."""
+        saved = self.db.get_resume_position(tag_id)
+        if not saved or saved['playlist_id'] != self.current_playlist:
+            return
+        
+        index = saved['playlist_index']
+        mp3_file = saved['mp3_file']
+        items = self.current_playlist_items
+        if not (0 <= index < len(items) and items[index].get('mp3_file') == mp3_file):
+            # The playlist was edited since; follow the track if it is still in it
+            index = next((i for i, item in enumerate(items) if item.get('mp3_file') == mp3_file), None)
+            if index is None:
+                return
+        
+        self.current_playlist_index = index
+        self.pending_start = saved['offset_seconds']
+        logger.info("Resuming playlist %s at track %s, %.1f s", self.current_playlist, index + 1, self.pending_start)
+    
+    def update_playlist_items(self, items):
+        """Replace the items of the loaded playlist after it was edited, keeping the current track."""
+        with self._lock:
+            current_id = None
+            if 0 <= self.current_playlist_index < len(self.current_playlist_items):
+                current_id = self.current_playlist_items[self.current_playlist_index].get('id')
+            
+            self.current_playlist_items = list(items)
+            for index, item in enumerate(self.current_playlist_items):
+                if item.get('id') == current_id:
+                    self.current_playlist_index = index
+                    break
+            else:
+                # Current item was removed, stay at the same place in the list
+                self.current_playlist_index = min(self.current_playlist_index,
+                                                  max(0, len(self.current_playlist_items) - 1))
+            
+            # The following item may have changed
+            self.queue_next_track()
+    
     def play_current_track(self):
         """Play the current track in the playlist."""
         if not self.current_playlist_items:
-            print("No playlist loaded or playlist is empty")
+            logger.info("No playlist loaded or playlist is empty")
             return False
         
         if 0 <= self.current_playlist_index < len(self.current_playlist_items):
             current_item = self.current_playlist_items[self.current_playlist_index]
             mp3_file = current_item.get('mp3_file')
+            # A restored resume position applies to the first track played only
+            start, self.pending_start = self.pending_start, 0.0
             if mp3_file:
-                return self.play_mp3(mp3_file)
+                return self.play_mp3(mp3_file, start)
         return False
     
-    def play_mp3(self, mp3_file):
-        """Play a specific MP3 file."""
+    @metrics.timed('play_mp3')
+    def play_mp3(self, mp3_file, start=0.0):
+        """Play a specific MP3 file, optionally from an offset in seconds."""
         if not self.audio_manager.is_initialized():
-            print("Audio system not initialized")
+            logger.warning("Audio system not initialized")
             return False
         
         # Convert potential Windows path to Unix path
         mp3_file = mp3_file.replace('\\', '/')
         
-        full_path = os.path.join(config.MP3_DIR, mp3_file)
+        full_path = self._full_path(mp3_file)
         
         if not os.path.exists(full_path):
-            print(f"MP3 file not found: {full_path}")
+            logger.warning("MP3 file not found: %s", full_path)
             return False
         
         try:
-            self.stop_mp3()
-            pygame.mixer.music.load(full_path)
-            pygame.mixer.music.play()
-            
-            self.is_playing = True
-            self.is_paused = False
-            self.current_track_filename = mp3_file
-            self.just_attempted_play = True
+            with self._lock:
+                self.stop_mp3()
+                pygame.mixer.music.load(full_path)
+                pygame.mixer.music.play(start=start)
+                self.last_play_started_at = time.monotonic()
+                self.last_busy_at = self.last_play_started_at
+                self.last_pos = 0
+                self.track_start_offset = start
+                self.last_checkpoint_at = self.last_play_started_at
+                
+                self.is_playing = True
+                self.is_paused = False
+                self.current_track_filename = mp3_file
+                self.just_attempted_play = True
+                
+                self.queue_next_track()
             
-            print(f"Playing: {mp3_file}")
+            logger.info("Playing: %s", mp3_file)
             
-            # Start playback monitoring
+            # Wake the playback monitor
             self._start_playback_check()
             return True
             
         except pygame.error as e:
-            print(f"Error playing MP3: {e}")
+            logger.error("Error playing MP3: %s", e)
             return False
     
-    def stop_mp3(self):
-        """Stop current playback."""
-        if self.playback_check_timer:
-            self.playback_check_timer.cancel()
-            self.playback_check_timer = None
+    def _full_path(self, mp3_file):
+        return os.path.join(config.MP3_DIR, mp3_file.replace('\\', '/'))
+    
+    def queue_next_track(self):
+        """Queue the following playlist item so the mixer switches to it without a gap.
+        
+        Queueing replaces a previously queued track, so this can be called again
+        after the loaded playlist changed.
+        """
+        with self._lock:
+            self.queued_index = None
+            if not self.gapless or not self.is_playing or not self.current_playlist_items:
+                return False
+            
+            next_index = (self.current_playlist_index + 1) % len(self.current_playlist_items)
+            mp3_file = self.current_playlist_items[next_index].get('mp3_file')
+            if not mp3_file:
+                return False
+            
+            full_path = self._full_path(mp3_file)
+            if not os.path.exists(full_path):
+                logger.warning("Not queueing missing MP3 file: %s", full_path)
+                return False
+            
+            try:
+                pygame.mixer.music.queue(full_path)
+            except pygame.error as e:
+                logger.error("Error queueing next MP3: %s", e)
+                return False
+            
+            self.queued_index = next_index
+            return True
+    
+    def _handle_queued_track_started(self):
+        """Adopt the queued track as the current one after the mixer switched to it."""
+        next_index = self.queued_index
+        self.queued_index = None
+        if next_index >= len(self.current_playlist_items):
+            return
         
-        if self.audio_manager.is_initialized():
-            pygame.mixer.music.stop()
+        self.current_playlist_index = next_index
+        self.current_track_filename = self.current_playlist_items[next_index].get('mp3_file')
+        self.last_play_started_at = time.monotonic()
+        self.track_start_offset = 0.0
+        GAPLESS_TRANSITIONS.inc()
+        logger.info("Playing (gapless): %s", self.current_track_filename)
         
-        self.is_playing = False
-        self.is_paused = False
-        self.current_track_filename = None
+        self.queue_next_track()
+    
+    def stop_mp3(self):
+        """Stop current playback."""
+        with self._lock:
+            if self.audio_manager.is_initialized():
+                # Stopping also drops any queued track
+                pygame.mixer.music.stop()
+            
+            self.queued_index = None
+            self.is_playing = False
+            self.is_paused = False
+            self.current_track_filename = None
     
     def pause(self):
         """Pause current playback."""
         if self.is_playing and not self.is_paused and self.audio_manager.is_initialized():
             pygame.mixer.music.pause()
             self.is_paused = True
-            print("Playback paused")
+            logger.info("Playback paused")
             return True
         return False
     
@@ -113,7 +260,9 @@ class PlaybackController:
         if self.is_playing and self.is_paused and self.audio_manager.is_initialized():
             pygame.mixer.music.unpause()
             self.is_paused = False
-            print("Playback resumed")
+            self.last_busy_at = time.monotonic()
+            self._start_playback_check()
+            logger.info("Playback resumed")
             return True
         return False
     
@@ -127,7 +276,7 @@ class PlaybackController:
             self.current_playlist_index += 1
             if self.current_playlist_index >= len(self.current_playlist_items):
                 self.current_playlist_index = 0
-                print("Playlist finished, restarting from beginning")
+                logger.info("Playlist finished, restarting from beginning")
         else:
             # Manual skip to next
             self.current_playlist_index = (self.current_playlist_index + 1) % len(self.current_playlist_items)
@@ -153,38 +302,110 @@ class PlaybackController:
         return False
     
     def _start_playback_check(self):
-        """Start monitoring playback status."""
-        if self.playback_check_timer:
-            self.playback_check_timer.cancel()
-        
-        self.playback_check_timer = threading.Timer(0.5, self._check_playback)
-        self.playback_check_timer.daemon = True
-        self.playback_check_timer.start()
+        """Wake the playback monitor, starting its thread on first use."""
+        if self.monitor_thread is None or not self.monitor_thread.is_alive():
+            self.monitor_running = True
+            self.monitor_thread = threading.Thread(target=self._monitor_loop)
+            self.monitor_thread.daemon = True
+            self.monitor_thread.start()
+        self.monitor_wakeup.set()
+    
+    def stop_monitor(self):
+        """Stop the playback monitor thread."""
+        self.monitor_running = False
+        self.monitor_wakeup.set()
+        if self.monitor_thread and self.monitor_thread.is_alive():
+            self.monitor_thread.join(timeout=1.0)
+        self.monitor_thread = None
+    
+    def _monitor_loop(self):
+        """Poll the mixer while a track plays and block while nothing plays."""
+        while self.monitor_running:
+            self.monitor_wakeup.clear()
+            if not self.is_playing or self.is_paused:
+                self.monitor_wakeup.wait()
+                continue
+            
+            MONITOR_WAKEUPS.inc()
+            try:
+                self._check_playback()
+            except Exception as e:
+                logger.error("Error in playback monitor: %s", e)
+            self.monitor_wakeup.wait(self.check_interval)
     
     def _check_playback(self):
         """Check if playback has finished and handle accordingly."""
-        if not self.is_playing:
-            return
+        with self._lock:
+            if not self.is_playing or self.is_paused:
+                return
+            
+            if not self.audio_manager.is_initialized():
+                return
+            
+            if pygame.mixer.music.get_busy():
+                self.last_busy_at = time.monotonic()
+                # The mixer restarts its position counter when a queued track takes over
+                pos = pygame.mixer.music.get_pos()
+                took_over = self.queued_index is not None and 0 <= pos < self.last_pos
+                self.last_pos = pos
+                if not took_over:
+                    if self.resume_tag_id is not None and \
+                            time.monotonic() - self.last_checkpoint_at >= self.checkpoint_interval:
+                        self.save_resume_position()
+                    return
+                self._handle_queued_track_started()
+            elif not self._handle_track_finished():
+                return
         
-        if self.audio_manager.is_initialized() and not pygame.mixer.music.get_busy():
-            # Track finished
-            if self.stop_requested_by_tag_removal:
-                print("Playback stopped due to tag removal")
-                self.stop_requested_by_tag_removal = False
-                self.clear_state()
-            else:
-                print("Track finished naturally")
-                self.play_next(track_finished_naturally=True)
-                self._emit_status_update()
-        else:
-            # Continue monitoring
-            self._start_playback_check()
+        self._emit_status_update()
+    
+    def _handle_track_finished(self):
+        """Advance after the mixer ran out of music.
+
+        Returns:
+            True if a status update is due, False after a stop by tag removal
+        """
+        if self.stop_requested_by_tag_removal:
+            logger.info("Playback stopped due to tag removal")
+            self.stop_requested_by_tag_removal = False
+            self.clear_state()
+            return False
+        logger.info("Track finished naturally")
+        last_busy_at = self.last_busy_at
+        if self.play_next(track_finished_naturally=True) and last_busy_at is not None:
+            TRANSITION_LAG.observe(self.last_play_started_at - last_busy_at)
+        return True
     
     def _emit_status_update(self):
-        """Emit status update via socketio."""
-        if self.socketio:
-            status = self.get_status()
-            self.socketio.emit('player_status', status)
+        """Schedule a status broadcast through the player's status publisher."""
+        if self.status_publisher:
+            self.status_publisher.publish()
+    
+    def get_position(self):
+        """Get the playback offset into the current track in seconds, or None if nothing plays."""
+        if not self.is_playing or not self.audio_manager.is_initialized():
+            return None
+        # get_pos() counts from play() or from the takeover of a queued track
+        pos = pygame.mixer.music.get_pos()
+        if pos < 0:
+            return None
+        return self.track_start_offset + pos / 1000.0
+    
+    def save_resume_position(self):
+        """Checkpoint the current track and offset for the tag the playlist was loaded for.
+        
+        Only updates memory; the database write is batched by the resume store.
+        """
+        with self._lock:
+            self.last_checkpoint_at = time.monotonic()
+            if self.resume_tag_id is None or self.current_playlist is None:
+                return False
+            offset = self.get_position()
+            if offset is None or not 0 <= self.current_playlist_index < len(self.current_playlist_items):
+                return False
+            mp3_file = self.current_playlist_items[self.current_playlist_index].get('mp3_file')
+            return self.db.set_resume_position(self.resume_tag_id, self.current_playlist,
+                                               self.current_playlist_index, mp3_file, round(offset, 1))
     
     def clear_state(self):
         """Clear all playback state."""
@@ -192,6 +413,8 @@ class PlaybackController:
         self.current_playlist = None
         self.current_playlist_items = []
         self.current_playlist_index = 0
+        self.resume_tag_id = None
+        self.pending_start = 0.0
     
     def get_status(self):
         """Get current playback status."""
@@ -1,13 +1,16 @@
 """Main BertiBox player class that coordinates all components."""
 
+import logging
 import pygame
 import threading
-import time
 from ..rfid_reader import RFIDReader
 from .audio_manager import AudioManager
 from .playback_controller import PlaybackController
 from .tag_handler import TagHandler
 from .sleep_timer import SleepTimer
+from .status_publisher import StatusPublisher
+
+logger = logging.getLogger(__name__)
 
 
 class BertiBox:
@@ -26,55 +29,74 @@ class BertiBox:
         self.tag_handler = TagHandler(db_instance, socketio_instance)
         self.sleep_timer = SleepTimer(socketio_instance)
         self.rfid_reader = RFIDReader()
+        self.status_publisher = StatusPublisher(socketio_instance, self.get_player_status)
+        self.playback_controller.status_publisher = self.status_publisher
         
-        print("BertiBox initialized")
+        logger.info("BertiBox initialized")
+    
+    def set_socketio(self, socketio_instance):
+        """Attach the Socket.IO server once the web interface is up; events are dropped before."""
+        self.socketio = socketio_instance
+        self.playback_controller.socketio = socketio_instance
+        self.tag_handler.socketio = socketio_instance
+        self.sleep_timer.socketio = socketio_instance
+        self.status_publisher.socketio = socketio_instance
     
     def start(self):
         """Start the BertiBox main loop."""
         if not self.audio_manager.is_initialized():
-            print("Cannot start BertiBox: Audio system not initialized.")
+            logger.warning("Cannot start BertiBox: Audio system not initialized.")
             return
         
         self.running = True
         self.rfid_reader.start_reading()
         
-        # Start main loop in separate thread
+        # Start tag event dispatcher in separate thread
         main_thread = threading.Thread(target=self._main_loop)
         main_thread.daemon = True
         main_thread.start()
         
-        print("BertiBox started")
+        logger.info("BertiBox started")
     
     def _main_loop(self):
-        """Main loop checking for RFID tags."""
+        """Dispatch RFID tag events to the tag handler as soon as they arrive."""
         while self.running:
+            event = self.rfid_reader.get_event()
+            if event is None:
+                continue
             try:
-                tag_id = self.rfid_reader.get_tag()
-                if tag_id is not None or self.tag_handler.current_tag_id:
-                    self.tag_handler.handle_tag(tag_id, self.playback_controller)
-                time.sleep(0.1)
+                self.tag_handler.handle_tag(
+                    event.tag_id, self.playback_controller, detected_at=event.timestamp
+                )
+                self.emit_player_status()
             except Exception as e:
-                print(f"Error in main loop: {e}")
-                time.sleep(1)
+                logger.error("Error in main loop: %s", e)
     
     def stop(self):
         """Stop BertiBox and cleanup."""
-        print("Stopping BertiBox...")
+        logger.info("Stopping BertiBox...")
         self.running = False
         
         # Stop components
+        self.playback_controller.save_resume_position()
         self.playback_controller.clear_state()
+        self.playback_controller.stop_monitor()
         self.tag_handler.clear_tag_state()
         self.sleep_timer.cancel()
+        self.status_publisher.cancel()
         self.rfid_reader.stop_reading()
         self.rfid_reader.cleanup()
         
+        # Persist settings and resume positions that are still waiting for their write-behind flush
+        self.db.flush_settings()
+        self.db.flush_resume_positions()
+        
         # Cleanup pygame
         if self.audio_manager.is_initialized():
             pygame.mixer.quit()
             pygame.quit()
         
-        print("BertiBox stopped")
+        logger.info("BertiBox stopped")
     
     # Public API methods for web interface
     
@@ -138,7 +160,8 @@ class BertiBox:
     
     def _handle_sleep_timer_expired(self):
         """Handle sleep timer expiration."""
-        print("Sleep timer expired, stopping playback")
+        logger.info("Sleep timer expired, stopping playback")
+        self.playback_controller.save_resume_position()
         self.playback_controller.clear_state()
         self.tag_handler.clear_tag_state()
         self.emit_player_status()
@@ -147,6 +170,7 @@ class BertiBox:
         """Reset audio system."""
         was_playing = self.playback_controller.is_playing
         current_track = self.playback_controller.current_track_filename
+        position = self.playback_controller.get_position() or 0.0
         
         # Stop playback
         self.playback_controller.stop_mp3()
@@ -156,7 +180,7 @@ class BertiBox:
         
         # Resume if was playing
         if success and was_playing and current_track:
-            self.playback_controller.play_mp3(current_track)
+            self.playback_controller.play_mp3(current_track, position)
         
         return success
     
@@ -175,7 +199,9 @@ class BertiBox:
         }
     
     def emit_player_status(self):
-        """Emit current player status via socketio."""
-        if self.socketio:
-            status = self.get_player_status()
-            self.socketio.emit('player_status', status)
\ No newline at end of file
+        """Schedule a coalesced broadcast of the changed player status fields."""
+        self.status_publisher.publish()
+    
+    def send_player_status(self, to=None):
+        """Send the full player status to one client (by session ID) or to all."""
+        return self.status_publisher.send_snapshot(to=to)
\ No newline at end of file
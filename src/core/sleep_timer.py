@@ -1,8 +1,11 @@
 """Sleep timer module for BertiBox."""
 
+import logging
 import threading
 import time
 
+logger = logging.getLogger(__name__)
+
 
 class SleepTimer:
     """Manages sleep timer functionality."""
@@ -28,7 +31,7 @@ class SleepTimer:
         self.timer.daemon = True
         self.timer.start()
         
-        print(f"Sleep timer set for {duration_minutes} minutes")
+        logger.info("Sleep timer set for %s minutes", duration_minutes)
         self._emit_status()
         return True
     
@@ -38,7 +41,7 @@ class SleepTimer:
             self.timer.cancel()
             self.timer = None
             self.end_time = None
-            print("Sleep timer cancelled")
+            logger.info("Sleep timer cancelled")
             self._emit_status()
             return True
         return False
@@ -0,0 +1,75 @@
+"""Coalescing, diff-based player status publisher for BertiBox."""
+
+import threading
+from .. import config
+from ..utils import metrics
+from ..utils.deferred import DeferredCall
+
+STATUS_EMITS = metrics.get_counter('player_status_emits_total')
+STATUS_PUBLISH_REQUESTS = metrics.get_counter('player_status_publish_requests_total')
+
+
+class StatusPublisher:
+    """Broadcasts player status changes to Socket.IO clients.
+
+    Publish requests within one coalescing window are merged into a single
+    broadcast that only carries the fields that changed since the previous
+    one. Every broadcast bumps a version number, so a client that sees a gap
+    asks for a full snapshot instead.
+    """
+
+    def __init__(self, socketio_instance, get_status, interval=None):
+        self.socketio = socketio_instance
+        self.get_status = get_status
+        self.interval = config.STATUS_COALESCE_INTERVAL if interval is None else interval
+        self.version = 0
+        self.last_status = {}
+        self._pending = DeferredCall(self.flush, self.interval, 'status-publisher')
+        self._lock = threading.RLock()
+
+    def publish(self):
+        """Schedule a broadcast of the changed status fields."""
+        STATUS_PUBLISH_REQUESTS.inc()
+        # A broadcast already pending picks up this change
+        self._pending.schedule()
+
+    def flush(self):
+        """Broadcast the changed status fields right away.
+
+        Returns:
+            True if something changed and was broadcast
+        """
+        with self._lock:
+            self._pending.cancel()
+
+            status = self.get_status()
+            changes = {key: value for key, value in status.items()
+                       if key not in self.last_status or self.last_status[key] != value}
+            removed = [key for key in self.last_status if key not in status]
+            if not changes and not removed:
+                return False
+
+            self.version += 1
+            self.last_status = dict(status)
+            message = {'version': self.version, 'full': False, 'changes': changes}
+            if removed:
+                message['removed'] = removed
+            if self.socketio:
+                self.socketio.emit('player_status', message)
+                STATUS_EMITS.inc()
+            return True
+
+    def send_snapshot(self, to=None):
+        """Send the full status to one client, or to everyone if to is None."""
+        with self._lock:
+            # Publish pending changes first so the snapshot matches the current version
+            self.flush()
+            message = {'version': self.version, 'full': True, 'status': dict(self.last_status)}
+            if self.socketio:
+                self.socketio.emit('player_status', message, to=to)
+                STATUS_EMITS.inc()
+            return message
+
+    def cancel(self):
+        """Drop a pending broadcast and stop the publisher thread until the next publish()."""
+        self._pending.stop()
@@ -1,7 +1,14 @@
 """RFID tag handling module for BertiBox."""
 
+import logging
 import time
 from .. import config
+from ..utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# Time from hardware tag read to pygame.mixer.music.play()
+TAG_TO_PLAY_LATENCY = metrics.get_histogram('tag_to_play_seconds')
 
 
 class TagHandler:
@@ -17,33 +24,42 @@ class TagHandler:
         self.last_tag_time = 0
         self.tag_timeout = config.TAG_TIMEOUT
     
-    def handle_tag(self, tag_id, playback_controller):
-        """Handle a detected RFID tag."""
+    def handle_tag(self, tag_id, playback_controller, detected_at=None):
+        """Handle a tag event from the RFID reader.
+        
+        Args:
+            tag_id: The detected tag UID, or None if the tag was removed
+            playback_controller: The PlaybackController to drive
+            detected_at: time.monotonic() of the hardware read, used for latency tracking
+        """
         current_time = time.time()
         
         if tag_id is None:
-            # Tag removed
-            if self.current_tag_id and (current_time - self.last_tag_time) > 0.5:
+            # Tag removed (already debounced by the reader)
+            if self.current_tag_id:
                 return self._handle_tag_removal(playback_controller)
         else:
             # Tag detected
             if tag_id != self.current_tag_id:
-                return self._handle_new_tag(tag_id, current_time, playback_controller)
+                return self._handle_new_tag(tag_id, current_time, playback_controller, detected_at)
             else:
                 # Same tag, update time
                 self.last_tag_time = current_time
         
         return False
     
-    def _handle_new_tag(self, tag_id, current_time, playback_controller):
+    @metrics.timed('tag_handle_new')
+    def _handle_new_tag(self, tag_id, current_time, playback_controller, detected_at=None):
         """Handle a new tag being placed."""
-        print(f"New tag detected: {tag_id}")
+        logger.info("New tag detected: %s", tag_id)
+        # A tag swapped in without removing the previous one first
+        playback_controller.save_resume_position()
         
-        # Check if tag exists in database
-        tag = self.db.get_tag(tag_id)
-        if not tag:
+        # Resolve tag, playlist and items (served from the in-memory tag cache)
+        resolved = self.db.resolve_tag(tag_id)
+        if not resolved:
             # New unknown tag
-            print(f"Unknown tag {tag_id}, adding to database...")
+            logger.info("Unknown tag %s, adding to database...", tag_id)
             self._add_new_tag(tag_id)
             self.current_tag_id = tag_id
             self.current_tag_name = f"New Tag {tag_id[:8]}"
@@ -52,28 +68,32 @@ class TagHandler:
             return False
         
         # Known tag - load and play playlist
+        tag_name = resolved['tag']['name']
         self.current_tag_id = tag_id
-        self.current_tag_name = tag.name
+        self.current_tag_name = tag_name
         self.last_tag_time = current_time
         
-        playlist = self.db.get_playlist(tag_id)
+        playlist = resolved['playlist']
         if playlist:
-            print(f"Loading playlist for tag: {tag.name}")
-            if playback_controller.load_playlist(playlist.id):
-                playback_controller.play_current_track()
+            logger.info("Loading playlist for tag: %s", tag_name)
+            if playback_controller.load_playlist(playlist['id'], resolved['items'], tag_id=tag_id):
+                if playback_controller.play_current_track():
+                    self._record_latency(playback_controller, detected_at)
                 self._emit_tag_update()
                 return True
         else:
-            print(f"No playlist found for tag: {tag.name}")
-            self._emit_tag_update()
+            logger.info("No playlist found for tag: %s", tag_name)
         
+        self._emit_tag_update()
         return False
     
     def _handle_tag_removal(self, playback_controller):
         """Handle tag being removed."""
         if self.current_tag_id:
-            print(f"Tag removed: {self.current_tag_id}")
+            logger.info("Tag removed: %s", self.current_tag_id)
             playback_controller.stop_requested_by_tag_removal = True
+            # Continue here when the tag is placed again
+            playback_controller.save_resume_position()
             playback_controller.clear_state()
             self.clear_tag_state()
             self._emit_tag_update()
@@ -85,14 +105,23 @@ class TagHandler:
         try:
             tag_name = f"New Tag {tag_id[:8]}"
             self.db.add_tag(tag_id, tag_name)
-            print(f"Added new tag to database: {tag_id}")
+            logger.info("Added new tag to database: %s", tag_id)
             
             # Create empty playlist for the tag
             playlist = self.db.add_playlist(tag_id, f"Playlist for {tag_name}")
             if playlist:
-                print(f"Created empty playlist for new tag")
+                logger.info("Created empty playlist for new tag")
         except Exception as e:
-            print(f"Error adding new tag: {e}")
+            logger.error("Error adding new tag: %s", e)
+    
+    def _record_latency(self, playback_controller, detected_at):
+        """Record time from hardware read to playback start."""
+        started_at = playback_controller.last_play_started_at
+        if detected_at is None or started_at is None:
+            return
+        latency = started_at - detected_at
+        TAG_TO_PLAY_LATENCY.observe(latency)
+        logger.info("Tag-to-play latency: %.1f ms", latency * 1000)
     
     def clear_tag_state(self):
         """Clear current tag state."""
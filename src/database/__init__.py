@@ -1,6 +1,6 @@
 """Database package for BertiBox."""
 
-from .models import Base, Tag, Playlist, PlaylistItem, Setting
+from .models import Base, Tag, Playlist, PlaylistItem, Setting, ResumePosition, MediaFolder, MediaFile
 from .manager import Database
 
-__all__ = ['Base', 'Tag', 'Playlist', 'PlaylistItem', 'Setting', 'Database']
\ No newline at end of file
+__all__ = ['Base', 'Tag', 'Playlist', 'PlaylistItem', 'Setting', 'ResumePosition', 'MediaFolder', 'MediaFile', 'Database']
\ No newline at end of file
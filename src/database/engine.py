@@ -0,0 +1,40 @@
+"""SQLAlchemy engine setup for BertiBox database."""
+
+from sqlalchemy import create_engine, event
+from .. import config
+
+# Profile keys that are applied as PRAGMAs on every new connection
+PRAGMA_KEYS = ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size')
+# Profile keys that are passed to the connection pool
+POOL_KEYS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+def create_db_engine(database_file, profile=None):
+    """Create the SQLite engine for database_file using an engine profile.
+
+    Args:
+        database_file: Path of the SQLite database file
+        profile: Name of an entry in config.DB_ENGINE_PROFILES, defaults to DB_ENGINE_PROFILE
+
+    Returns:
+        Configured SQLAlchemy engine
+    """
+    settings = config.DB_ENGINE_PROFILES[profile or config.DB_ENGINE_PROFILE]
+    pool_args = {key: settings[key] for key in POOL_KEYS if key in settings}
+    pragmas = [(key, settings[key]) for key in PRAGMA_KEYS if key in settings]
+
+    engine = create_engine(f'sqlite:///{database_file}',
+                           connect_args={'check_same_thread': False},
+                           **pool_args)
+
+    if pragmas:
+        @event.listens_for(engine, 'connect')
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for key, value in pragmas:
+                    cursor.execute(f'PRAGMA {key}={value}')
+            finally:
+                cursor.close()
+
+    return engine
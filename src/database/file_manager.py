@@ -1,20 +1,49 @@
 """File management operations for BertiBox database."""
 
-import os
-import traceback
-from .models import Tag, Playlist, PlaylistItem
+import logging
+from sqlalchemy import String, and_, case, func, literal, or_, update
+from .models import Tag, Playlist, PlaylistItem, ResumePosition
+from ..utils import metrics
 
+logger = logging.getLogger(__name__)
 
+
+def prefix_range(prefix):
+    """Get the [lower, upper) string range covering all values starting with prefix.
+    
+    Unlike LIKE, a range comparison is case-sensitive and can use the index on mp3_file.
+    """
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _path_move(column, old_path, new_path):
+    """Get the WHERE clause and new value that move column from old_path to new_path, as file or folder."""
+    old_dir_prefix = old_path + '/'
+    lower, upper = prefix_range(old_dir_prefix)
+    matches = or_(column == old_path, and_(column >= lower, column < upper))
+    # A single CASE statement sees the original values only, so a new path
+    # below the old one (a -> a/b) is not rewritten twice
+    new_value = case(
+        (column == old_path, new_path),
+        else_=literal(new_path + '/', String).concat(func.substr(column, len(old_dir_prefix) + 1))
+    )
+    return matches, new_value
+
+
+@metrics.instrument_class('db_call')
 class FileManager:
-    def __init__(self, get_session):
+    def __init__(self, get_session, cache=None, resume=None):
         self.get_session = get_session
+        self.cache = cache
+        # ResumeManager whose cached positions follow renamed files
+        self.resume = resume
     
     def is_file_in_playlist(self, file_path: str) -> bool:
         """Checks if a given file path exists in any playlist THAT IS LINKED TO A TAG."""
         session = self.get_session()
         try:
             path_to_check = file_path.lstrip('/')
-            print(f"[DB is_file_in_playlist] Checking DB for file '{path_to_check}' linked to a valid Tag")
+            logger.debug("[DB is_file_in_playlist] Checking DB for file '%s' linked to a valid Tag", path_to_check)
             
             exists = (session.query(PlaylistItem.id)
                       .join(Playlist, PlaylistItem.playlist_id == Playlist.id)
@@ -22,15 +51,65 @@ class FileManager:
                       .filter(PlaylistItem.mp3_file == path_to_check)
                       .first() is not None)
 
-            print(f"[DB is_file_in_playlist] Result (linked to Tag?): {exists}")
+            logger.debug("[DB is_file_in_playlist] Result (linked to Tag?): %s", exists)
             session.close()
             return exists
         except Exception as e:
-            print(f"Error checking if file '{file_path}' is in a tagged playlist: {e}")
+            logger.error("Error checking if file '%s' is in a tagged playlist: %s", file_path, e)
             session.rollback()
             session.close()
             return False
 
+    def get_assigned_files_in_folder(self, folder_path):
+        """Gets all file paths below a folder that are in a playlist linked to a tag.
+        
+        Args:
+            folder_path: Folder path relative to the MP3 directory, '' for the whole library
+        
+        Returns:
+            Set of relative file paths
+        """
+        session = self.get_session()
+        try:
+            query = (session.query(PlaylistItem.mp3_file)
+                     .join(Playlist, PlaylistItem.playlist_id == Playlist.id)
+                     .join(Tag, Playlist.tag_id == Tag.id))
+
+            folder = folder_path.strip('/')
+            if folder:
+                lower, upper = prefix_range(folder + '/')
+                query = query.filter(PlaylistItem.mp3_file >= lower, PlaylistItem.mp3_file < upper)
+
+            return {mp3_file for (mp3_file,) in query.distinct()}
+        except Exception as e:
+            logger.error("Error getting assigned files in folder '%s': %s", folder_path, e)
+            session.rollback()
+            return set()
+        finally:
+            session.close()
+
+    def get_assigned_files(self, file_paths):
+        """Gets the subset of file_paths that are in a playlist linked to a tag.
+        
+        Returns:
+            Set of relative file paths
+        """
+        if not file_paths:
+            return set()
+        session = self.get_session()
+        try:
+            query = (session.query(PlaylistItem.mp3_file)
+                     .join(Playlist, PlaylistItem.playlist_id == Playlist.id)
+                     .join(Tag, Playlist.tag_id == Tag.id)
+                     .filter(PlaylistItem.mp3_file.in_(list(file_paths))))
+            return {mp3_file for (mp3_file,) in query.distinct()}
+        except Exception as e:
+            logger.error("Error getting assigned files: %s", e)
+            session.rollback()
+            return set()
+        finally:
+            session.close()
+
     def is_file_used(self, relative_path):  
         """Checks if a given relative file path is used in any playlist item."""
         session = self.get_session()
@@ -38,77 +117,90 @@ class FileManager:
             count = session.query(PlaylistItem).filter(PlaylistItem.mp3_file == relative_path.lstrip('/')).count()
             return count > 0
         except Exception as e:
-            print(f"Error checking if file '{relative_path}' is used: {e}")
-            traceback.print_exc()
+            logger.exception("Error checking if file '%s' is used: %s", relative_path, e)
             return True 
         finally:
             session.close() 
 
     def update_path_references(self, old_path_relative, new_path_relative):
-        """Updates file paths in PlaylistItem records when a file or folder is moved/renamed."""
+        """Updates file paths in PlaylistItem records when a file or folder is moved/renamed.
+        
+        The file itself and everything below it as a folder are rewritten with one
+        UPDATE, so a folder rename does not load its items into the session. Saved
+        resume positions are moved in the same transaction.
+        
+        Returns:
+            Number of updated playlist items, or None on error
+        """
         session = self.get_session()
-        updated_count = 0
+        old_path_db = old_path_relative.lstrip('/')
+        new_path_db = new_path_relative.lstrip('/')
         try:
-            old_path_db = old_path_relative.lstrip('/')
-            new_path_db = new_path_relative.lstrip('/')
+            matches, new_value = _path_move(PlaylistItem.mp3_file, old_path_db, new_path_db)
+            
+            affected_playlists = {playlist_id for (playlist_id,) in
+                                  session.query(PlaylistItem.playlist_id).filter(matches).distinct()}
+            if not affected_playlists:
+                # Resume positions only point at playlist items
+                return 0
+            
+            result = session.execute(
+                update(PlaylistItem)
+                .where(matches)
+                .values(mp3_file=new_value)
+                .execution_options(synchronize_session=False)
+            )
+            resume_matches, resume_value = _path_move(ResumePosition.mp3_file, old_path_db, new_path_db)
+            session.execute(
+                update(ResumePosition)
+                .where(resume_matches)
+                .values(mp3_file=resume_value)
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            updated_count = result.rowcount
+            logger.info("DB Update: Moved %s playlist item paths from '%s' to '%s'.", updated_count, old_path_db, new_path_db)
             
-            items_to_update = session.query(PlaylistItem).filter(PlaylistItem.mp3_file == old_path_db).all()
-            for item in items_to_update:
-                print(f"DB Update: Changing PlaylistItem {item.id} path from '{item.mp3_file}' to '{new_path_db}'")
-                item.mp3_file = new_path_db
-                updated_count += 1
-
-            old_dir_prefix = old_path_db + '/'
-            new_dir_prefix = new_path_db + '/'
-            items_in_dir = session.query(PlaylistItem).filter(PlaylistItem.mp3_file.startswith(old_dir_prefix)).all()
-            for item in items_in_dir:
-                original_path = item.mp3_file
-                updated_path = original_path.replace(old_dir_prefix, new_dir_prefix, 1)
-                print(f"DB Update: Changing PlaylistItem {item.id} path from '{original_path}' to '{updated_path}' (folder move)")
-                item.mp3_file = updated_path
-                updated_count += 1
-
-            if updated_count > 0:
-                session.commit()
-                print(f"DB Update: Committed changes for {updated_count} playlist items.")
-            return True
+            if self.cache:
+                for playlist_id in affected_playlists:
+                    self.cache.invalidate_playlist(playlist_id)
+            if self.resume:
+                self.resume.move_paths(old_path_db, new_path_db)
+            return updated_count
         
         except Exception as e:
             session.rollback()
-            print(f"Database Error updating path references from '{old_path_db}' to '{new_path_db}': {e}")
-            traceback.print_exc()
-            return False
+            logger.exception("Database Error updating path references from '%s' to '%s': %s", old_path_db, new_path_db, e)
+            return None
         finally:
             session.close()
 
-    def are_files_in_folder_used(self, relative_folder_path, base_dir):
-        """Recursively checks if any file within the given folder path is used in any playlist item."""
+    def get_used_files_in_folder(self, relative_folder_path):
+        """Gets all file paths below a folder that are used in any playlist item.
+        
+        Runs as a single range query on the indexed mp3_file column, independent of folder size.
+        """
+        session = self.get_session()
         try:
-            base_dir_abs = os.path.abspath(base_dir)
-            clean_relative_path = os.path.normpath(relative_folder_path.lstrip('/'))
-            folder_full_path = os.path.join(base_dir_abs, clean_relative_path)
-            folder_full_path = os.path.abspath(folder_full_path)
-
-            if not os.path.isdir(folder_full_path):
-                print(f"Warning: Folder '{folder_full_path}' not found during usage check.")
-                return False
-
-            print(f"Checking usage for files inside: {folder_full_path}")
-            for root, dirs, files in os.walk(folder_full_path):
-                for filename in files:
-                    file_full_path = os.path.join(root, filename)
-                    file_relative_path = os.path.relpath(file_full_path, base_dir_abs).replace(os.sep, '/')
-                    print(f"  Checking file: {file_relative_path}")
-                    if self.is_file_used(file_relative_path):
-                        print(f"  --> Found used file: {file_relative_path}")
-                        return True
-            
-            print(f"No used files found in folder: {relative_folder_path}")
-            return False
+            folder = relative_folder_path.strip('/')
+            lower, upper = prefix_range(folder + '/')
+            rows = (session.query(PlaylistItem.mp3_file)
+                    .filter(PlaylistItem.mp3_file >= lower, PlaylistItem.mp3_file < upper)
+                    .distinct()
+                    .order_by(PlaylistItem.mp3_file))
+            return [mp3_file for (mp3_file,) in rows]
+        finally:
+            session.close()
 
+    def are_files_in_folder_used(self, relative_folder_path):
+        """Checks if any file within the given folder path is used in any playlist item."""
+        try:
+            used_files = self.get_used_files_in_folder(relative_folder_path)
+            if used_files:
+                logger.info("Folder '%s' contains %s used files.", relative_folder_path, len(used_files))
+            return bool(used_files)
         except Exception as e:
-            print(f"Error checking folder usage for '{relative_folder_path}': {e}")
-            traceback.print_exc()
+            logger.exception("Error checking folder usage for '%s': %s", relative_folder_path, e)
             return True 
 
     def get_playlists_for_file(self, file_path: str) -> list[dict]:
@@ -117,7 +209,7 @@ class FileManager:
         tags_info = []
         try:
             path_to_check = file_path.lstrip('/')
-            print(f"DB Query: Finding Tags for file_path = '{path_to_check}'")
+            logger.debug("DB Query: Finding Tags for file_path = '%s'", path_to_check)
 
             results = (session.query(Tag.tag_id, Tag.name)
                        .join(Playlist, Tag.id == Playlist.tag_id)
@@ -127,17 +219,16 @@ class FileManager:
                        .all())
 
             for tag_rfid, tag_name in results:
-                print(f"  -> Found Tag - RFID: {tag_rfid}, Name: {tag_name!r}") 
+                logger.debug("  -> Found Tag - RFID: %s, Name: %r", tag_rfid, tag_name)
                 tags_info.append({
                     'tag_id': tag_rfid,
                     'name': tag_name
                 })
-            print(f"DB Query: Found {len(tags_info)} Tags for file '{path_to_check}'")
+            logger.debug("DB Query: Found %s Tags for file '%s'", len(tags_info), path_to_check)
             return tags_info
 
         except Exception as e:
-            print(f"Database Error finding tags for file '{file_path}': {e}")
-            traceback.print_exc()
+            logger.exception("Database Error finding tags for file '%s': %s", file_path, e)
             return [] 
         finally:
             session.close()
\ No newline at end of file
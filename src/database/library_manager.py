@@ -0,0 +1,268 @@
+"""Media library index operations for BertiBox database."""
+
+import logging
+import os
+import threading
+import time
+from sqlalchemy import and_, func, or_, text
+from .models import MediaFolder, MediaFile
+from .search_index import create_search_index, search_words, build_match_query
+from .. import config
+from ..utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@metrics.instrument_class('db_call')
+class LibraryManager:
+    """Keeps a persistent index of the MP3 library in sync with the filesystem.
+
+    A rescan only stats the known folders and reads the entries of folders
+    whose mtime changed, so an unchanged library costs one stat per folder.
+    A file overwritten in place keeps its folder's mtime; those are found by
+    statting every indexed file, at most every LIBRARY_FILE_CHECK_INTERVAL
+    seconds.
+    """
+
+    def __init__(self, get_session, file_check_interval=None):
+        self.get_session = get_session
+        self.file_check_interval = (config.LIBRARY_FILE_CHECK_INTERVAL if file_check_interval is None
+                                    else file_check_interval)
+        self.last_scan_time = None
+        # The first scan sets it, so a boot only stats the folders
+        self.last_file_check_time = None
+        # Bumped by invalidate(); a scan is only fresh for the generation it started in
+        self._generation = 0
+        self._scanned_generation = None
+        self._scan_lock = threading.Lock()
+        # Set by init_search_index(); substring search is used without FTS5
+        self.search_available = False
+
+    def init_search_index(self):
+        """Create the full-text search index over the media files if needed."""
+        session = self.get_session()
+        try:
+            self.search_available = create_search_index(session.connection())
+            session.commit()
+        finally:
+            session.close()
+
+    def invalidate(self):
+        """Force the next refresh to rescan, e.g. after the API changed the library.
+
+        A scan already running may have missed the change, so it does not
+        count as fresh either.
+        """
+        self._generation += 1
+
+    def _is_fresh(self, max_age):
+        return (self._scanned_generation == self._generation and self.last_scan_time is not None
+                and time.monotonic() - self.last_scan_time < max_age)
+
+    def refresh(self, base_dir, max_age=0):
+        """Rescan the library unless the last scan is younger than max_age seconds.
+
+        Returns:
+            Number of changed folders, or 0 if the scan was skipped
+        """
+        if self._is_fresh(max_age):
+            return 0
+
+        with self._scan_lock:
+            # Another thread may have scanned while we waited
+            if self._is_fresh(max_age):
+                return 0
+            generation = self._generation
+            started_at = time.monotonic()
+            check_files = (self.last_file_check_time is not None
+                           and started_at - self.last_file_check_time >= self.file_check_interval)
+            changed = self.scan(base_dir, check_files)
+            if check_files or self.last_file_check_time is None:
+                self.last_file_check_time = started_at
+            self.last_scan_time = started_at
+            self._scanned_generation = generation
+            return changed
+
+    def scan(self, base_dir, check_files=False):
+        """Incrementally synchronize the index with the filesystem below base_dir.
+
+        Args:
+            base_dir: Library root
+            check_files: Also stat the files of unchanged folders
+        """
+        session = self.get_session()
+        try:
+            known_mtimes = {}
+            known_children = {}
+            for path, parent, mtime in session.query(MediaFolder.path, MediaFolder.parent, MediaFolder.mtime):
+                known_mtimes[path] = mtime
+                known_children.setdefault(parent, []).append(path)
+
+            seen = set()
+            changed = 0
+            pending = ['']
+            while pending:
+                folder = pending.pop()
+                try:
+                    folder_mtime = os.stat(os.path.join(base_dir, folder)).st_mtime
+                except OSError:
+                    continue
+                seen.add(folder)
+
+                if known_mtimes.get(folder) == folder_mtime:
+                    pending.extend(known_children.get(folder, []))
+                    if check_files and self._check_files(session, base_dir, folder):
+                        changed += 1
+                    continue
+
+                pending.extend(self._rescan_folder(session, base_dir, folder, folder_mtime))
+                changed += 1
+
+            for folder in set(known_mtimes) - seen:
+                session.query(MediaFile).filter(MediaFile.folder == folder).delete(synchronize_session=False)
+                session.query(MediaFolder).filter(MediaFolder.path == folder).delete(synchronize_session=False)
+                changed += 1
+
+            if changed:
+                session.commit()
+                logger.info("Library index: synchronized %s changed folders.", changed)
+            return changed
+        except Exception as e:
+            session.rollback()
+            logger.exception("Error scanning media library '%s': %s", base_dir, e)
+            return 0
+        finally:
+            session.close()
+
+    def _rescan_folder(self, session, base_dir, folder, folder_mtime):
+        """Re-read one folder and reconcile its file rows. Returns its subfolders."""
+        subfolders = []
+        on_disk = {}
+        with os.scandir(os.path.join(base_dir, folder)) as entries:
+            for entry in entries:
+                relative_path = f"{folder}/{entry.name}" if folder else entry.name
+                if entry.is_dir():
+                    if not folder and entry.name == config.UPLOAD_STAGING_DIR:
+                        continue
+                    subfolders.append(relative_path)
+                elif entry.name.endswith('.mp3'):
+                    stat = entry.stat()
+                    on_disk[relative_path] = (entry.name, stat.st_size, stat.st_mtime)
+
+        indexed = {f.path: f for f in session.query(MediaFile).filter(MediaFile.folder == folder)}
+        for path, media_file in indexed.items():
+            if path not in on_disk:
+                session.delete(media_file)
+
+        for path, (name, size, mtime) in on_disk.items():
+            media_file = indexed.get(path)
+            if media_file is None:
+                session.add(MediaFile(path=path, folder=folder, name=name, size=size, mtime=mtime))
+            else:
+                self._update_file(media_file, size, mtime)
+
+        parent = folder.rsplit('/', 1)[0] if '/' in folder else ('' if folder else None)
+        session.merge(MediaFolder(path=folder, parent=parent, mtime=folder_mtime))
+        return subfolders
+
+    def _check_files(self, session, base_dir, folder):
+        """Stat the indexed files of an unchanged folder. Returns the number of changed files."""
+        changed = 0
+        for media_file in session.query(MediaFile).filter(MediaFile.folder == folder):
+            try:
+                stat = os.stat(os.path.join(base_dir, media_file.path))
+            except OSError:
+                # A removed file changes the folder's mtime, the next scan drops it
+                continue
+            if self._update_file(media_file, stat.st_size, stat.st_mtime):
+                changed += 1
+        return changed
+
+    @staticmethod
+    def _update_file(media_file, size, mtime):
+        """Store a changed size and mtime, so its metadata is extracted again.
+
+        Returns:
+            True if the file changed
+        """
+        if media_file.size == size and media_file.mtime == mtime:
+            return False
+        media_file.size = size
+        media_file.mtime = mtime
+        media_file.duration = None
+        media_file.metadata_mtime = None
+        return True
+
+    def get_all_files(self):
+        """Gets the relative paths of all indexed MP3 files."""
+        session = self.get_session()
+        try:
+            return [path for (path,) in session.query(MediaFile.path).order_by(MediaFile.path)]
+        finally:
+            session.close()
+
+    def list_folder(self, folder):
+        """Gets the direct subfolders and MP3 files of an indexed folder.
+
+        Returns:
+            Tuple of (subfolder paths, list of file dicts)
+        """
+        session = self.get_session()
+        try:
+            folder = folder.strip('/')
+            subfolders = [path for (path,) in session.query(MediaFolder.path).filter(MediaFolder.parent == folder)]
+            files = [self._file_dict(f) for f in session.query(MediaFile).filter(MediaFile.folder == folder)]
+            return subfolders, files
+        finally:
+            session.close()
+
+    def search(self, query, limit=50, offset=0):
+        """Finds indexed files whose name, folder or ID3 tags contain words starting with each query word.
+
+        Returns:
+            Tuple of (total number of matches, list of file dicts for the requested page)
+        """
+        words = search_words(query)
+        if not words:
+            return 0, []
+
+        session = self.get_session()
+        try:
+            if self.search_available:
+                params = {'match': build_match_query(words), 'limit': limit, 'offset': offset}
+                total = session.execute(
+                    text("SELECT count(*) FROM media_fts WHERE media_fts MATCH :match"), params).scalar()
+                # Ordered by path like the explorer shows results; bm25 ranking of a
+                # short prefix that matches most of the library costs several times more
+                page = session.query(MediaFile).from_statement(text(
+                    "SELECT media_files.* FROM media_fts "
+                    "JOIN media_files ON media_files.id = media_fts.rowid "
+                    "WHERE media_fts MATCH :match "
+                    "ORDER BY media_files.path LIMIT :limit OFFSET :offset"
+                )).params(**params).all()
+            else:
+                searchable = (MediaFile.path, MediaFile.title, MediaFile.artist, MediaFile.album)
+                condition = and_(*(or_(*(func.lower(column).contains(word, autoescape=True)
+                                         for column in searchable)) for word in words))
+                total = session.query(func.count(MediaFile.path)).filter(condition).scalar()
+                page = session.query(MediaFile).filter(condition)\
+                    .order_by(MediaFile.path).limit(limit).offset(offset).all()
+            return total, [self._file_dict(f) for f in page]
+        finally:
+            session.close()
+
+    @staticmethod
+    def _file_dict(media_file):
+        return {
+            'path': media_file.path,
+            'name': media_file.name,
+            'folder': media_file.folder,
+            'size': media_file.size,
+            'mtime': media_file.mtime,
+            'duration': media_file.duration,
+            'title': media_file.title,
+            'artist': media_file.artist,
+            'album': media_file.album,
+            'track_number': media_file.track_number,
+            'bitrate': media_file.bitrate
+        }
@@ -1,14 +1,24 @@
 """Database manager for BertiBox application."""
 
-from sqlalchemy import create_engine
+import logging
+import uuid
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
-from .models import Base
+from .models import Base, PlaylistItem, MediaFile
 from .tag_manager import TagManager
 from .playlist_manager import PlaylistManager
 from .file_manager import FileManager
 from .settings_manager import SettingsManager
+from .resume_manager import ResumeManager
+from .library_manager import LibraryManager
+from .metadata_manager import MetadataManager, METADATA_FIELDS
+from .tag_cache import TagCache
+from .search_index import drop_search_index
+from .engine import create_db_engine
 from .. import config
 
+logger = logging.getLogger(__name__)
+
 
 class Database:
     _instance = None
@@ -21,15 +31,24 @@ class Database:
     
     def __init__(self):
         if not self.initialized:
-            self.engine = create_engine(f'sqlite:///{config.DATABASE_FILE}', 
-                                      connect_args={'check_same_thread': False})
+            self.engine = create_db_engine(config.DATABASE_FILE)
             self.Session = sessionmaker(bind=self.engine)
             
+            # Tag resolution cache, invalidated by the managers' write paths
+            self.tag_cache = TagCache(self.get_session)
+            # Distinguishes version counters of different processes
+            self.instance_id = uuid.uuid4().hex[:8]
+            
             # Initialize managers
-            self.tags = TagManager(self.get_session)
-            self.playlists = PlaylistManager(self.get_session)
-            self.files = FileManager(self.get_session)
+            self.resume = ResumeManager(self.get_session)
+            self.tags = TagManager(self.get_session, self.tag_cache)
+            self.playlists = PlaylistManager(self.get_session, self.tag_cache)
+            self.files = FileManager(self.get_session, self.tag_cache, self.resume)
             self.settings = SettingsManager(self.get_session)
+            self.library = LibraryManager(self.get_session)
+            self.metadata = MetadataManager(self.get_session)
+            # The first refresh queues files whose metadata was never extracted
+            self._metadata_scheduled = False
             
             self.initialized = True
     
@@ -38,13 +57,56 @@ class Database:
     
     def init_db(self):
         Base.metadata.create_all(self.engine)
+        # create_all skips indexes of tables that already exist
+        for index in PlaylistItem.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+        # ... and columns that were added to existing tables later
+        self._add_media_file_ids()
+        self._add_missing_columns(MediaFile)
+        self.library.init_search_index()
         self.settings.set_setting('global_volume', 
                                  self.settings.get_setting('global_volume', 
                                                          default_value=str(config.DEFAULT_VOLUME)), 
                                  True)
     
+    def _add_media_file_ids(self):
+        """Rebuild a media_files table keyed on path with the integer id the search index uses.
+
+        The index is dropped as well and rebuilt by init_search_index().
+        """
+        table = MediaFile.__table__
+        with self.engine.begin() as connection:
+            existing = [row[1] for row in connection.execute(text(f'PRAGMA table_info({table.name})'))]
+            if 'id' in existing:
+                return
+            drop_search_index(connection)
+            connection.execute(text(f'ALTER TABLE {table.name} RENAME TO {table.name}_old'))
+            # Indexes keep their names when their table is renamed
+            for index in table.indexes:
+                connection.execute(text(f'DROP INDEX IF EXISTS {index.name}'))
+            table.create(connection)
+            columns = ', '.join(column.name for column in table.columns if column.name in existing)
+            connection.execute(text(f'INSERT INTO {table.name} ({columns}) '
+                                    f'SELECT {columns} FROM {table.name}_old ORDER BY path'))
+            connection.execute(text(f'DROP TABLE {table.name}_old'))
+        logger.info("Added integer ids to the media library index.")
+
+    def _add_missing_columns(self, model):
+        """Add nullable columns of model that are missing in its existing table."""
+        table = model.__table__
+        with self.engine.begin() as connection:
+            existing = {row[1] for row in connection.execute(text(f'PRAGMA table_info({table.name})'))}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(self.engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    
     def cleanup(self):
-        pass
+        self.flush_settings()
+        self.flush_resume_positions()
+        self.settings.stop()
+        self.resume.stop()
+        self.metadata.shutdown(wait=False)
     
     # Tag operations (delegated to TagManager)
     def add_tag(self, tag_id, name=None):
@@ -54,7 +116,11 @@ class Database:
         return self.tags.get_tag(tag_id)
     
     def delete_tag(self, tag_id):
-        return self.tags.delete_tag(tag_id)
+        deleted = self.tags.delete_tag(tag_id)
+        if deleted:
+            # A new tag with the same UID must not continue where this one stopped
+            self.resume.delete_position(tag_id)
+        return deleted
     
     def update_tag(self, tag_id, name):
         return self.tags.update_tag(tag_id, name)
@@ -62,6 +128,16 @@ class Database:
     def get_all_tags(self):
         return self.tags.get_all_tags()
     
+    def resolve_tag(self, tag_id):
+        return self.tag_cache.resolve(tag_id)
+    
+    def preload_tags(self):
+        return self.tag_cache.preload()
+    
+    def get_tags_version(self):
+        """Gets a token that changes whenever the result of get_all_tags may change."""
+        return f"{self.instance_id}-{self.tag_cache.tags_version}"
+    
     # Playlist operations (delegated to PlaylistManager)
     def add_playlist(self, tag_id, name):
         return self.playlists.add_playlist(tag_id, name)
@@ -75,12 +151,22 @@ class Database:
     def get_playlist_items(self, playlist_id):
         return self.playlists.get_playlist_items(playlist_id)
     
+    def get_playlist_items_with_metadata(self, playlist_id):
+        """Gets the playlist items with the cached tags, duration and bitrate of their files."""
+        items = self.playlists.get_playlist_items(playlist_id)
+        metadata = self.metadata.get_metadata(item['mp3_file'] for item in items)
+        empty = dict.fromkeys(METADATA_FIELDS)
+        return [dict(item, **metadata.get(item['mp3_file'], empty)) for item in items]
+    
     def delete_playlist_item(self, item_id):
         return self.playlists.delete_playlist_item(item_id)
     
     def update_playlist_item_position(self, item_id, new_position):
         return self.playlists.update_playlist_item_position(item_id, new_position)
     
+    def reorder_playlist_items(self, playlist_id, item_ids):
+        return self.playlists.reorder_playlist_items(playlist_id, item_ids)
+    
     def add_playlist_items(self, playlist_id, mp3_files):
         return self.playlists.add_playlist_items(playlist_id, mp3_files)
     
@@ -91,14 +177,23 @@ class Database:
     def is_file_in_playlist(self, file_path):
         return self.files.is_file_in_playlist(file_path)
     
+    def get_assigned_files_in_folder(self, folder_path):
+        return self.files.get_assigned_files_in_folder(folder_path)
+    
+    def get_assigned_files(self, file_paths):
+        return self.files.get_assigned_files(file_paths)
+    
     def is_file_used(self, relative_path):
         return self.files.is_file_used(relative_path)
     
     def update_path_references(self, old_path_relative, new_path_relative):
         return self.files.update_path_references(old_path_relative, new_path_relative)
     
-    def are_files_in_folder_used(self, relative_folder_path, base_dir):
-        return self.files.are_files_in_folder_used(relative_folder_path, base_dir)
+    def get_used_files_in_folder(self, relative_folder_path):
+        return self.files.get_used_files_in_folder(relative_folder_path)
+    
+    def are_files_in_folder_used(self, relative_folder_path):
+        return self.files.are_files_in_folder_used(relative_folder_path)
     
     def get_playlists_for_file(self, file_path):
         return self.files.get_playlists_for_file(file_path)
@@ -108,4 +203,40 @@ class Database:
         return self.settings.get_setting(key, default_value)
     
     def set_setting(self, key, value, set_if_not_exists=False):
-        return self.settings.set_setting(key, value, set_if_not_exists)
\ No newline at end of file
+        return self.settings.set_setting(key, value, set_if_not_exists)
+    
+    def flush_settings(self):
+        return self.settings.flush()
+    
+    # Resume positions (delegated to ResumeManager)
+    def get_resume_position(self, tag_id):
+        return self.resume.get_position(tag_id)
+    
+    def set_resume_position(self, tag_id, playlist_id, playlist_index, mp3_file, offset_seconds):
+        return self.resume.set_position(tag_id, playlist_id, playlist_index, mp3_file, offset_seconds)
+    
+    def flush_resume_positions(self):
+        return self.resume.flush()
+    
+    # Media library index (delegated to LibraryManager)
+    def refresh_library(self, base_dir, max_age=0):
+        changed = self.library.refresh(base_dir, max_age)
+        if changed or not self._metadata_scheduled:
+            self._metadata_scheduled = True
+            self.metadata.schedule(base_dir)
+        return changed
+    
+    def invalidate_library(self):
+        return self.library.invalidate()
+    
+    def get_library_files(self):
+        return self.library.get_all_files()
+    
+    def list_library_folder(self, folder):
+        return self.library.list_folder(folder)
+    
+    def search_library(self, query, limit=50, offset=0):
+        return self.library.search(query, limit, offset)
+    
+    def get_media_metadata(self, paths):
+        return self.metadata.get_metadata(paths)
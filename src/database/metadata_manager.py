@@ -0,0 +1,123 @@
+"""Background ID3 tag and duration extraction for the media library index."""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import or_
+from .models import MediaFile
+from .. import config
+from ..utils import metrics
+from ..utils.mp3_metadata import read_mp3_metadata
+
+logger = logging.getLogger(__name__)
+
+METADATA_FIELDS = ('title', 'artist', 'album', 'track_number', 'duration', 'bitrate')
+
+
+@metrics.instrument_class('db_call')
+class MetadataManager:
+    """Fills the metadata columns of indexed files in a background worker pool.
+
+    Each file is parsed once per (path, size, mtime): the library scan clears
+    metadata_mtime when a file changes, and schedule() only queues files whose
+    metadata_mtime does not match their mtime. Results are written batch-wise
+    and dropped if the file changed again while it was parsed.
+    """
+
+    def __init__(self, get_session, workers=None, batch_size=None):
+        self.get_session = get_session
+        self.workers = config.METADATA_WORKERS if workers is None else workers
+        self.batch_size = config.METADATA_BATCH_SIZE if batch_size is None else batch_size
+        self._executor = None
+        self._queued = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, base_dir):
+        """Queue extraction for all indexed files without current metadata.
+
+        Returns:
+            Number of files queued
+        """
+        session = self.get_session()
+        try:
+            stale = session.query(MediaFile.path, MediaFile.size, MediaFile.mtime).filter(
+                or_(MediaFile.metadata_mtime.is_(None), MediaFile.metadata_mtime != MediaFile.mtime)).all()
+        finally:
+            session.close()
+
+        with self._lock:
+            pending = [row for row in stale if row.path not in self._queued]
+            if not pending:
+                return 0
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='metadata')
+            self._queued.update(row.path for row in pending)
+            for start in range(0, len(pending), self.batch_size):
+                batch = [tuple(row) for row in pending[start:start + self.batch_size]]
+                self._executor.submit(self._extract_batch, base_dir, batch)
+
+        logger.debug("Queued metadata extraction for %s files.", len(pending))
+        return len(pending)
+
+    def _extract_batch(self, base_dir, batch):
+        """Parse a batch of (path, size, mtime) files and store the results in one transaction."""
+        results = {}
+        try:
+            for path, size, mtime in batch:
+                try:
+                    results[path] = (size, mtime, read_mp3_metadata(os.path.join(base_dir, path)))
+                except OSError as e:
+                    logger.debug("Could not read metadata of '%s': %s", path, e)
+            self._store(results)
+        except Exception as e:
+            logger.exception("Error extracting media metadata: %s", e)
+        finally:
+            with self._lock:
+                self._queued.difference_update(path for path, _, _ in batch)
+
+    def _store(self, results):
+        if not results:
+            return
+        session = self.get_session()
+        try:
+            for media_file in session.query(MediaFile).filter(MediaFile.path.in_(results)):
+                size, mtime, metadata = results[media_file.path]
+                # The file changed while it was parsed; the next schedule() picks it up again
+                if media_file.size != size or media_file.mtime != mtime:
+                    continue
+                for field in METADATA_FIELDS:
+                    setattr(media_file, field, metadata[field])
+                media_file.metadata_mtime = mtime
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def get_metadata(self, paths):
+        """Gets the stored metadata of the given files.
+
+        Returns:
+            Dict mapping each indexed path to a dict of METADATA_FIELDS
+        """
+        paths = set(paths)
+        if not paths:
+            return {}
+        columns = [getattr(MediaFile, field) for field in METADATA_FIELDS]
+        session = self.get_session()
+        try:
+            return {row[0]: dict(zip(METADATA_FIELDS, row[1:]))
+                    for row in session.query(MediaFile.path, *columns).filter(MediaFile.path.in_(paths))}
+        finally:
+            session.close()
+
+    def shutdown(self, wait=True):
+        """Stop the worker pool; without wait, queued batches are dropped."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            if not wait:
+                self._queued.clear()
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
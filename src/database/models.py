@@ -1,6 +1,6 @@
 """Database models for BertiBox application."""
 
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Sequence
+from sqlalchemy import create_engine, Column, Integer, Float, String, ForeignKey, Sequence, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -19,17 +19,54 @@ class Playlist(Base):
     tag_id = Column(Integer, ForeignKey('tags.id'))
     name = Column(String(100))
     tag = relationship("Tag", back_populates="playlists")
-    items = relationship("PlaylistItem", back_populates="playlist", order_by="PlaylistItem.position")
+    items = relationship("PlaylistItem", back_populates="playlist",
+                         order_by="(PlaylistItem.position, PlaylistItem.id)")
 
 class PlaylistItem(Base):
     __tablename__ = 'playlist_items'
     id = Column(Integer, Sequence('playlist_item_id_seq'), primary_key=True)
     playlist_id = Column(Integer, ForeignKey('playlists.id'))
-    mp3_file = Column(String(255), nullable=False)
+    mp3_file = Column(String(255), nullable=False, index=True)
+    # Sparse sort key; the 0-based position the API reports is the item's index in this order
     position = Column(Integer, nullable=False)
     playlist = relationship("Playlist", back_populates="items")
+    __table_args__ = (Index('ix_playlist_items_playlist_position', 'playlist_id', 'position'),)
 
 class Setting(Base):
     __tablename__ = 'settings'
     key = Column(String(50), primary_key=True)
-    value = Column(String(255))
\ No newline at end of file
+    value = Column(String(255))
+
+class ResumePosition(Base):
+    __tablename__ = 'resume_positions'
+    # RFID UID like Tag.tag_id, so a position survives re-creating the tag's playlist
+    tag_id = Column(String(50), primary_key=True)
+    playlist_id = Column(Integer, nullable=False)
+    playlist_index = Column(Integer, nullable=False)
+    mp3_file = Column(String(255))
+    offset_seconds = Column(Float, nullable=False)
+
+class MediaFolder(Base):
+    __tablename__ = 'media_folders'
+    path = Column(String(255), primary_key=True)
+    parent = Column(String(255), index=True)
+    mtime = Column(Float, nullable=False)
+
+class MediaFile(Base):
+    __tablename__ = 'media_files'
+    # Row id of the search index; unlike the implicit rowid it survives VACUUM
+    id = Column(Integer, primary_key=True)
+    path = Column(String(255), nullable=False, unique=True)
+    folder = Column(String(255), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
+    size = Column(Integer, nullable=False)
+    mtime = Column(Float, nullable=False)
+    duration = Column(Float)
+    # ID3 tags, indexed for search together with name and folder
+    title = Column(String(255))
+    artist = Column(String(255))
+    album = Column(String(255))
+    track_number = Column(Integer)
+    bitrate = Column(Integer)  # kbit/s
+    # File mtime the tags, duration and bitrate were extracted for
+    metadata_mtime = Column(Float)
@@ -1,12 +1,43 @@
 """Playlist management operations for BertiBox database."""
 
-import traceback
+import logging
+from sqlalchemy import case, func, update
 from .models import Tag, Playlist, PlaylistItem
+from ..utils import metrics
 
+logger = logging.getLogger(__name__)
 
+# Gap between the sort keys of neighbouring items. A moved item takes the
+# midpoint of its new neighbours, so only its own row is written until a gap
+# is used up and the playlist gets renumbered.
+POSITION_STEP = 1024
+
+
+@metrics.instrument_class('db_call')
 class PlaylistManager:
-    def __init__(self, get_session):
+    def __init__(self, get_session, cache=None):
         self.get_session = get_session
+        self.cache = cache
+    
+    def _invalidate_playlist(self, playlist_id):
+        if self.cache:
+            self.cache.invalidate_playlist(playlist_id)
+    
+    def _get_append_info(self, session, playlist_id):
+        """Gets the item count and the highest sort key of a playlist (None if empty)."""
+        return session.query(func.count(PlaylistItem.id), func.max(PlaylistItem.position))\
+            .filter(PlaylistItem.playlist_id == playlist_id)\
+            .one()
+    
+    def _renumber(self, session, playlist_id, ordered_item_ids):
+        """Rewrites all sort keys of a playlist POSITION_STEP apart in one statement."""
+        new_keys = {item_id: index * POSITION_STEP for index, item_id in enumerate(ordered_item_ids)}
+        session.execute(
+            update(PlaylistItem)
+            .where(PlaylistItem.playlist_id == playlist_id)
+            .values(position=case(new_keys, value=PlaylistItem.id))
+            .execution_options(synchronize_session=False)
+        )
     
     def add_playlist(self, tag_id, name):
         session = self.get_session()
@@ -20,6 +51,8 @@ class PlaylistManager:
             playlist = Playlist(name=name, tag_id=tag.id)
             session.add(playlist)
             session.commit()
+            if self.cache:
+                self.cache.invalidate_tag(tag_id)
             session.refresh(playlist)
             
             _ = playlist.tag
@@ -41,38 +74,37 @@ class PlaylistManager:
             session.close()
     
     def add_playlist_item(self, playlist_id, mp3_file):
-        """Adds a single item to the end of the playlist with the correct position."""
+        """Adds a single item to the end of the playlist."""
         session = self.get_session()
         try:
             playlist = session.query(Playlist).filter_by(id=playlist_id).first()
             if not playlist:
-                print(f"Add Item Error: Playlist {playlist_id} not found.")
+                logger.error("Add Item Error: Playlist %s not found.", playlist_id)
                 return None
 
-            current_item_count = session.query(PlaylistItem).filter_by(playlist_id=playlist_id).count()
-            new_position = current_item_count
-            print(f"Adding single item {mp3_file} to playlist {playlist_id} at position {new_position}")
+            item_count, last_key = self._get_append_info(session, playlist_id)
+            logger.debug("Adding single item %s to playlist %s at position %s", mp3_file, playlist_id, item_count)
 
             item = PlaylistItem(
                 playlist_id=playlist_id,
                 mp3_file=mp3_file,
-                position=new_position
+                position=0 if last_key is None else last_key + POSITION_STEP
             )
             session.add(item)
             session.commit()
+            self._invalidate_playlist(playlist_id)
             session.refresh(item)
-            print(f"Single item added successfully with ID {item.id}.")
+            logger.debug("Single item added successfully with ID %s.", item.id)
             
             result = {
                 'id': item.id,
                 'playlist_id': item.playlist_id,
                 'mp3_file': item.mp3_file,
-                'position': item.position
+                'position': item_count
             }
             return result
         except Exception as e:
-            print(f"Error adding single item {mp3_file} to playlist {playlist_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error adding single item %s to playlist %s: %s", mp3_file, playlist_id, e)
             session.rollback()
             return None
         finally:
@@ -81,160 +113,180 @@ class PlaylistManager:
     def get_playlist_items(self, playlist_id):
         session = self.get_session()
         try:
-            print(f"DB: Querying items for playlist {playlist_id}, ordered by position...")
-            items = session.query(PlaylistItem).filter_by(playlist_id=playlist_id).order_by(PlaylistItem.position).all()
+            logger.debug("DB: Querying items for playlist %s, ordered by position...", playlist_id)
+            items = session.query(PlaylistItem)\
+                .filter_by(playlist_id=playlist_id)\
+                .order_by(PlaylistItem.position, PlaylistItem.id)\
+                .all()
             item_list = []
-            for item in items:
-                print(f"  -> Item ID: {item.id}, MP3: {item.mp3_file}, DB Position: {item.position}")
+            for index, item in enumerate(items):
+                logger.debug("  -> Item ID: %s, MP3: %s, Position: %s (sort key %s)", item.id, item.mp3_file, index, item.position)
                 item_list.append({
                     'id': item.id,
                     'playlist_id': item.playlist_id,
                     'mp3_file': item.mp3_file,
-                    'position': item.position
+                    'position': index
                 })
-            print(f"DB: Returning {len(item_list)} items for playlist {playlist_id}")
+            logger.debug("DB: Returning %s items for playlist %s", len(item_list), playlist_id)
             return item_list
         finally:
             session.close()
     
     def delete_playlist_item(self, item_id):
-        """Deletes an item and re-sequences the remaining items in the playlist."""
+        """Deletes an item. The positions of the remaining items close the gap on read."""
         session = self.get_session()
         try:
             item_to_delete = session.query(PlaylistItem).filter_by(id=item_id).first()
             if not item_to_delete:
-                print(f"Delete Error: Item {item_id} not found.")
+                logger.error("Delete Error: Item %s not found.", item_id)
                 return False
 
             playlist_id = item_to_delete.playlist_id
-            deleted_position = item_to_delete.position
-            print(f"Deleting item {item_id} (MP3: {item_to_delete.mp3_file}) from playlist {playlist_id} at position {deleted_position}.")
+            logger.debug("Deleting item %s (MP3: %s) from playlist %s.", item_id, item_to_delete.mp3_file, playlist_id)
 
             session.delete(item_to_delete)
             session.commit()
+            self._invalidate_playlist(playlist_id)
             
-            print(f"Re-sequencing remaining items in playlist {playlist_id} after deletion.")
-            remaining_items = session.query(PlaylistItem)\
-                .filter_by(playlist_id=playlist_id)\
-                .order_by(PlaylistItem.position.asc())\
-                .all()
-            
-            needs_commit = False
-            for index, item in enumerate(remaining_items):
-                if item.position != index:
-                    print(f"  Correcting position for item {item.id} (MP3: {item.mp3_file}) from {item.position} to {index}")
-                    item.position = index
-                    needs_commit = True
-
-            if needs_commit:
-                print(f"Committing re-sequenced positions for playlist {playlist_id}.")
-                session.commit()
-            else:
-                print(f"No position changes needed after deletion for playlist {playlist_id}.")
-            
-            print(f"Successfully processed deletion for item {item_id}.")
+            logger.debug("Successfully processed deletion for item %s.", item_id)
             return True
         except Exception as e:
-            print(f"Error deleting or re-sequencing item {item_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error deleting item %s: %s", item_id, e)
             session.rollback()
             return False
         finally:
             session.close()
     
     def update_playlist_item_position(self, item_id, new_position):
-        """Updates the position of an item and shifts other items accordingly."""
+        """Moves an item to a new 0-based position by giving it a sort key between its new neighbours."""
         session = self.get_session()
         try:
             item_to_move = session.query(PlaylistItem).filter_by(id=item_id).first()
             if not item_to_move:
-                print(f"Update Position Error: Item {item_id} not found.")
+                logger.error("Update Position Error: Item %s not found.", item_id)
                 return False
 
             playlist_id = item_to_move.playlist_id
-            old_position = item_to_move.position
-            target_position = new_position
+            ordered = session.query(PlaylistItem.id, PlaylistItem.position)\
+                .filter_by(playlist_id=playlist_id)\
+                .order_by(PlaylistItem.position, PlaylistItem.id)\
+                .all()
+            ordered_ids = [row_id for row_id, _ in ordered]
+            others = [(row_id, key) for row_id, key in ordered if row_id != item_id]
+            old_position = ordered_ids.index(item_id)
+            target_position = max(0, min(new_position, len(others)))
 
             if old_position == target_position:
-                print(f"Update Position: Item {item_id} already at position {target_position}.")
+                logger.debug("Update Position: Item %s already at position %s.", item_id, target_position)
                 return True
 
-            if target_position > old_position:
-                print(f"Moving item {item_id} DOWN from {old_position} to {target_position}. Shifting items in between.")
-                session.query(PlaylistItem).\
-                    filter(
-                        PlaylistItem.playlist_id == playlist_id,
-                        PlaylistItem.position > old_position,
-                        PlaylistItem.position <= target_position
-                    ).\
-                    update({PlaylistItem.position: PlaylistItem.position - 1}, synchronize_session='fetch')
+            before = others[target_position - 1][1] if target_position > 0 else None
+            after = others[target_position][1] if target_position < len(others) else None
+            if before is None:
+                new_key = after - POSITION_STEP
+            elif after is None:
+                new_key = before + POSITION_STEP
+            elif after - before >= 2:
+                new_key = (before + after) // 2
             else:
-                print(f"Moving item {item_id} UP from {old_position} to {target_position}. Shifting items in between.")
-                session.query(PlaylistItem).\
-                    filter(
-                        PlaylistItem.playlist_id == playlist_id,
-                        PlaylistItem.position >= target_position,
-                        PlaylistItem.position < old_position
-                    ).\
-                    update({PlaylistItem.position: PlaylistItem.position + 1}, synchronize_session='fetch')
+                new_key = None
 
-            print(f"Setting final position for item {item_id} to {target_position}")
-            item_to_move.position = target_position
+            if new_key is not None:
+                logger.info("Moving item %s from %s to %s (sort key %s)", item_id, old_position, target_position, new_key)
+                item_to_move.position = new_key
+            else:
+                # No room left between the neighbours, spread the whole playlist out again
+                logger.info("Moving item %s from %s to %s, renumbering playlist %s", item_id, old_position, target_position, playlist_id)
+                new_order = [row_id for row_id, _ in others]
+                new_order.insert(target_position, item_id)
+                self._renumber(session, playlist_id, new_order)
 
             session.commit()
-            print(f"Successfully updated position for item {item_id}.")
+            self._invalidate_playlist(playlist_id)
+            logger.debug("Successfully updated position for item %s.", item_id)
             return True
 
         except Exception as e:
-            print(f"Error updating position for item {item_id} to {new_position}: {e}")
-            traceback.print_exc()
+            logger.exception("Error updating position for item %s to %s: %s", item_id, new_position, e)
             session.rollback()
             return False
         finally:
             session.close()
     
+    def reorder_playlist_items(self, playlist_id, item_ids):
+        """Rewrites all positions of a playlist in one statement and one commit.
+
+        Args:
+            playlist_id: The ID of the playlist
+            item_ids: IDs of all items of the playlist in their new order
+
+        Returns:
+            True on success, False if item_ids is not exactly the playlist's items, None on error
+        """
+        session = self.get_session()
+        try:
+            existing_ids = {item_id for (item_id,) in
+                            session.query(PlaylistItem.id).filter_by(playlist_id=playlist_id)}
+            if len(item_ids) != len(existing_ids) or set(item_ids) != existing_ids:
+                logger.error("Reorder Error: Item IDs do not match the items of playlist %s.", playlist_id)
+                return False
+            if not item_ids:
+                return True
+
+            logger.info("Reordering %s items in playlist %s", len(item_ids), playlist_id)
+            self._renumber(session, playlist_id, item_ids)
+            session.commit()
+            self._invalidate_playlist(playlist_id)
+            return True
+        except Exception as e:
+            logger.exception("Error reordering items of playlist %s: %s", playlist_id, e)
+            session.rollback()
+            return None
+        finally:
+            session.close()
+    
     def add_playlist_items(self, playlist_id, mp3_files):
-        """Adds multiple items to the end of the playlist with correct sequential positions."""
+        """Adds multiple items to the end of the playlist."""
         session = self.get_session()
         try:
             playlist = session.query(Playlist).filter_by(id=playlist_id).first()
             if not playlist:
-                print(f"Batch Add Error: Playlist {playlist_id} not found.")
+                logger.error("Batch Add Error: Playlist %s not found.", playlist_id)
                 return None
             
-            start_position = session.query(PlaylistItem).filter_by(playlist_id=playlist_id).count()
-            print(f"Batch adding {len(mp3_files)} items to playlist {playlist_id}, starting at position {start_position}")
+            start_position, last_key = self._get_append_info(session, playlist_id)
+            first_key = 0 if last_key is None else last_key + POSITION_STEP
+            logger.info("Batch adding %s items to playlist %s, starting at position %s", len(mp3_files), playlist_id, start_position)
             
             added_items_for_response = []
             added_orm_items = []
 
             for index, mp3_file in enumerate(mp3_files):
-                current_position = start_position + index
-                print(f"  - Adding: {mp3_file} at position {current_position}")
+                logger.debug("  - Adding: %s at position %s", mp3_file, start_position + index)
                 item = PlaylistItem(
                     playlist_id=playlist_id,
                     mp3_file=mp3_file,
-                    position=current_position
+                    position=first_key + index * POSITION_STEP
                 )
                 session.add(item)
                 added_orm_items.append(item)
             
             session.flush()
 
-            for item in added_orm_items:
+            for index, item in enumerate(added_orm_items):
                 added_items_for_response.append({
                     'id': item.id,
                     'playlist_id': item.playlist_id,
                     'mp3_file': item.mp3_file,
-                    'position': item.position
+                    'position': start_position + index
                 })
 
-            print(f"Committing {len(mp3_files)} new items for playlist {playlist_id}")
+            logger.debug("Committing %s new items for playlist %s", len(mp3_files), playlist_id)
             session.commit()
+            self._invalidate_playlist(playlist_id)
             return added_items_for_response
         except Exception as e:
-            print(f"Error batch adding items to playlist {playlist_id}: {e}")
-            traceback.print_exc()
+            logger.exception("Error batch adding items to playlist %s: %s", playlist_id, e)
             session.rollback()
             return None
         finally:
@@ -246,11 +298,11 @@ class PlaylistManager:
         try:
             tag = session.query(Tag).filter(Tag.id == tag_id).first()
             if not tag:
-                print(f"Assign Tag Error: Tag with DB ID {tag_id} not found.")
+                logger.error("Assign Tag Error: Tag with DB ID %s not found.", tag_id)
                 return False
 
             if not tag.playlists:
-                print(f"Assign Tag Error: No playlist found for Tag {tag_id} ('{tag.name}').")
+                logger.error("Assign Tag Error: No playlist found for Tag %s ('%s').", tag_id, tag.name)
                 return False 
             
             playlist_id = tag.playlists[0].id
@@ -258,24 +310,23 @@ class PlaylistManager:
 
             cleaned_file_path = file_path_relative.lstrip('/')
 
-            print(f"Assign Tag DB: Adding '{cleaned_file_path}' to Playlist ID {playlist_id} ('{playlist_name}') for Tag ID {tag_id}")
+            logger.debug("Assign Tag DB: Adding '%s' to Playlist ID %s ('%s') for Tag ID %s", cleaned_file_path, playlist_id, playlist_name, tag_id)
             added_item = self.add_playlist_item(playlist_id, cleaned_file_path)
             
             if added_item:
-                print(f"Assign Tag DB: Successfully added item {added_item['id']}.")
+                logger.debug("Assign Tag DB: Successfully added item %s.", added_item['id'])
                 return True
             else:
-                print(f"Assign Tag DB: Failed to add '{cleaned_file_path}' to Playlist ID {playlist_id} (possibly duplicate or DB error).")
+                logger.error("Assign Tag DB: Failed to add '%s' to Playlist ID %s (possibly duplicate or DB error).", cleaned_file_path, playlist_id)
                 existing = session.query(PlaylistItem).filter_by(playlist_id=playlist_id, mp3_file=cleaned_file_path).first()
                 if existing:
-                    print(f"Assign Tag Info: File '{cleaned_file_path}' already exists in Playlist {playlist_id}.")
+                    logger.info("Assign Tag Info: File '%s' already exists in Playlist %s.", cleaned_file_path, playlist_id)
                     return True
                 else:
                     return False
 
         except Exception as e:
-            print(f"Database Error assigning tag {tag_id} to file '{file_path_relative}': {e}")
-            traceback.print_exc()
+            logger.exception("Database Error assigning tag %s to file '%s': %s", tag_id, file_path_relative, e)
             return False
         finally:
             session.close()
\ No newline at end of file
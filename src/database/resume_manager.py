@@ -0,0 +1,110 @@
+"""Resume position storage for BertiBox database."""
+
+import logging
+from .models import ResumePosition
+from .write_behind import WriteBehindStore
+from .. import config
+from ..utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@metrics.instrument_class('db_call')
+class ResumeManager(WriteBehindStore):
+    """Write-behind store for the playback position of each tag.
+
+    Positions are served from memory. Checkpoints are written at most
+    RESUME_FLUSH_DELAY seconds after the first pending one, so regular
+    checkpoints cannot postpone the write forever, or when flush() is
+    called on shutdown.
+    """
+
+    description = 'resume positions'
+    thread_name = 'resume-flush'
+
+    def __init__(self, get_session, flush_delay=None):
+        super().__init__(get_session, config.RESUME_FLUSH_DELAY if flush_delay is None else flush_delay)
+
+    def _load_values(self, session):
+        return {row.tag_id: self._position_dict(row) for row in session.query(ResumePosition)}
+
+    def _write(self, session, pending):
+        for tag_id, position in pending.items():
+            session.merge(ResumePosition(tag_id=tag_id, **position))
+
+    def get_position(self, tag_id):
+        """Gets the saved position of a tag.
+
+        Returns:
+            Dict with playlist_id, playlist_index, mp3_file and offset_seconds, or None
+        """
+        with self._lock:
+            position = self._load().get(tag_id)
+            return dict(position) if position else None
+
+    def set_position(self, tag_id, playlist_id, playlist_index, mp3_file, offset_seconds):
+        """Remembers where playback of a tag's playlist is; written to the database later."""
+        with self._lock:
+            self._load()[tag_id] = {
+                'playlist_id': playlist_id,
+                'playlist_index': playlist_index,
+                'mp3_file': mp3_file,
+                'offset_seconds': offset_seconds
+            }
+            self._mark_dirty(tag_id)
+        return True
+    
+    def move_paths(self, old_path, new_path):
+        """Point cached positions at a renamed file or folder.
+        
+        The stored rows are rewritten by the rename's UPDATE. Moved positions are
+        marked dirty, so a flush that read them before the rename cannot leave
+        the old path behind.
+        """
+        old_dir_prefix = old_path + '/'
+        with self._lock:
+            if self._values is None:
+                return
+            for tag_id, position in self._values.items():
+                mp3_file = position['mp3_file'] or ''
+                if mp3_file == old_path:
+                    position['mp3_file'] = new_path
+                elif mp3_file.startswith(old_dir_prefix):
+                    position['mp3_file'] = new_path + '/' + mp3_file[len(old_dir_prefix):]
+                else:
+                    continue
+                self._mark_dirty(tag_id)
+    
+    def delete_position(self, tag_id):
+        """Forget the saved position of a deleted tag.
+        
+        Returns:
+            True if the stored row could be deleted
+        """
+        # Holding the flush lock keeps a running flush from writing the position back
+        with self._flush_lock:
+            with self._lock:
+                if self._values is not None:
+                    self._values.pop(tag_id, None)
+                self._dirty.discard(tag_id)
+            
+            session = self.get_session()
+            try:
+                session.query(ResumePosition).filter_by(tag_id=tag_id).delete()
+                session.commit()
+                return True
+            except Exception as e:
+                logger.error("Error deleting resume position of tag %s: %s", tag_id, e)
+                session.rollback()
+                return False
+            finally:
+                session.close()
+
+    @staticmethod
+    def _position_dict(row):
+        return {
+            'playlist_id': row.playlist_id,
+            'playlist_index': row.playlist_index,
+            'mp3_file': row.mp3_file,
+            'offset_seconds': row.offset_seconds
+        }
@@ -0,0 +1,72 @@
+"""SQLite FTS5 search index over the media library."""
+
+import logging
+import re
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Columns of media_files that are searchable
+SEARCH_COLUMNS = ('name', 'folder', 'title', 'artist', 'album')
+
+_columns = ', '.join(SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+
+# External content table: the text lives in media_files only and triggers keep
+# the index in step with every insert, update and delete of an indexed file.
+# Rows are keyed on media_files.id, an INTEGER PRIMARY KEY that VACUUM keeps.
+SEARCH_INDEX_TRIGGERS = ('media_files_fts_insert', 'media_files_fts_delete', 'media_files_fts_update')
+SEARCH_INDEX_DDL = (
+    f"CREATE VIRTUAL TABLE media_fts USING fts5({_columns}, content='media_files', "
+    f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS media_files_fts_insert AFTER INSERT ON media_files BEGIN "
+    f"INSERT INTO media_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS media_files_fts_delete AFTER DELETE ON media_files BEGIN "
+    f"INSERT INTO media_fts(media_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS media_files_fts_update AFTER UPDATE OF {_columns} ON media_files BEGIN "
+    f"INSERT INTO media_fts(media_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO media_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+)
+
+
+def create_search_index(connection):
+    """Create the FTS table and its triggers if they do not exist yet.
+
+    A newly created index is filled from the existing media_files rows.
+
+    Returns:
+        True if full-text search is available
+    """
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'media_fts'")).first()
+    try:
+        if not exists:
+            connection.execute(text(SEARCH_INDEX_DDL[0]))
+        for statement in SEARCH_INDEX_DDL[1:]:
+            connection.execute(text(statement))
+        if not exists:
+            connection.execute(text("INSERT INTO media_fts(media_fts) VALUES ('rebuild')"))
+            logger.info("Created media search index.")
+        return True
+    except Exception as e:
+        # SQLite builds without FTS5 fall back to substring search
+        logger.warning("Full-text search not available, using substring search: %s", e)
+        return False
+
+
+def drop_search_index(connection):
+    """Drop the FTS table and its triggers; create_search_index() rebuilds them."""
+    for trigger in SEARCH_INDEX_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    connection.execute(text("DROP TABLE IF EXISTS media_fts"))
+
+
+def search_words(query):
+    """Split user input into lower-case search words, dropping punctuation."""
+    return re.findall(r'\w+', query.lower())
+
+
+def build_match_query(words):
+    """Build an FTS5 query where every word is a required prefix."""
+    return ' '.join(f'"{word}"*' for word in words)
@@ -1,43 +1,65 @@
 """Settings management operations for BertiBox database."""
 
+import logging
 from .models import Setting
+from .write_behind import WriteBehindStore
+from .. import config
+from ..utils import metrics
 
+logger = logging.getLogger(__name__)
+
+
+@metrics.instrument_class('db_call')
+class SettingsManager(WriteBehindStore):
+    """Write-behind store for key/value settings.
+
+    All settings are loaded once and served from memory. Changes are written
+    SETTINGS_FLUSH_DELAY seconds after the last of them, or when flush() is
+    called on shutdown.
+    """
+
+    description = 'settings'
+    thread_name = 'settings-flush'
+    postpone_flush = True
+
+    def __init__(self, get_session, flush_delay=None):
+        super().__init__(get_session, config.SETTINGS_FLUSH_DELAY if flush_delay is None else flush_delay)
+
+    def _load_values(self, session):
+        return {setting.key: setting.value for setting in session.query(Setting)}
+
+    def _write(self, session, pending):
+        existing = {setting.key: setting for setting in
+                    session.query(Setting).filter(Setting.key.in_(list(pending)))}
+        for key, value in pending.items():
+            if key in existing:
+                existing[key].value = value
+            else:
+                session.add(Setting(key=key, value=value))
 
-class SettingsManager:
-    def __init__(self, get_session):
-        self.get_session = get_session
-    
     def get_setting(self, key, default_value=None):
-        session = self.get_session()
-        try:
-            setting = session.query(Setting).filter_by(key=key).first()
-            if setting:
-                return setting.value
-            return default_value
-        finally:
-            session.close()
-    
+        with self._lock:
+            return self._load().get(key, default_value)
+
     def set_setting(self, key, value, set_if_not_exists=False):
-        """Sets a setting value. If set_if_not_exists is True, it only sets the value if the key doesn't exist."""
-        session = self.get_session()
+        """Sets a setting value. If set_if_not_exists is True, it only sets the value if the key doesn't exist.
+
+        The value is stored in memory right away and written to the database later.
+        """
         try:
-            setting = session.query(Setting).filter_by(key=key).first()
-            if setting:
-                if not set_if_not_exists:
-                    print(f"Updating setting '{key}' to '{value}'")
-                    setting.value = str(value)
-                    session.commit()
-                else:
-                    print(f"Setting '{key}' already exists, not overwriting.")
-            else:
-                print(f"Creating new setting '{key}' with value '{value}'")
-                new_setting = Setting(key=key, value=str(value))
-                session.add(new_setting)
-                session.commit()
+            with self._lock:
+                values = self._load()
+                if set_if_not_exists and key in values:
+                    logger.debug("Setting '%s' already exists, not overwriting.", key)
+                    return True
+
+                value = str(value)
+                if values.get(key) == value:
+                    return True
+
+                values[key] = value
+                self._mark_dirty(key)
             return True
         except Exception as e:
-            print(f"Error setting '{key}': {e}")
-            session.rollback()
+            logger.error("Error setting '%s': %s", key, e)
             return False
-        finally:
-            session.close()
\ No newline at end of file
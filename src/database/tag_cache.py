@@ -0,0 +1,138 @@
+"""In-memory tag to playlist resolution cache for BertiBox database."""
+
+import threading
+from sqlalchemy.orm import selectinload
+from .models import Tag, PlaylistItem
+
+
+class TagCache:
+    """Caches the resolved tag, playlist and ordered items per RFID UID.
+
+    Entries are filled on first lookup and dropped by the write paths of the
+    managers, so a known tag can be resolved without touching SQLite.
+    """
+
+    def __init__(self, get_session):
+        self.get_session = get_session
+        self._entries = {}
+        self._playlist_to_tag = {}
+        self._generation = 0
+        # Bumped on every write that changes the tag list (tags and playlist names)
+        self.tags_version = 0
+        self._lock = threading.Lock()
+
+    def resolve(self, tag_id):
+        """Get the cached entry for a tag UID, loading it from the database on a miss.
+
+        Returns:
+            Dict with 'tag', 'playlist' and 'items' keys, or None if the tag is unknown
+        """
+        entry = self._entries.get(tag_id)
+        if entry is not None:
+            return entry
+
+        generation = self._generation
+        entry = self._load(tag_id)
+        if entry is None:
+            return None
+
+        with self._lock:
+            # Only store if no write happened while we were loading
+            if generation == self._generation:
+                self._entries[tag_id] = entry
+                if entry['playlist']:
+                    self._playlist_to_tag[entry['playlist']['id']] = tag_id
+        return entry
+
+    def _load(self, tag_id):
+        session = self.get_session()
+        try:
+            tag = session.query(Tag).filter_by(tag_id=tag_id).first()
+            if not tag:
+                return None
+
+            rows = []
+            if tag.playlists:
+                rows = session.query(PlaylistItem)\
+                    .filter_by(playlist_id=tag.playlists[0].id)\
+                    .order_by(PlaylistItem.position, PlaylistItem.id)\
+                    .all()
+            return self._entry(tag, rows)
+        finally:
+            session.close()
+
+    def preload(self):
+        """Load the entries of all tags with three queries, e.g. to warm the cache at startup.
+
+        Returns:
+            Dict mapping each tag UID to its entry
+        """
+        generation = self._generation
+        session = self.get_session()
+        try:
+            tags = session.query(Tag).options(selectinload(Tag.playlists)).all()
+            playlist_ids = [tag.playlists[0].id for tag in tags if tag.playlists]
+            rows_by_playlist = {}
+            if playlist_ids:
+                for item in session.query(PlaylistItem)\
+                        .filter(PlaylistItem.playlist_id.in_(playlist_ids))\
+                        .order_by(PlaylistItem.playlist_id, PlaylistItem.position, PlaylistItem.id):
+                    rows_by_playlist.setdefault(item.playlist_id, []).append(item)
+            entries = {}
+            for tag in tags:
+                rows = rows_by_playlist.get(tag.playlists[0].id, []) if tag.playlists else []
+                entries[tag.tag_id] = self._entry(tag, rows)
+        finally:
+            session.close()
+
+        with self._lock:
+            # Only store if no write happened while we were loading
+            if generation == self._generation:
+                for tag_id, entry in entries.items():
+                    self._entries.setdefault(tag_id, entry)
+                    if entry['playlist']:
+                        self._playlist_to_tag[entry['playlist']['id']] = tag_id
+        return entries
+
+    @staticmethod
+    def _entry(tag, item_rows):
+        """Build the cache entry of a tag from its first playlist's ordered item rows."""
+        playlist_data = None
+        if tag.playlists:
+            playlist = tag.playlists[0]
+            playlist_data = {'id': playlist.id, 'name': playlist.name}
+        return {
+            'tag': {'id': tag.id, 'tag_id': tag.tag_id, 'name': tag.name},
+            'playlist': playlist_data,
+            'items': [{
+                'id': item.id,
+                'playlist_id': item.playlist_id,
+                'mp3_file': item.mp3_file,
+                'position': index
+            } for index, item in enumerate(item_rows)]
+        }
+
+    def invalidate_tag(self, tag_id):
+        """Drop the entry for a tag UID."""
+        with self._lock:
+            self._generation += 1
+            self.tags_version += 1
+            entry = self._entries.pop(tag_id, None)
+            if entry and entry['playlist']:
+                self._playlist_to_tag.pop(entry['playlist']['id'], None)
+
+    def invalidate_playlist(self, playlist_id):
+        """Drop the entry of the tag whose playlist has the given ID."""
+        with self._lock:
+            self._generation += 1
+            tag_id = self._playlist_to_tag.pop(playlist_id, None)
+            if tag_id is not None:
+                self._entries.pop(tag_id, None)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._generation += 1
+            self.tags_version += 1
+            self._entries.clear()
+            self._playlist_to_tag.clear()
@@ -1,11 +1,18 @@
 """Tag management operations for BertiBox database."""
 
 from .models import Tag, Playlist
+from ..utils import metrics
 
 
+@metrics.instrument_class('db_call')
 class TagManager:
-    def __init__(self, get_session):
+    def __init__(self, get_session, cache=None):
         self.get_session = get_session
+        self.cache = cache
+    
+    def _invalidate(self, tag_id):
+        if self.cache:
+            self.cache.invalidate_tag(tag_id)
     
     def add_tag(self, tag_id, name=None):
         session = self.get_session()
@@ -13,6 +20,7 @@ class TagManager:
             tag = Tag(tag_id=tag_id, name=name)
             session.add(tag)
             session.commit()
+            self._invalidate(tag_id)
             session.refresh(tag)
             session.expunge(tag)
             return tag
@@ -46,6 +54,7 @@ class TagManager:
             if tag:
                 session.delete(tag)
                 session.commit()
+                self._invalidate(tag_id)
                 return True
             return False
         finally:
@@ -58,6 +67,7 @@ class TagManager:
             if tag:
                 tag.name = name
                 session.commit()
+                self._invalidate(tag_id)
                 session.refresh(tag)
                 session.expunge(tag)
                 return tag
@@ -66,22 +76,28 @@ class TagManager:
             session.close()
     
     def get_all_tags(self):
+        """Gets all tags with their playlists using a single outer join."""
         session = self.get_session()
         try:
-            tags = session.query(Tag).all()
+            rows = (session.query(Tag.id, Tag.tag_id, Tag.name, Playlist.id, Playlist.name)
+                    .outerjoin(Playlist, Playlist.tag_id == Tag.id)
+                    .order_by(Tag.id, Playlist.id))
             tag_list = []
-            for tag in tags:
-                tag.playlists
-                tag_data = {
-                    'id': tag.id,
-                    'tag_id': tag.tag_id,
-                    'name': tag.name,
-                    'playlists': [{
-                        'id': playlist.id,
-                        'name': playlist.name
-                    } for playlist in tag.playlists]
-                }
-                tag_list.append(tag_data)
+            tag_data = None
+            for tag_db_id, tag_rfid, tag_name, playlist_id, playlist_name in rows:
+                if tag_data is None or tag_data['id'] != tag_db_id:
+                    tag_data = {
+                        'id': tag_db_id,
+                        'tag_id': tag_rfid,
+                        'name': tag_name,
+                        'playlists': []
+                    }
+                    tag_list.append(tag_data)
+                if playlist_id is not None:
+                    tag_data['playlists'].append({
+                        'id': playlist_id,
+                        'name': playlist_name
+                    })
             return tag_list
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
@@ -0,0 +1,94 @@
+"""Write-behind store base for BertiBox database."""
+
+import copy
+import logging
+import threading
+from ..utils.deferred import DeferredCall
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindStore:
+    """Table served from memory whose changes are written to the database later.
+
+    All rows are loaded on first use. Changed keys are kept as dirty keys
+    and written in one transaction by flush(), which runs flush_delay
+    seconds after a change and on shutdown. A failed flush keeps its keys
+    dirty and schedules another flush.
+
+    Subclasses set description, thread_name and postpone_flush and
+    implement _load_values() and _write().
+    """
+
+    description = 'values'
+    thread_name = 'write-behind'
+    # True: flush after a quiet period; False: at most flush_delay after the first change
+    postpone_flush = False
+
+    def __init__(self, get_session, flush_delay):
+        self.get_session = get_session
+        self.flush_delay = flush_delay
+        self._values = None
+        self._dirty = set()
+        self._pending_flush = DeferredCall(self.flush, flush_delay, self.thread_name)
+        self._lock = threading.RLock()
+        # Serializes flushes so an older value can never be committed after a newer one
+        self._flush_lock = threading.Lock()
+
+    def _load_values(self, session):
+        """Get all stored values as a dict by key."""
+        raise NotImplementedError
+
+    def _write(self, session, pending):
+        """Add the pending values by key to the session; the caller commits."""
+        raise NotImplementedError
+
+    def _load(self):
+        """Load all values into memory on first use. Must be called with _lock held."""
+        if self._values is None:
+            session = self.get_session()
+            try:
+                self._values = self._load_values(session)
+            finally:
+                session.close()
+        return self._values
+
+    def _mark_dirty(self, key):
+        """Schedule the write of a changed value. Must be called with _lock held."""
+        self._dirty.add(key)
+        self._pending_flush.schedule(postpone=self.postpone_flush)
+
+    def flush(self):
+        """Write all dirty values in one transaction.
+
+        Returns:
+            True if nothing was pending or the write succeeded
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._pending_flush.cancel()
+                if not self._dirty:
+                    return True
+                pending = {key: copy.copy(self._values[key]) for key in self._dirty}
+                self._dirty.clear()
+
+            session = self.get_session()
+            try:
+                self._write(session, pending)
+                session.commit()
+                logger.debug("Saved %s: %s", self.description, ', '.join(sorted(map(str, pending))))
+                return True
+            except Exception as e:
+                logger.error("Error saving %s: %s", self.description, e)
+                session.rollback()
+                # Keep the keys dirty and retry, e.g. after "database is locked"
+                with self._lock:
+                    self._dirty.update(pending)
+                    self._pending_flush.schedule()
+                return False
+            finally:
+                session.close()
+
+    def stop(self):
+        """Stop the flush thread; call flush() first to write pending changes."""
+        self._pending_flush.stop()
@@ -1,8 +1,16 @@
+import logging
 import RPi.GPIO as GPIO
 from mfrc522 import SimpleMFRC522
 import time
 import threading
-from queue import Queue
+from collections import namedtuple
+from queue import Queue, Empty
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# tag_id ist None bei Entfernung, timestamp ist time.monotonic() der Hardware-Lesung
+TagEvent = namedtuple('TagEvent', ['tag_id', 'timestamp'])
 
 class RFIDReader:
     def __init__(self):
@@ -13,7 +21,7 @@ class RFIDReader:
         self.last_tag = None
         self.last_tag_time = 0
         self.tag_timeout = 1.0  # Sekunden, die ein Tag als "noch da" gilt
-        self.debounce_time = 0.5  # Sekunden zwischen zwei Lesungen
+        self.poll_interval = config.MAIN_LOOP_INTERVAL  # Sekunden zwischen zwei Hardware-Abfragen
 
     def start_reading(self):
         self.running = True
@@ -23,40 +31,44 @@ class RFIDReader:
 
     def stop_reading(self):
         self.running = False
+        # Wartende Konsumenten aufwecken
+        self.tag_queue.put(None)
         if self.read_thread and self.read_thread.is_alive():
             self.read_thread.join(timeout=1.0)  # Warte maximal 1 Sekunde auf das Ende des Threads
             if self.read_thread.is_alive():
-                print("Warnung: RFID-Reader-Thread konnte nicht ordnungsgemäß beendet werden")
+                logger.warning("RFID-Reader-Thread konnte nicht ordnungsgemäß beendet werden")
 
     def _read_loop(self):
         while self.running:
             try:
-                # Versuche, den Tag zu lesen, aber blockiere nicht zu lange
-                id, text = self.reader.read_no_block()
-                current_time = time.time()
-                
-                if id:
-                    tag_id = str(id)
-                    # Wenn es ein neuer Tag ist oder der alte Tag zu lange weg war
-                    if tag_id != self.last_tag or (current_time - self.last_tag_time) > self.tag_timeout:
-                        self.tag_queue.put(tag_id)
-                        self.last_tag = tag_id
-                        self.last_tag_time = current_time
-                else:
-                    # Wenn kein Tag gelesen wurde und der letzte Tag zu lange weg ist
-                    if self.last_tag and (current_time - self.last_tag_time) > self.tag_timeout:
-                        self.tag_queue.put(None)
-                        self.last_tag = None
-                
-                time.sleep(self.debounce_time)
+                self._poll_once()
+                time.sleep(self.poll_interval)
             except Exception as e:
-                print(f"Error reading RFID: {e}")
+                logger.error("Error reading RFID: %s", e)
                 time.sleep(1)
 
-    def get_tag(self):
+    def _poll_once(self):
+        """Liest die Hardware einmal aus und veröffentlicht Erkennungs- bzw. Entfernungs-Events."""
+        id, text = self.reader.read_no_block()
+        current_time = time.monotonic()
+
+        if id:
+            tag_id = str(id)
+            self.last_tag_time = current_time
+            # Nur bei einem neuen Tag ein Event erzeugen
+            if tag_id != self.last_tag:
+                self.last_tag = tag_id
+                self.tag_queue.put(TagEvent(tag_id, current_time))
+        elif self.last_tag and (current_time - self.last_tag_time) > self.tag_timeout:
+            # Kein Tag gelesen und der letzte Tag ist zu lange weg
+            self.last_tag = None
+            self.tag_queue.put(TagEvent(None, current_time))
+
+    def get_event(self, timeout=None):
+        """Blockiert bis zum nächsten TagEvent; liefert None bei Timeout oder Stopp."""
         try:
-            return self.tag_queue.get_nowait()
-        except:
+            return self.tag_queue.get(timeout=timeout)
+        except Empty:
             return None
 
     def cleanup(self):
@@ -64,4 +76,4 @@ class RFIDReader:
             if hasattr(GPIO, 'getmode') and GPIO.getmode() is not None:
                 GPIO.cleanup()
         except Exception as e:
-            print(f"Warnung bei GPIO-Cleanup: {e}") 
\ No newline at end of file
+            logger.warning("Warnung bei GPIO-Cleanup: %s", e)
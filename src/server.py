@@ -0,0 +1,260 @@
+"""Web server worker model for BertiBox.
+
+Which thread runs what:
+
+* gevent event loop (main thread): HTTP parsing, Socket.IO connections and
+  the Socket.IO event handlers, which only validate and hand work off
+* I/O pool (config.IO_WORKERS native threads): Flask views and response
+  bodies, i.e. the SQLite queries and filesystem work behind every request
+* player command thread: Socket.IO player commands, one at a time and in
+  the order they arrived
+* player threads (RFID loop, playback monitor, timers): started by BertiBox
+  and never used for web work
+
+The standard library is not monkey-patched, so the player threads stay
+native threads and the SDL audio and SPI calls cannot stall the event loop.
+gevent objects belong to the loop's thread; work from other threads reaches
+it through an EventLoopBridge.
+
+The 'threading' mode runs Werkzeug's development server with one thread per
+connection and is meant for development only.
+"""
+
+import functools
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from . import config
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MODES = ('gevent', 'threading')
+
+
+def resolve_async_mode(requested=None):
+    """Get the async mode to run the web server with.
+
+    Args:
+        requested: 'gevent', 'threading' or 'auto'; defaults to config.ASYNC_MODE.
+            'auto' uses gevent if it is installed.
+
+    Returns:
+        'gevent' or 'threading'
+    """
+    requested = config.ASYNC_MODE if requested is None else requested
+    if requested == 'auto':
+        try:
+            import gevent  # noqa: F401
+        except ImportError:
+            logger.warning("gevent is not installed, using the Werkzeug development server")
+            return 'threading'
+        return 'gevent'
+    if requested not in ASYNC_MODES:
+        raise ValueError(f"Unknown async mode '{requested}', expected one of {ASYNC_MODES} or 'auto'")
+    return requested
+
+
+class EventLoopBridge:
+    """Runs functions on the gevent event loop from any thread."""
+
+    def __init__(self, loop, spawn):
+        self.loop = loop
+        self.spawn = spawn
+
+    def submit(self, func, *args, **kwargs):
+        """Start func in a greenlet on the loop without waiting for it."""
+        self.loop.run_callback_threadsafe(self.spawn, functools.partial(func, *args, **kwargs))
+
+    def call(self, func, *args):
+        """Run func in a greenlet on the loop and wait for its result.
+
+        Must not be called from the loop's own thread.
+        """
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+        self.submit(run)
+        return future.result()
+
+
+class ThreadSafeEmitter:
+    """Socket.IO server handed to the player, whose threads emit via the event loop."""
+
+    def __init__(self, socketio, bridge):
+        self.socketio = socketio
+        self.bridge = bridge
+
+    def emit(self, event, *args, **kwargs):
+        self.bridge.submit(self.socketio.emit, event, *args, **kwargs)
+
+
+class LoopInput:
+    """Request body stream read by an I/O pool thread through the event loop.
+
+    The connection's socket belongs to the loop; uploads are still streamed
+    chunk by chunk instead of being buffered up front.
+    """
+
+    def __init__(self, stream, bridge):
+        self.stream = stream
+        self.bridge = bridge
+
+    def read(self, *args):
+        return self.bridge.call(self.stream.read, *args)
+
+    def readline(self, *args):
+        return self.bridge.call(self.stream.readline, *args)
+
+    def readlines(self, *args):
+        return self.bridge.call(self.stream.readlines, *args)
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+
+class OffloadedBody:
+    """Response body whose chunks are read by a worker thread.
+
+    File responses like the MP3 stream are read from the SD card here;
+    gevent's server has no wsgi.file_wrapper that would do it off the loop.
+    """
+
+    _DONE = object()
+
+    def __init__(self, app_iter, run):
+        self.app_iter = app_iter
+        self.run = run
+        self._iterator = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._iterator is None:
+            self._iterator = self.run(iter, self.app_iter)
+        # StopIteration cannot be passed back from a worker thread, so a sentinel ends the body
+        chunk = self.run(next, self._iterator, self._DONE)
+        if chunk is self._DONE:
+            raise StopIteration
+        return chunk
+
+    def close(self):
+        close = getattr(self.app_iter, 'close', None)
+        if close is not None:
+            self.run(close)
+
+
+class OffloadMiddleware:
+    """WSGI middleware running the wrapped application in a worker thread.
+
+    The event loop keeps serving other clients while a view waits for SQLite
+    or the SD card. Bodies up to BUFFER_LIMIT bytes are collected in the same
+    worker call; larger and streamed bodies are read chunk by chunk in
+    worker threads, the loop only sends them.
+
+    Args:
+        wsgi_app: The WSGI application to wrap
+        run: Function(func, *args) that runs func in a worker thread and returns its result
+        bridge: EventLoopBridge for reading the request body, or None to pass it on as is
+    """
+
+    BUFFER_LIMIT = 64 * 1024
+
+    def __init__(self, wsgi_app, run, bridge=None):
+        self.wsgi_app = wsgi_app
+        self.run = run
+        self.bridge = bridge
+
+    def __call__(self, environ, start_response):
+        if self.bridge is not None:
+            environ['wsgi.input'] = LoopInput(environ['wsgi.input'], self.bridge)
+        return self.run(self._call_app, environ, start_response)
+
+    def _call_app(self, environ, start_response):
+        """Run the application; called in a worker thread."""
+        response = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            response['length'] = next((value for name, value in headers if name.lower() == 'content-length'),
+                                       None)
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, capture_start_response)
+        length = response.get('length')
+        if isinstance(app_iter, (list, tuple)) or (length is not None and int(length) <= self.BUFFER_LIMIT):
+            try:
+                return list(app_iter)
+            finally:
+                close = getattr(app_iter, 'close', None)
+                if close is not None:
+                    close()
+        return OffloadedBody(app_iter, self.run)
+
+
+class WorkerModel:
+    """Owns the executors of the web server and routes work to them.
+
+    Args:
+        async_mode: 'gevent' or 'threading'
+        io_workers: Threads running Flask views in gevent mode; defaults to config.IO_WORKERS
+    """
+
+    def __init__(self, async_mode, io_workers=None):
+        self.async_mode = async_mode
+        self.io_workers = config.IO_WORKERS if io_workers is None else io_workers
+        self.io_pool = None
+        self.bridge = None
+        if async_mode == 'gevent':
+            import gevent
+            from gevent.threadpool import ThreadPool
+            # Not gevent's ThreadPoolExecutor: its submit() holds a native lock while waiting
+            # for a free thread, which blocks the whole loop once all threads are busy
+            self.io_pool = ThreadPool(self.io_workers)
+            self.bridge = EventLoopBridge(gevent.get_hub().loop, gevent.spawn)
+        self.command_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='player-commands')
+
+    def run_io(self, func, *args):
+        """Run func on the I/O pool; only the calling greenlet waits for the result."""
+        return self.io_pool.spawn(func, *args).get()
+
+    def wrap_wsgi_app(self, wsgi_app):
+        """Move Flask views off the event loop; Werkzeug already gives each request a thread."""
+        if self.io_pool is None:
+            return wsgi_app
+        return OffloadMiddleware(wsgi_app, self.run_io, self.bridge)
+
+    def player_socketio(self, socketio):
+        """Get the Socket.IO server to hand to the player threads."""
+        if self.bridge is None:
+            return socketio
+        return ThreadSafeEmitter(socketio, self.bridge)
+
+    def run_command(self, func, *args):
+        """Queue a player command; commands run one at a time in arrival order."""
+        future = self.command_executor.submit(func, *args)
+        future.add_done_callback(functools.partial(_log_command_error, func))
+        return future
+
+    def run_options(self):
+        """Extra keyword arguments for SocketIO.run()."""
+        if self.async_mode == 'threading':
+            logger.warning("Running the Werkzeug development server; install gevent for production use")
+            # Flask-SocketIO refuses to start Werkzeug without a terminal, e.g. under systemd
+            return {'allow_unsafe_werkzeug': True}
+        return {}
+
+    def shutdown(self, wait=True):
+        """Stop the executors; queued player commands are dropped."""
+        self.command_executor.shutdown(wait=wait, cancel_futures=True)
+        if self.io_pool is not None:
+            self.io_pool.kill()
+
+
+def _log_command_error(func, future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Player command %s failed: %s", getattr(func, '__name__', func), future.exception(),
+                     exc_info=future.exception())
@@ -0,0 +1,107 @@
+"""Startup sequence for BertiBox.
+
+The player comes up first, so tags work as early as possible: database,
+audio mixer and RFID reader. Flask, Flask-SocketIO and the API modules are
+only imported afterwards, and the phases are logged as a timing report.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from .utils import helpers
+from .utils.logging_setup import setup_logging, shutdown_logging
+from .utils.startup_timer import StartupTimer
+from . import config
+
+logger = logging.getLogger(__name__)
+
+# Started at import, before any heavy module is loaded
+timer = StartupTimer()
+
+
+def start_player():
+    """Open the database and start the RFID and audio path.
+
+    Returns:
+        The running BertiBox instance
+    """
+    with timer.phase('import database'):
+        from .database import Database
+
+    with timer.phase('open database'):
+        db = Database()
+        db.init_db()
+        os.makedirs(config.MP3_DIR, exist_ok=True)
+
+    with timer.phase('import player'):
+        # pygame prints a banner on import otherwise
+        os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+        from .core import BertiBox, warm_up
+
+    # Warm up for the first tag and bring the media library index up to date
+    # without delaying startup; the scan goes second so it cannot hold up the warm-up reads
+    startup_thread = threading.Thread(target=_warm_up_and_refresh_library, args=(db, warm_up),
+                                      name='startup-warmup')
+    startup_thread.daemon = True
+    startup_thread.start()
+
+    with timer.phase('start player'):
+        # The web interface is attached once it is imported
+        berti_box = BertiBox(None, db)
+        helpers.set_berti_box_instance(berti_box)
+        berti_box.start()
+
+    atexit.register(cleanup, berti_box, db)
+    logger.info("Ready for tags after %.0f ms", timer.elapsed() * 1000)
+    return berti_box
+
+
+def _warm_up_and_refresh_library(db, warm_up):
+    """Prepare for the first tag, then run the first library scan."""
+    try:
+        warm_up(db, config.MP3_DIR)
+    except Exception as e:
+        logger.exception("Startup warm-up failed: %s", e)
+    db.refresh_library(config.MP3_DIR)
+
+
+def start_web(berti_box):
+    """Import the web stack and connect it to the running player.
+
+    Returns:
+        Tuple of (Flask app, SocketIO instance, WorkerModel)
+    """
+    # Before uploads are accepted, so only temp files no session knows about are removed
+    with timer.phase('remove partial uploads'):
+        helpers.remove_partial_uploads(config.MP3_DIR)
+
+    with timer.phase('import web interface'):
+        from .app import app, socketio, workers, attach_berti_box
+
+    with timer.phase('attach web interface'):
+        attach_berti_box(berti_box)
+    # Registered after the player cleanup, so it runs first: no commands reach a stopped player
+    atexit.register(workers.shutdown, False)
+    return app, socketio, workers
+
+
+def cleanup(berti_box, db):
+    """Cleanup function called on exit."""
+    berti_box.stop()
+    db.cleanup()
+    logger.info("Cleanup completed.")
+    shutdown_logging()
+
+
+def main():
+    """Start the player, then serve the web interface until shutdown."""
+    with timer.phase('logging'):
+        setup_logging()
+
+    berti_box = start_player()
+    app, socketio, workers = start_web(berti_box)
+    timer.report()
+
+    logger.info("Starting BertiBox Web Interface on %s:%s (%s mode)", config.HOST, config.PORT, workers.async_mode)
+    socketio.run(app, host=config.HOST, port=config.PORT, debug=config.DEBUG, **workers.run_options())
@@ -0,0 +1,92 @@
+"""Deferred calls on one long-lived thread for BertiBox."""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DeferredCall:
+    """Runs a function once its deadline has passed, on a single long-lived thread.
+
+    Used instead of a threading.Timer per call, which starts a new OS thread
+    for every coalescing window or write. The thread is started on first use
+    and sleeps on a condition while nothing is scheduled.
+
+    Args:
+        func: Function called without arguments when the deadline passes
+        delay: Seconds from scheduling to the call
+        name: Name of the thread
+    """
+
+    def __init__(self, func, delay, name):
+        self.func = func
+        self.delay = delay
+        self.name = name
+        self._deadline = None
+        self._thread = None
+        self._condition = threading.Condition()
+
+    @property
+    def pending(self):
+        """True while a call is scheduled."""
+        return self._deadline is not None
+
+    def schedule(self, postpone=False):
+        """Call func after the delay.
+
+        Args:
+            postpone: Move a pending call to the new deadline instead of keeping it,
+                i.e. call func once there was no schedule() for the delay
+
+        Returns:
+            False if a call was already pending
+        """
+        with self._condition:
+            was_pending = self._deadline is not None
+            if was_pending and not postpone:
+                return False
+            self._deadline = time.monotonic() + self.delay
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            # A thread ended by stop() may still wait on the condition as well
+            self._condition.notify_all()
+            return not was_pending
+
+    def cancel(self):
+        """Drop a pending call."""
+        with self._condition:
+            self._deadline = None
+
+    def stop(self, timeout=1.0):
+        """Drop a pending call and end the thread; schedule() starts a new one."""
+        with self._condition:
+            self._deadline = None
+            thread = self._thread
+            self._thread = None
+            self._condition.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        with self._condition:
+            # A thread replaced by stop() and schedule() ends without calling func again
+            while self._thread is threading.current_thread():
+                if self._deadline is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                self._deadline = None
+                # func may take the caller's locks, which are held while they schedule()
+                self._condition.release()
+                try:
+                    self.func()
+                except Exception as e:
+                    logger.exception("Deferred call %s failed: %s", self.name, e)
+                finally:
+                    self._condition.acquire()
@@ -1,12 +1,17 @@
 """Helper functions for BertiBox."""
 
+import logging
 import os
-import traceback
 from pathlib import Path
+from .. import config
+
+logger = logging.getLogger(__name__)
 
 # Global reference to BertiBox instance (will be set by app.py)
 berti_box = None
 
+PARTIAL_UPLOAD_SUFFIX = '.part'
+
 def set_berti_box_instance(instance):
     """Set the global BertiBox instance reference."""
     global berti_box
@@ -19,33 +24,33 @@ def update_berti_box_playlist(playlist_id):
         playlist_id: The ID of the playlist to update
     """
     if not berti_box:
-        print("Update Helper: BertiBox not initialized.")
+        logger.info("Update Helper: BertiBox not initialized.")
         return
     
-    print(f"Helper: Updating BertiBox internal playlist for ID: {playlist_id}")
+    logger.debug("Helper: Updating BertiBox internal playlist for ID: %s", playlist_id)
     try:
         from ..database import Database
         db = Database()
         
-        updated_items_data = db.get_playlist_items(playlist_id)
-        if berti_box.current_playlist and berti_box.current_playlist.get('id') == playlist_id:
-            berti_box.current_playlist_items = updated_items_data
-            # Also update the simplified list in the main playlist dict
-            berti_box.current_playlist['items'] = [
-                {'id': i['id'], 'mp3_file': i['mp3_file'], 'position': i['position']} 
-                for i in updated_items_data
-            ]
-            # Adjust index if it's now out of bounds (e.g., after deletions)
-            if berti_box.current_playlist_index >= len(updated_items_data):
-                berti_box.current_playlist_index = max(0, len(updated_items_data) - 1)
-            print(f"Helper: BertiBox playlist {playlist_id} updated internally.")
+        playback_controller = berti_box.playback_controller
+        if playback_controller.current_playlist == playlist_id:
+            playback_controller.update_playlist_items(db.get_playlist_items(playlist_id))
+            logger.debug("Helper: BertiBox playlist %s updated internally.", playlist_id)
             berti_box.emit_player_status()  # Send update with new list/index
         else:
             # Playlist is not the currently active one in BertiBox, no internal update needed
-            print(f"Helper: Playlist {playlist_id} is not the active one in BertiBox.")
+            logger.debug("Helper: Playlist %s is not the active one in BertiBox.", playlist_id)
     except Exception as e:
-        print(f"Helper: Error updating BertiBox playlist {playlist_id}: {e}")
-        traceback.print_exc()
+        logger.exception("Helper: Error updating BertiBox playlist %s: %s", playlist_id, e)
+
+
+def update_berti_box_current_playlist():
+    """Reload the playlist BertiBox currently holds, e.g. after file paths were rewritten."""
+    if not berti_box:
+        return
+    playlist_id = berti_box.playback_controller.current_playlist
+    if playlist_id is not None:
+        update_berti_box_playlist(playlist_id)
 
 
 def sanitize_path(path):
@@ -170,10 +175,55 @@ def ensure_directory_exists(directory):
         os.makedirs(directory, exist_ok=True)
         return True
     except Exception as e:
-        print(f"Error creating directory {directory}: {e}")
+        logger.error("Error creating directory %s: %s", directory, e)
         return False
 
 
+def upload_staging_dir(base_dir):
+    """Get the folder resumable uploads are received in.
+
+    It lies below the library, so moving a finished upload into place is an
+    atomic rename on the same filesystem.
+    """
+    return os.path.join(base_dir, config.UPLOAD_STAGING_DIR)
+
+
+def partial_upload_path(base_dir, upload_id):
+    """Get the temp file path an upload is received into."""
+    return os.path.join(upload_staging_dir(base_dir), f'{upload_id}{PARTIAL_UPLOAD_SUFFIX}')
+
+
+def remove_partial_uploads(base_dir):
+    """Remove temp files of uploads that were never finished, e.g. before a restart.
+
+    Upload sessions only live in memory, so no temp file found at startup
+    can be resumed any more.
+
+    Args:
+        base_dir: Library directory holding the staging folder
+
+    Returns:
+        Number of files removed
+    """
+    staging_dir = upload_staging_dir(base_dir)
+    try:
+        names = os.listdir(staging_dir)
+    except FileNotFoundError:
+        return 0
+
+    removed = 0
+    for name in names:
+        if name.endswith(PARTIAL_UPLOAD_SUFFIX):
+            try:
+                os.remove(os.path.join(staging_dir, name))
+                removed += 1
+            except OSError as e:
+                logger.warning("Could not remove partial upload %s: %s", os.path.join(staging_dir, name), e)
+    if removed:
+        logger.info("Removed %d partial uploads", removed)
+    return removed
+
+
 def normalize_path(path):
     """Normalize a path for cross-platform compatibility.
     
@@ -220,7 +270,7 @@ def get_file_info(file_path):
             'modified': stat.st_mtime
         }
     except Exception as e:
-        print(f"Error getting file info for {file_path}: {e}")
+        logger.error("Error getting file info for %s: %s", file_path, e)
         return None
 
 
@@ -0,0 +1,41 @@
+"""Non-blocking logging setup for BertiBox."""
+
+import logging
+import logging.handlers
+import queue
+from .. import config
+
+_listener = None
+
+
+def setup_logging(level=None):
+    """Route all log records through a queue to a background writer thread.
+
+    Logging calls only enqueue the record, so a slow stdout or journald never
+    blocks playback or request threads.
+
+    Args:
+        level: Log level name or number, defaults to config.LOG_LEVEL
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel(level or config.LOG_LEVEL)
+    if _listener is not None:
+        return _listener
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(config.LOG_FORMAT))
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Write out all queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
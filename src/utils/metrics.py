@@ -0,0 +1,191 @@
+"""Lightweight in-process metrics for BertiBox.
+
+Updates are plain attribute increments without locks so instrumentation can
+stay enabled on the playback and request hot paths. Under heavy contention an
+occasional increment may be lost, which is acceptable for monitoring.
+"""
+
+import bisect
+import functools
+import threading
+import time
+
+# Upper bounds (in seconds) for latency histograms
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_histograms = {}
+_counters = {}
+_registry_lock = threading.Lock()
+
+
+def _series_name(name, labels):
+    """Get the Prometheus series name for a metric name and its labels."""
+    if not labels:
+        return name
+    rendered = ','.join(f'{key}="{_escape_label(value)}"' for key, value in sorted(labels.items()))
+    return f'{name}{{{rendered}}}'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    """Monotonically increasing event counter."""
+
+    def __init__(self, name, labels=None):
+        self.name = name
+        self.labels = dict(labels or {})
+        self.value = 0
+
+    def inc(self, amount=1):
+        """Increase the counter by amount."""
+        self.value += amount
+
+    def reset(self):
+        """Reset the counter to zero."""
+        self.value = 0
+
+
+class Histogram:
+    """Fixed-bucket histogram for latency measurements."""
+
+    def __init__(self, name, buckets=DEFAULT_LATENCY_BUCKETS, labels=None):
+        self.name = name
+        self.labels = dict(labels or {})
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        """Record a single observation."""
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def reset(self):
+        """Drop all recorded observations."""
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def snapshot(self):
+        """Get histogram state as a dictionary with cumulative bucket counts."""
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets, self.bucket_counts):
+            running += count
+            cumulative.append({'le': bound, 'count': running})
+        cumulative.append({'le': '+Inf', 'count': self.count})
+
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'buckets': cumulative
+        }
+
+
+def get_histogram(name, buckets=DEFAULT_LATENCY_BUCKETS, labels=None):
+    """Get the histogram registered under name and labels, creating it if needed."""
+    key = _series_name(name, labels)
+    histogram = _histograms.get(key)
+    if histogram is None:
+        with _registry_lock:
+            histogram = _histograms.setdefault(key, Histogram(name, buckets, labels))
+    return histogram
+
+
+def get_counter(name, labels=None):
+    """Get the counter registered under name and labels, creating it if needed."""
+    key = _series_name(name, labels)
+    counter = _counters.get(key)
+    if counter is None:
+        with _registry_lock:
+            counter = _counters.setdefault(key, Counter(name, labels))
+    return counter
+
+
+def get_all_histograms():
+    """Get snapshots of all registered histograms keyed by series name."""
+    return {key: histogram.snapshot() for key, histogram in list(_histograms.items())}
+
+
+def get_all_counters():
+    """Get current values of all registered counters keyed by series name."""
+    return {key: counter.value for key, counter in list(_counters.items())}
+
+
+def snapshot():
+    """Get all counters and histograms as one JSON-serializable dictionary."""
+    return {'counters': get_all_counters(), 'histograms': get_all_histograms()}
+
+
+def timed(name, **labels):
+    """Decorator that records call durations in the <name>_seconds histogram.
+
+    Calls that raise are additionally counted in <name>_errors_total. Both
+    metrics are looked up once when the function is decorated.
+    """
+    def decorator(func):
+        histogram = get_histogram(f'{name}_seconds', labels=labels)
+        errors = get_counter(f'{name}_errors_total', labels=labels)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def instrument_class(name):
+    """Class decorator that times every public method with timed().
+
+    Public methods inherited from undecorated base classes are timed as well.
+    The method label is "<ClassName>.<method>".
+    """
+    def decorator(cls):
+        seen = set()
+        for klass in cls.__mro__[:-1]:
+            for attr, value in list(vars(klass).items()):
+                if attr in seen:
+                    continue
+                seen.add(attr)
+                if callable(value) and not attr.startswith('_'):
+                    setattr(cls, attr, timed(name, method=f'{cls.__name__}.{attr}')(value))
+        return cls
+    return decorator
+
+
+def render_prometheus():
+    """Render all metrics in the Prometheus text exposition format."""
+    lines = []
+    typed = set()
+
+    def type_line(metric_name, metric_type):
+        if metric_name not in typed:
+            typed.add(metric_name)
+            lines.append(f'# TYPE {metric_name} {metric_type}')
+
+    for counter in sorted(list(_counters.values()), key=lambda c: c.name):
+        type_line(counter.name, 'counter')
+        lines.append(f'{_series_name(counter.name, counter.labels)} {counter.value}')
+
+    for histogram in sorted(list(_histograms.values()), key=lambda h: h.name):
+        type_line(histogram.name, 'histogram')
+        state = histogram.snapshot()
+        for bucket in state['buckets']:
+            bucket_labels = dict(histogram.labels, le=bucket['le'])
+            lines.append(f"{_series_name(histogram.name + '_bucket', bucket_labels)} {bucket['count']}")
+        lines.append(f"{_series_name(histogram.name + '_sum', histogram.labels)} {state['sum']}")
+        lines.append(f"{_series_name(histogram.name + '_count', histogram.labels)} {state['count']}")
+
+    return '\n'.join(lines) + '\n'
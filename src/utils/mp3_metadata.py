@@ -0,0 +1,233 @@
+"""Minimal ID3 tag and MPEG audio header parser for BertiBox.
+
+Reads only the parts of an MP3 file needed for display: the ID3v2 tag at the
+start (falling back to an ID3v1 tag at the end) and the first MPEG frame
+header, including a Xing/Info or VBRI header for variable bitrate files.
+"""
+
+import os
+import struct
+
+# ID3v2.3/2.4 and ID3v2.2 frame IDs of the fields we keep
+TEXT_FRAMES = {
+    b'TIT2': 'title', b'TPE1': 'artist', b'TALB': 'album', b'TRCK': 'track_number',
+    b'TT2': 'title', b'TP1': 'artist', b'TAL': 'album', b'TRK': 'track_number',
+}
+
+# Bitrates in kbit/s by (MPEG version 1 or 2, layer)
+BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+# How far past the ID3 tag to look for the first frame
+SYNC_SEARCH_BYTES = 64 * 1024
+
+
+def read_mp3_metadata(path):
+    """Read tags and audio properties of an MP3 file.
+
+    Args:
+        path: Path of the MP3 file
+
+    Returns:
+        Dict with title, artist, album, track_number, duration (seconds) and
+        bitrate (kbit/s); values that cannot be determined are None
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    metadata = {'title': None, 'artist': None, 'album': None,
+                'track_number': None, 'duration': None, 'bitrate': None}
+    file_size = os.path.getsize(path)
+
+    with open(path, 'rb') as f:
+        audio_start = 0
+        header = f.read(10)
+        if len(header) == 10 and header[:3] == b'ID3':
+            major, flags = header[3], header[5]
+            tag_size = _syncsafe(header[6:10])
+            _parse_id3v2(f.read(tag_size), major, flags, metadata)
+            audio_start = 10 + tag_size + (10 if flags & 0x10 else 0)
+
+        audio_end = file_size
+        if file_size >= 128:
+            f.seek(file_size - 128)
+            trailer = f.read(128)
+            if trailer[:3] == b'TAG':
+                audio_end -= 128
+                _parse_id3v1(trailer, metadata)
+
+        f.seek(audio_start)
+        _parse_audio(f.read(SYNC_SEARCH_BYTES), audio_start, audio_end, metadata)
+
+    return metadata
+
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _parse_id3v2(data, major, flags, metadata):
+    if major not in (2, 3, 4):
+        return
+    if flags & 0x80 and major < 4:
+        # Whole-tag unsynchronisation (ID3v2.4 marks it per frame)
+        data = data.replace(b'\xff\x00', b'\xff')
+
+    offset = 0
+    if flags & 0x40 and major >= 3:
+        # Skip the extended header; v2.4 counts its own size field, v2.3 does not
+        size = _syncsafe(data[:4]) if major == 4 else struct.unpack('>I', data[:4])[0] + 4
+        offset = size
+
+    header_size = 6 if major == 2 else 10
+    while offset + header_size <= len(data):
+        if major == 2:
+            frame_id = data[offset:offset + 3]
+            size = int.from_bytes(data[offset + 3:offset + 6], 'big')
+            frame_flags = 0
+        else:
+            frame_id = data[offset:offset + 4]
+            raw_size = data[offset + 4:offset + 8]
+            size = _syncsafe(raw_size) if major == 4 else struct.unpack('>I', raw_size)[0]
+            frame_flags = data[offset + 9]
+        if not frame_id.strip(b'\x00'):
+            break  # Padding
+        body = data[offset + header_size:offset + header_size + size]
+        offset += header_size + size
+
+        key = TEXT_FRAMES.get(frame_id)
+        if key is None or metadata[key] is not None:
+            continue
+        if major == 4:
+            if frame_flags & 0x0C:
+                continue  # Compressed or encrypted
+            if frame_flags & 0x01:
+                body = body[4:]  # Data length indicator
+            if frame_flags & 0x02:
+                body = body.replace(b'\xff\x00', b'\xff')
+        elif major == 3 and frame_flags & 0xC0:
+            continue
+        _set_field(metadata, key, _decode_text(body))
+
+
+def _decode_text(body):
+    if not body:
+        return None
+    encoding, text = body[0], body[1:]
+    try:
+        if encoding == 1:
+            value = text.decode('utf-16')
+        elif encoding == 2:
+            value = text.decode('utf-16-be')
+        elif encoding == 3:
+            value = text.decode('utf-8')
+        else:
+            value = text.decode('latin-1')
+    except UnicodeDecodeError:
+        return None
+    # ID3v2.4 separates multiple values with NUL; keep the first
+    return value.split('\x00', 1)[0].strip() or None
+
+
+def _parse_id3v1(trailer, metadata):
+    def text(start, length):
+        return trailer[start:start + length].split(b'\x00', 1)[0].decode('latin-1').strip() or None
+
+    _set_field(metadata, 'title', text(3, 30))
+    _set_field(metadata, 'artist', text(33, 30))
+    _set_field(metadata, 'album', text(63, 30))
+    # ID3v1.1 stores the track in the last comment byte after a NUL
+    if trailer[125] == 0 and trailer[126]:
+        _set_field(metadata, 'track_number', str(trailer[126]))
+
+
+def _set_field(metadata, key, value):
+    if value is None or metadata[key] is not None:
+        return
+    if key == 'track_number':
+        # "3/12" -> 3
+        number = value.split('/', 1)[0].strip()
+        value = int(number) if number.isdigit() else None
+    metadata[key] = value
+
+
+def _frame_info(data, offset):
+    """Decode the MPEG frame header at offset, or return None if it is not one."""
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = {3: 1, 2: 2, 0: 2.5}.get((b1 >> 3) & 3)
+    layer = {3: 1, 2: 2, 1: 3}.get((b1 >> 1) & 3)
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    bitrate = BITRATES[(1 if version == 1 else 2, layer)][bitrate_index]
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        samples, length = 384, (12 * bitrate * 1000 // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        samples, length = 576, 72 * bitrate * 1000 // sample_rate + padding
+    else:
+        samples, length = 1152, 144 * bitrate * 1000 // sample_rate + padding
+    return {'version': version, 'layer': layer, 'bitrate': bitrate, 'sample_rate': sample_rate,
+            'samples': samples, 'length': length, 'mono': (b3 >> 6) == 3}
+
+
+def _find_first_frame(data):
+    """Find the first MPEG frame header, returning (offset, frame info) or (None, None)."""
+    offset = data.find(b'\xff')
+    while offset != -1:
+        frame = _frame_info(data, offset)
+        if frame is not None:
+            # Require a second header right after the first to rule out false syncs,
+            # unless the first frame reaches past the data we read
+            following = offset + frame['length']
+            if following + 4 > len(data) or _frame_info(data, following) is not None:
+                return offset, frame
+        offset = data.find(b'\xff', offset + 1)
+    return None, None
+
+
+def _parse_audio(data, audio_start, audio_end, metadata):
+    offset, frame = _find_first_frame(data)
+    if frame is None:
+        return
+
+    frame_count = _vbr_frame_count(data, offset, frame)
+    audio_bytes = audio_end - audio_start - offset
+    if frame_count:
+        duration = frame_count * frame['samples'] / frame['sample_rate']
+        bitrate = round(audio_bytes * 8 / duration / 1000) if duration else frame['bitrate']
+    else:
+        bitrate = frame['bitrate']
+        duration = audio_bytes * 8 / (bitrate * 1000)
+    metadata['duration'] = round(duration, 3)
+    metadata['bitrate'] = bitrate
+
+
+def _vbr_frame_count(data, offset, frame):
+    """Get the frame count from a Xing/Info or VBRI header in the first frame."""
+    if frame['version'] == 1:
+        side_info = 17 if frame['mono'] else 32
+    else:
+        side_info = 9 if frame['mono'] else 17
+    xing = offset + 4 + side_info
+    if data[xing:xing + 4] in (b'Xing', b'Info') and len(data) >= xing + 12:
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        if flags & 0x01:
+            return struct.unpack('>I', data[xing + 8:xing + 12])[0]
+    vbri = offset + 4 + 32
+    if data[vbri:vbri + 4] == b'VBRI' and len(data) >= vbri + 18:
+        return struct.unpack('>I', data[vbri + 14:vbri + 18])[0]
+    return None
@@ -0,0 +1,57 @@
+"""Startup phase timing for BertiBox."""
+
+import logging
+import sys
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Measures the phases of the service start and logs a breakdown.
+
+    Like `python -X importtime`, but per startup phase: each phase reports
+    its wall time and the modules it imported, grouped by top-level package,
+    so a slow start can be traced to the import or initialization behind it.
+    """
+
+    def __init__(self, started_at=None):
+        self.started_at = time.monotonic() if started_at is None else started_at
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as one startup phase."""
+        modules_before = set(sys.modules)
+        phase_started_at = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - phase_started_at
+            new_modules = set(sys.modules) - modules_before
+            self.phases.append((name, duration, new_modules))
+
+    def elapsed(self):
+        """Seconds since the timer was created."""
+        return time.monotonic() - self.started_at
+
+    def report(self, title='Startup', top_packages=5):
+        """Log the phases with their duration and the heaviest imported packages.
+
+        Returns:
+            The report as a list of lines
+        """
+        lines = [f"{title} finished after {self.elapsed() * 1000:.0f} ms:"]
+        for name, duration, modules in self.phases:
+            packages = {}
+            for module in modules:
+                package = module.split('.', 1)[0]
+                packages[package] = packages.get(package, 0) + 1
+            heaviest = sorted(packages.items(), key=lambda item: (-item[1], item[0]))[:top_packages]
+            detail = ', '.join(f"{package} ({count})" for package, count in heaviest)
+            lines.append(f"  {duration * 1000:8.1f} ms  {len(modules):4d} modules  {name}"
+                         + (f"  [{detail}]" if detail else ''))
+        for line in lines:
+            logger.info("%s", line)
+        return lines
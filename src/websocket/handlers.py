@@ -1,120 +1,122 @@
 """WebSocket event handlers for BertiBox."""
 
-def register_handlers(socketio, get_berti_box):
+import logging
+from flask import request
+from ..utils import metrics
+
+logger = logging.getLogger(__name__)
+
+def register_handlers(socketio, get_berti_box, run_command=None):
     """Register all WebSocket event handlers.
     
     Args:
         socketio: The SocketIO instance
         get_berti_box: Function that returns the BertiBox instance
+        run_command: Function(func, *args) that runs a player command off the
+            event handler; defaults to a background task per command
     """
+    if run_command is None:
+        run_command = socketio.start_background_task
+
+    def on(event):
+        """Register a handler for event and time it in socketio_event_seconds."""
+        def decorator(handler):
+            return socketio.on(event)(metrics.timed('socketio_event', event=event)(handler))
+        return decorator
     
-    @socketio.on('connect')
-    def handle_connect():
-        print('Client connected')
+    @on('connect')
+    def handle_connect(auth=None):
+        logger.info("Client connected")
         berti_box = get_berti_box()
         if berti_box:
-            socketio.start_background_task(berti_box.emit_player_status)
+            # New and reconnecting clients start from a full snapshot
+            run_command(berti_box.send_player_status, request.sid)
 
-    @socketio.on('disconnect')
-    def handle_disconnect():
-        print('Client disconnected')
+    @on('disconnect')
+    def handle_disconnect(reason=None):
+        logger.info("Client disconnected")
 
-    @socketio.on('request_player_status')
+    @on('request_player_status')
     def handle_request_player_status():
-        print('Received request for player status')
+        logger.debug("Received request for player status")
         berti_box = get_berti_box()
         if berti_box:
-            socketio.start_background_task(berti_box.emit_player_status)
+            run_command(berti_box.send_player_status, request.sid)
 
-    @socketio.on('play_pause')
+    @on('play_pause')
     def handle_play_pause():
-        print('Received play/pause command')
+        logger.debug("Received play/pause command")
         berti_box = get_berti_box()
         if berti_box:
-            socketio.start_background_task(
-                lambda: berti_box.pause_playback() if (berti_box.is_playing and not berti_box.is_paused) 
-                else berti_box.resume_playback()
-            )
+            run_command(berti_box.play_pause_toggle)
 
-    @socketio.on('play_track')
+    @on('play_track')
     def handle_play_track(data):
         index = data.get('index')
-        print(f'Received play track command for index: {index}')
+        logger.debug("Received play track command for index: %s", index)
         berti_box = get_berti_box()
         if berti_box and index is not None:
             try:
-                index_int = int(index)
-                if berti_box.current_playlist and 0 <= index_int < len(berti_box.current_playlist_items):
-                    socketio.start_background_task(
-                        lambda idx=index_int: (
-                            setattr(berti_box, 'current_playlist_index', idx),
-                            berti_box.play_current_track()
-                        )
-                    )
-                else:
-                    print(f"Invalid index {index_int} for current playlist")
+                # play_track_at_index rejects indexes outside the current playlist
+                run_command(berti_box.play_track_at_index, int(index))
             except ValueError:
-                print(f"Invalid index format: {index}")
+                logger.warning("Invalid index format: %s", index)
 
-    @socketio.on('pause')
+    @on('pause')
     def handle_pause():
-        print('Received pause command')
+        logger.debug("Received pause command")
         berti_box = get_berti_box()
         if berti_box:
-            socketio.start_background_task(berti_box.pause_playback)
+            run_command(berti_box.pause_playback)
 
-    @socketio.on('resume')
+    @on('resume')
     def handle_resume():
-        print('Received resume command')
+        logger.debug("Received resume command")
         berti_box = get_berti_box()
         if berti_box:
-            socketio.start_background_task(berti_box.resume_playback)
+            run_command(berti_box.resume_playback)
 
-    @socketio.on('next_track')
+    @on('next_track')
     def handle_next_track():
-        print('Received next track command')
+        logger.debug("Received next track command")
         berti_box = get_berti_box()
         if berti_box:
-            socketio.start_background_task(berti_box.play_next)
+            run_command(berti_box.play_next)
 
-    @socketio.on('previous_track')
+    @on('previous_track')
     def handle_previous_track():
-        print('Received previous track command')
+        logger.debug("Received previous track command")
         berti_box = get_berti_box()
         if berti_box:
-            socketio.start_background_task(berti_box.play_previous)
+            run_command(berti_box.play_previous)
 
-    @socketio.on('set_volume')
+    @on('set_volume')
     def handle_set_volume(data):
         volume = data.get('volume')
-        print(f'Received set volume command: {volume}')
         berti_box = get_berti_box()
         if berti_box and volume is not None:
             try:
                 vol_float = float(volume)
                 if 0.0 <= vol_float <= 1.0:
-                    socketio.start_background_task(
-                        lambda v=vol_float: (
-                            berti_box.set_volume_internal(v),
-                            berti_box.emit_player_status()
-                        )
-                    )
+                    # Cheap enough to run inline; slider drags fire this many times a second
+                    # and the status broadcast is coalesced by the publisher
+                    berti_box.set_volume(vol_float)
                 else:
-                    print(f"Invalid volume value: {vol_float}")
+                    logger.warning("Invalid volume value: %s", vol_float)
             except ValueError:
-                print(f"Invalid volume format: {volume}")
+                logger.warning("Invalid volume format: %s", volume)
 
-    @socketio.on('set_sleep_timer')
+    @on('set_sleep_timer')
     def handle_set_sleep_timer(data):
         duration_minutes = data.get('duration')
-        print(f'Received set sleep timer command: {duration_minutes} minutes')
+        logger.debug("Received set sleep timer command: %s minutes", duration_minutes)
         berti_box = get_berti_box()
         if berti_box and duration_minutes is not None:
-            socketio.start_background_task(berti_box.set_sleep_timer, duration_minutes)
+            run_command(berti_box.set_sleep_timer, duration_minutes)
 
-    @socketio.on('cancel_sleep_timer')
+    @on('cancel_sleep_timer')
     def handle_cancel_sleep_timer():
-        print('Received cancel sleep timer command')
+        logger.debug("Received cancel sleep timer command")
         berti_box = get_berti_box()
         if berti_box:
-            socketio.start_background_task(berti_box.cancel_sleep_timer)
\ No newline at end of file
+            run_command(berti_box.cancel_sleep_timer)
\ No newline at end of file
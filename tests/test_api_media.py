@@ -31,14 +31,19 @@ class TestMediaAPI(unittest.TestCase):
         self.config_patcher.stop()
     
     @patch('src.api.media.os.path.exists')
-    @patch('src.api.media.os.listdir')
-    @patch('src.api.media.os.path.isdir')
-    def test_explore_directory(self, mock_isdir, mock_listdir, mock_exists):
-        """Test exploring directory structure."""
+    def test_explore_directory(self, mock_exists):
+        """Test exploring directory structure from the library index."""
         mock_exists.return_value = True
-        mock_listdir.return_value = ['subfolder', 'file1.mp3', 'file2.mp3']
-        mock_isdir.side_effect = lambda x: 'subfolder' in x
-        self.mock_db.is_file_in_playlist.return_value = False
+        self.mock_db.list_library_folder.return_value = (
+            ['subfolder'],
+            [
+                {'path': 'file1.mp3', 'name': 'file1.mp3', 'size': 10, 'mtime': 1.0, 'duration': None,
+                 'title': None, 'artist': None, 'album': None, 'track_number': None, 'bitrate': None},
+                {'path': 'file2.mp3', 'name': 'file2.mp3', 'size': 20, 'mtime': 2.0, 'duration': 61.5,
+                 'title': 'Song', 'artist': 'Band', 'album': 'Album', 'track_number': 2, 'bitrate': 128},
+            ]
+        )
+        self.mock_db.get_assigned_files_in_folder.return_value = {'file2.mp3'}
         
         response = self.client.get('/api/media?path=/')
         data = json.loads(response.data)
@@ -46,6 +51,22 @@ class TestMediaAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(data['success'])
         self.assertIn('items', data)
+        self.assertEqual([item['name'] for item in data['items']], ['subfolder', 'file1.mp3', 'file2.mp3'])
+        self.mock_db.refresh_library.assert_called_once()
+        self.mock_db.list_library_folder.assert_called_once_with('')
+        
+        # Assignment is resolved with a single lookup for the whole folder
+        self.mock_db.get_assigned_files_in_folder.assert_called_once_with('')
+        self.mock_db.is_file_in_playlist.assert_not_called()
+        assigned = {item['name']: item.get('assigned') for item in data['items']}
+        self.assertFalse(assigned['file1.mp3'])
+        self.assertTrue(assigned['file2.mp3'])
+        
+        # Cached metadata is passed through for the explorer
+        file2 = data['items'][2]
+        self.assertEqual((file2['title'], file2['artist'], file2['duration'], file2['bitrate']),
+                         ('Song', 'Band', 61.5, 128))
+        self.assertIsNone(data['items'][1]['title'])
     
     @patch('src.api.media.os.path.exists')
     @patch('src.api.media.os.remove')
@@ -74,13 +95,9 @@ class TestMediaAPI(unittest.TestCase):
         self.assertFalse(data['success'])
         self.assertIn('in use', data['error'])
     
-    @patch('src.api.media.os.walk')
-    def test_get_mp3_files(self, mock_walk):
-        """Test getting list of all MP3 files."""
-        mock_walk.return_value = [
-            ('/test/mp3', ['subfolder'], ['file1.mp3', 'file2.txt']),
-            ('/test/mp3/subfolder', [], ['file3.mp3', 'readme.md'])
-        ]
+    def test_get_mp3_files(self):
+        """Test getting list of all MP3 files from the library index."""
+        self.mock_db.get_library_files.return_value = ['file1.mp3', 'subfolder/file3.mp3']
         
         response = self.client.get('/api/mp3-files')
         data = json.loads(response.data)
@@ -90,11 +107,11 @@ class TestMediaAPI(unittest.TestCase):
         self.assertEqual(len(data['files']), 2)
         self.assertIn('file1.mp3', data['files'])
         self.assertIn('subfolder/file3.mp3', data['files'])
+        self.mock_db.refresh_library.assert_called_once_with('/test/mp3', self.mock_config.LIBRARY_RESCAN_INTERVAL)
     
-    @patch('src.api.media.os.walk')
-    def test_get_mp3_files_error(self, mock_walk):
+    def test_get_mp3_files_error(self):
         """Test error handling when getting MP3 files."""
-        mock_walk.side_effect = Exception("Permission denied")
+        self.mock_db.refresh_library.side_effect = Exception("Permission denied")
         
         response = self.client.get('/api/mp3-files')
         data = json.loads(response.data)
@@ -125,11 +142,10 @@ class TestMediaAPI(unittest.TestCase):
         self.assertIn('not found', data['error'])
     
     @patch('src.api.media.os.path.exists')
-    @patch('src.api.media.os.listdir')
-    def test_list_media_error(self, mock_listdir, mock_exists):
+    def test_list_media_error(self, mock_exists):
         """Test error handling in list media."""
         mock_exists.return_value = True
-        mock_listdir.side_effect = PermissionError("Access denied")
+        self.mock_db.list_library_folder.side_effect = PermissionError("Access denied")
         
         response = self.client.get('/api/media?path=/')
         data = json.loads(response.data)
@@ -254,7 +270,7 @@ class TestMediaAPI(unittest.TestCase):
     def test_delete_folder(self, mock_exists, mock_rmtree):
         """Test deleting a folder."""
         mock_exists.return_value = True
-        self.mock_db.are_files_in_folder_used.return_value = False
+        self.mock_db.get_used_files_in_folder.return_value = []
         
         response = self.client.delete('/api/media/folder?path=folder')
         data = json.loads(response.data)
@@ -294,7 +310,7 @@ class TestMediaAPI(unittest.TestCase):
     def test_delete_folder_in_use(self, mock_exists):
         """Test deleting folder with files in use."""
         mock_exists.return_value = True
-        self.mock_db.are_files_in_folder_used.return_value = True
+        self.mock_db.get_used_files_in_folder.return_value = ['used/a.mp3']
         
         response = self.client.delete('/api/media/folder?path=used')
         data = json.loads(response.data)
@@ -302,13 +318,14 @@ class TestMediaAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 409)
         self.assertFalse(data['success'])
         self.assertIn('in use', data['error'])
+        self.assertEqual(data['used_files'], ['used/a.mp3'])
     
     @patch('src.api.media.shutil.rmtree')
     @patch('src.api.media.os.path.exists')
     def test_delete_folder_error(self, mock_exists, mock_rmtree):
         """Test error handling in delete folder."""
         mock_exists.return_value = True
-        self.mock_db.are_files_in_folder_used.return_value = False
+        self.mock_db.get_used_files_in_folder.return_value = []
         mock_rmtree.side_effect = OSError("Directory not empty")
         
         response = self.client.delete('/api/media/folder?path=folder')
@@ -345,5 +362,245 @@ class TestMediaAPI(unittest.TestCase):
     #     pass
 
 
+    
+    def test_search_media(self):
+        """Test search returns a page of files with their playlist assignment."""
+        self.mock_config.SEARCH_PAGE_SIZE = 50
+        self.mock_config.SEARCH_MAX_PAGE_SIZE = 200
+        self.mock_db.search_library.return_value = (3, [
+            {'path': 'books/ch1.mp3', 'name': 'ch1.mp3', 'folder': 'books'},
+            {'path': 'books/ch2.mp3', 'name': 'ch2.mp3', 'folder': 'books'},
+        ])
+        self.mock_db.get_assigned_files.return_value = {'books/ch2.mp3'}
+        
+        response = self.client.get('/api/media/search?query=ch&limit=2&offset=0')
+        data = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['total'], 3)
+        self.assertEqual(data['limit'], 2)
+        self.assertEqual([r['path'] for r in data['results']], ['books/ch1.mp3', 'books/ch2.mp3'])
+        self.assertEqual([r['is_assigned'] for r in data['results']], [False, True])
+        self.assertEqual({r['type'] for r in data['results']}, {'file'})
+        self.mock_db.search_library.assert_called_once_with('ch', 2, 0)
+        self.mock_db.get_assigned_files.assert_called_once_with(['books/ch1.mp3', 'books/ch2.mp3'])
+    
+    def test_search_media_clamps_page(self):
+        """Test that limit and offset are kept within bounds."""
+        self.mock_config.SEARCH_PAGE_SIZE = 50
+        self.mock_config.SEARCH_MAX_PAGE_SIZE = 200
+        self.mock_db.search_library.return_value = (0, [])
+        self.mock_db.get_assigned_files.return_value = set()
+        
+        response = self.client.get('/api/media/search?query=x&limit=5000&offset=-3')
+        
+        self.assertEqual(response.status_code, 200)
+        self.mock_db.search_library.assert_called_once_with('x', 200, 0)
+    
+    def test_search_media_invalid_limit(self):
+        """Test that a non-numeric limit is rejected."""
+        response = self.client.get('/api/media/search?query=x&limit=abc')
+        
+        self.assertEqual(response.status_code, 400)
+        self.mock_db.search_library.assert_not_called()
+
+
+class TestRenameMediaAPI(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a Flask test client with a temporary MP3 directory."""
+        import tempfile
+        self.app = Flask(__name__)
+        self.app.register_blueprint(media_bp, url_prefix='/api')
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        
+        self.mp3_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.mp3_dir, 'old'))
+        with open(os.path.join(self.mp3_dir, 'old', 'song.mp3'), 'wb') as f:
+            f.write(b'data')
+        
+        self.db_patcher = patch('src.api.media.db')
+        self.config_patcher = patch('src.api.media.config')
+        self.update_patcher = patch('src.api.media.update_berti_box_current_playlist')
+        self.mock_db = self.db_patcher.start()
+        self.mock_config = self.config_patcher.start()
+        self.mock_update = self.update_patcher.start()
+        self.mock_config.MP3_DIR = self.mp3_dir
+    
+    def tearDown(self):
+        """Clean up patches and the temporary directory."""
+        self.db_patcher.stop()
+        self.config_patcher.stop()
+        self.update_patcher.stop()
+        shutil.rmtree(self.mp3_dir)
+    
+    def _rename(self, old_path, new_name):
+        return self.client.put('/api/media/rename',
+                               json={'old_path': old_path, 'new_name': new_name, 'item_type': 'folder'})
+    
+    def test_rename_folder(self):
+        """Test renaming a folder rewrites references and reloads the player playlist."""
+        self.mock_db.update_path_references.return_value = 1
+        
+        response = self._rename('old', 'new')
+        data = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['new_path'], 'new')
+        self.assertEqual(data['updated_references'], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.mp3_dir, 'new', 'song.mp3')))
+        self.mock_db.update_path_references.assert_called_once_with('old', 'new')
+        self.mock_db.invalidate_library.assert_called_once()
+        self.mock_update.assert_called_once()
+    
+    def test_rename_unreferenced_file(self):
+        """Test that the player is left alone when no playlist item changed."""
+        self.mock_db.update_path_references.return_value = 0
+        
+        response = self._rename('old/song.mp3', 'renamed.mp3')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.exists(os.path.join(self.mp3_dir, 'old', 'renamed.mp3')))
+        self.mock_db.update_path_references.assert_called_once_with('old/song.mp3', 'old/renamed.mp3')
+        self.mock_update.assert_not_called()
+    
+    def test_rename_target_exists(self):
+        """Test renaming onto an existing path is rejected."""
+        os.makedirs(os.path.join(self.mp3_dir, 'taken'))
+        
+        response = self._rename('old', 'taken')
+        
+        self.assertEqual(response.status_code, 409)
+        self.mock_db.update_path_references.assert_not_called()
+    
+    def test_rename_invalid_name(self):
+        """Test that names with separators are rejected."""
+        response = self._rename('old', '../escape')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(os.path.exists(os.path.join(self.mp3_dir, 'old')))
+    
+    def test_rename_file_to_other_type(self):
+        """Test that a file cannot be renamed out of the library."""
+        for new_name in ('song.txt', 'song', 'song.mp3.part'):
+            response = self._rename('old/song.mp3', new_name)
+            
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(os.listdir(os.path.join(self.mp3_dir, 'old')), ['song.mp3'])
+        self.mock_db.update_path_references.assert_not_called()
+    
+    def test_rename_file_keeps_extension_case_insensitive(self):
+        """Test that the extension check ignores case."""
+        self.mock_db.update_path_references.return_value = 0
+        
+        response = self._rename('old/song.mp3', 'Song.MP3')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(os.path.exists(os.path.join(self.mp3_dir, 'old', 'Song.MP3')))
+    
+    def test_rename_reverted_on_db_error(self):
+        """Test that the filesystem rename is undone when references cannot be updated."""
+        self.mock_db.update_path_references.return_value = None
+        
+        response = self._rename('old', 'new')
+        
+        self.assertEqual(response.status_code, 500)
+        self.assertTrue(os.path.exists(os.path.join(self.mp3_dir, 'old', 'song.mp3')))
+        self.assertFalse(os.path.exists(os.path.join(self.mp3_dir, 'new')))
+        self.mock_update.assert_not_called()
+
+
+class TestStreamMediaAPI(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a Flask test client with one MP3 file in a temporary directory."""
+        import tempfile
+        self.app = Flask(__name__)
+        self.app.register_blueprint(media_bp, url_prefix='/api')
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        
+        self.mp3_dir = tempfile.mkdtemp()
+        self.content = bytes(range(256)) * 40
+        os.makedirs(os.path.join(self.mp3_dir, 'books'))
+        with open(os.path.join(self.mp3_dir, 'books', 'ch1.mp3'), 'wb') as f:
+            f.write(self.content)
+        
+        self.config_patcher = patch('src.api.media.config')
+        self.mock_config = self.config_patcher.start()
+        self.mock_config.MP3_DIR = self.mp3_dir
+    
+    def tearDown(self):
+        """Clean up patches and the temporary directory."""
+        self.config_patcher.stop()
+        shutil.rmtree(self.mp3_dir)
+    
+    def _stream(self, path='books/ch1.mp3', headers=None):
+        return self.client.get('/api/media/stream', query_string={'path': path}, headers=headers or {})
+    
+    def test_stream_whole_file(self):
+        """Test that a file is served with audio type, ETag and range support."""
+        response = self._stream()
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'audio/mpeg')
+        self.assertEqual(response.data, self.content)
+        self.assertEqual(response.headers['Accept-Ranges'], 'bytes')
+        etag, weak = response.get_etag()
+        self.assertTrue(etag)
+        self.assertFalse(weak)
+        response.close()
+    
+    def test_stream_range(self):
+        """Test that a Range request returns only the requested bytes."""
+        response = self._stream(headers={'Range': 'bytes=1000-1999'})
+        
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, self.content[1000:2000])
+        self.assertEqual(response.headers['Content-Range'], f'bytes 1000-1999/{len(self.content)}')
+        response.close()
+    
+    def test_stream_not_modified(self):
+        """Test that a matching If-None-Match is answered with 304 and no body."""
+        etag = self._stream().headers['ETag']
+        
+        response = self._stream(headers={'If-None-Match': etag})
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+    
+    def test_etag_changes_with_file(self):
+        """Test that the ETag changes when the file is replaced."""
+        etag = self._stream().headers['ETag']
+        full_path = os.path.join(self.mp3_dir, 'books', 'ch1.mp3')
+        with open(full_path, 'ab') as f:
+            f.write(b'more')
+        
+        response = self._stream(headers={'If-None-Match': etag})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        response.close()
+    
+    def test_stale_if_range_returns_whole_file(self):
+        """Test that a range of an outdated ETag is ignored in favour of the full file."""
+        response = self._stream(headers={'Range': 'bytes=0-9', 'If-Range': '"outdated"'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, self.content)
+        response.close()
+    
+    def test_stream_errors(self):
+        """Test missing, escaping, non-MP3 and unknown paths."""
+        with open(os.path.join(self.mp3_dir, 'notes.txt'), 'w') as f:
+            f.write('text')
+        
+        self.assertEqual(self._stream('').status_code, 400)
+        self.assertEqual(self._stream('../../etc/passwd.mp3').status_code, 403)
+        self.assertEqual(self._stream('notes.txt').status_code, 400)
+        self.assertEqual(self._stream('books/missing.mp3').status_code, 404)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""Tests for the metrics API endpoints."""
+
+import unittest
+from flask import Flask, Blueprint
+from src.api.metrics import bp as metrics_bp, instrument_blueprint
+from src.utils import metrics
+
+
+class TestMetricsAPI(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a Flask test client with the metrics blueprint."""
+        self.app = Flask(__name__)
+        self.app.register_blueprint(metrics_bp, url_prefix='/api')
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+    
+    def test_prometheus_endpoint(self):
+        """Test the Prometheus text endpoint."""
+        metrics.get_counter('api_metrics_test_total').inc()
+        
+        response = self.client.get('/api/metrics')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+        self.assertIn('api_metrics_test_total 1', response.get_data(as_text=True))
+    
+    def test_json_endpoint(self):
+        """Test the JSON snapshot endpoint."""
+        metrics.get_counter('api_metrics_json_test_total').inc(2)
+        
+        response = self.client.get('/api/metrics.json')
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['counters']['api_metrics_json_test_total'], 2)
+        self.assertIn('histograms', data)
+    
+    def test_instrument_blueprint_times_requests(self):
+        """Test that requests to an instrumented blueprint are timed and counted."""
+        sample_bp = instrument_blueprint(Blueprint('metrics_sample', __name__))
+        
+        @sample_bp.route('/sample')
+        def sample():
+            return 'ok'
+        
+        @sample_bp.route('/missing')
+        def missing():
+            return 'gone', 404
+        
+        self.app.register_blueprint(sample_bp)
+        self.client.get('/sample')
+        self.client.get('/missing')
+        
+        histograms = metrics.get_all_histograms()
+        counters = metrics.get_all_counters()
+        self.assertEqual(histograms['http_request_seconds{endpoint="metrics_sample.sample"}']['count'], 1)
+        self.assertEqual(counters['http_responses_total{endpoint="metrics_sample.sample",status="200"}'], 1)
+        self.assertEqual(counters['http_responses_total{endpoint="metrics_sample.missing",status="404"}'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
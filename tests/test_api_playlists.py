@@ -27,9 +27,9 @@ class TestPlaylistsAPI(unittest.TestCase):
         self.db_patcher.stop()
         self.update_patcher.stop()
     
-    def test_get_playlist_items(self):
+    def test_get_playlist_items_with_metadata(self):
         """Test getting playlist items."""
-        self.mock_db.get_playlist_items.return_value = [
+        self.mock_db.get_playlist_items_with_metadata.return_value = [
             {'id': 1, 'mp3_file': 'song1.mp3', 'position': 0},
             {'id': 2, 'mp3_file': 'song2.mp3', 'position': 1}
         ]
@@ -40,7 +40,7 @@ class TestPlaylistsAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(data['success'])
         self.assertEqual(len(data['items']), 2)
-        self.mock_db.get_playlist_items.assert_called_once_with(1)
+        self.mock_db.get_playlist_items_with_metadata.assert_called_once_with(1)
     
     def test_add_playlist_item(self):
         """Test adding item to playlist."""
@@ -152,7 +152,7 @@ class TestPlaylistsAPI(unittest.TestCase):
     
     def test_get_playlist_items_error(self):
         """Test error handling in get playlist items."""
-        self.mock_db.get_playlist_items.side_effect = Exception("Database error")
+        self.mock_db.get_playlist_items_with_metadata.side_effect = Exception("Database error")
         
         response = self.client.get('/api/playlists/1/items')
         data = json.loads(response.data)
@@ -285,6 +285,50 @@ class TestPlaylistsAPI(unittest.TestCase):
         self.assertFalse(data['success'])
         self.assertIn('Database error', data['error'])
 
+    
+    def test_reorder_playlist_items(self):
+        """Test setting the order of all playlist items."""
+        self.mock_db.reorder_playlist_items.return_value = True
+        
+        response = self.client.put('/api/playlists/1/order',
+                                  json={'item_ids': [3, 1, 2]})
+        data = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data['success'])
+        self.mock_db.reorder_playlist_items.assert_called_once_with(1, [3, 1, 2])
+        self.mock_update.assert_called_once_with(1)
+    
+    def test_reorder_playlist_items_invalid_body(self):
+        """Test reordering without a list of IDs."""
+        response = self.client.put('/api/playlists/1/order',
+                                  json={'item_ids': 'abc'})
+        
+        self.assertEqual(response.status_code, 400)
+        self.mock_db.reorder_playlist_items.assert_not_called()
+    
+    def test_reorder_playlist_items_mismatch(self):
+        """Test reordering with IDs that do not match the playlist."""
+        self.mock_db.reorder_playlist_items.return_value = False
+        
+        response = self.client.put('/api/playlists/1/order',
+                                  json={'item_ids': [1, 99]})
+        data = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(data['success'])
+        self.mock_update.assert_not_called()
+    
+    def test_reorder_playlist_items_failure(self):
+        """Test reordering when the database write fails."""
+        self.mock_db.reorder_playlist_items.return_value = None
+        
+        response = self.client.put('/api/playlists/1/order',
+                                  json={'item_ids': [1, 2]})
+        
+        self.assertEqual(response.status_code, 500)
+        self.mock_update.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
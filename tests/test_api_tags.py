@@ -17,6 +17,7 @@ class TestTagsAPI(unittest.TestCase):
         # Mock database
         self.db_patcher = patch('src.api.tags.db')
         self.mock_db = self.db_patcher.start()
+        self.mock_db.get_tags_version.return_value = 'abc-1'
     
     def tearDown(self):
         """Clean up patches."""
@@ -48,6 +49,32 @@ class TestTagsAPI(unittest.TestCase):
         self.assertEqual(len(data['tags']), 2)
         self.assertEqual(data['tags'][0]['tag_id'], 'TAG1')
     
+    def test_get_tags_sets_etag(self):
+        """Test that the tag list carries an ETag."""
+        self.mock_db.get_all_tags.return_value = []
+        
+        response = self.client.get('/api/tags')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['ETag'], '"abc-1"')
+    
+    def test_get_tags_not_modified(self):
+        """Test that a matching If-None-Match skips the query."""
+        response = self.client.get('/api/tags', headers={'If-None-Match': '"abc-1"'})
+        
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], '"abc-1"')
+        self.mock_db.get_all_tags.assert_not_called()
+    
+    def test_get_tags_stale_etag(self):
+        """Test that an outdated If-None-Match returns the full list."""
+        self.mock_db.get_all_tags.return_value = []
+        
+        response = self.client.get('/api/tags', headers={'If-None-Match': '"abc-0"'})
+        
+        self.assertEqual(response.status_code, 200)
+        self.mock_db.get_all_tags.assert_called_once()
+    
     def test_get_tags_error(self):
         """Test error handling when getting tags fails."""
         self.mock_db.get_all_tags.side_effect = Exception("Database error")
@@ -181,7 +208,7 @@ class TestTagsAPI(unittest.TestCase):
             {'id': 1, 'mp3_file': 'song1.mp3', 'position': 0},
             {'id': 2, 'mp3_file': 'song2.mp3', 'position': 1}
         ]
-        self.mock_db.get_playlist_items.return_value = mock_items
+        self.mock_db.get_playlist_items_with_metadata.return_value = mock_items
         
         response = self.client.get('/api/tags/TAG1/playlist')
         data = json.loads(response.data)
@@ -190,7 +217,7 @@ class TestTagsAPI(unittest.TestCase):
         self.assertTrue(data['success'])
         self.assertEqual(data['playlist_id'], 10)
         self.assertEqual(len(data['items']), 2)
-        self.mock_db.get_playlist_items.assert_called_once_with(10)
+        self.mock_db.get_playlist_items_with_metadata.assert_called_once_with(10)
     
     def test_get_tag_playlist_no_playlist(self):
         """Test getting playlist for tag without playlist."""
@@ -2,8 +2,12 @@ import unittest
 from unittest.mock import Mock, MagicMock, patch, mock_open
 import json
 import io
+import os
+import shutil
+import tempfile
 from flask import Flask
 from werkzeug.datastructures import FileStorage
+from src.api import upload
 from src.api.upload import bp as upload_bp
 
 
@@ -23,10 +27,15 @@ class TestUploadAPI(unittest.TestCase):
         self.mock_config.MP3_DIR = '/test/mp3'
         self.mock_config.UPLOAD_CHUNK_SIZE = 8192
         self.mock_config.ALLOWED_EXTENSIONS = {'mp3', 'MP3'}
+        
+        # Mock database
+        self.db_patcher = patch('src.api.upload.db')
+        self.mock_db = self.db_patcher.start()
     
     def tearDown(self):
         """Clean up patches."""
         self.config_patcher.stop()
+        self.db_patcher.stop()
     
     @patch('src.api.upload.os.makedirs')
     @patch('src.api.upload.os.path.exists')
@@ -187,5 +196,189 @@ class TestUploadAPI(unittest.TestCase):
         mock_secure.assert_called_once_with('../../etc/passwd.mp3')
 
 
+
+class TestResumableUploadAPI(unittest.TestCase):
+
+    def setUp(self):
+        """Set up Flask test client with a temporary MP3 directory."""
+        self.app = Flask(__name__)
+        self.app.register_blueprint(upload_bp, url_prefix='/api')
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+        self.mp3_dir = tempfile.mkdtemp()
+
+        self.config_patcher = patch('src.api.upload.config')
+        self.mock_config = self.config_patcher.start()
+        self.mock_config.MP3_DIR = self.mp3_dir
+        self.mock_config.UPLOAD_CHUNK_SIZE = 4
+        self.mock_config.ALLOWED_EXTENSIONS = {'mp3'}
+        self.mock_config.UPLOAD_SESSION_TTL = 60
+        self.mock_config.UPLOAD_MAX_FILE_SIZE = 100
+
+        self.db_patcher = patch('src.api.upload.db')
+        self.mock_db = self.db_patcher.start()
+
+    def tearDown(self):
+        """Clean up patches and the temporary directory."""
+        upload._upload_sessions.clear()
+        self.config_patcher.stop()
+        self.db_patcher.stop()
+        shutil.rmtree(self.mp3_dir)
+
+    def _init(self, filename='book.mp3', size=10, target_folder='audiobooks'):
+        return self.client.post('/api/uploads', json={
+            'filename': filename, 'size': size, 'target_folder': target_folder
+        })
+
+    def _put(self, upload_id, offset, body):
+        return self.client.put(f'/api/uploads/{upload_id}?offset={offset}', data=body,
+                               content_type='application/octet-stream')
+
+    def test_chunked_upload_success(self):
+        """Test uploading a file in chunks and finalizing it."""
+        upload_id = json.loads(self._init().data)['upload_id']
+
+        response = self._put(upload_id, 0, b'01234')
+        self.assertEqual(json.loads(response.data)['offset'], 5)
+        response = self._put(upload_id, 5, b'56789')
+        self.assertEqual(json.loads(response.data)['offset'], 10)
+
+        response = self.client.post(f'/api/uploads/{upload_id}/finalize')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['path'], 'audiobooks/book.mp3')
+        with open(os.path.join(self.mp3_dir, 'audiobooks', 'book.mp3'), 'rb') as f:
+            self.assertEqual(f.read(), b'0123456789')
+        self.assertEqual(os.listdir(os.path.join(self.mp3_dir, 'audiobooks')), ['book.mp3'])
+        self.assertEqual(os.listdir(os.path.join(self.mp3_dir, '.uploads')), [])
+        self.mock_db.invalidate_library.assert_called_once()
+
+    def test_resume_reports_received_offset(self):
+        """Test that an interrupted upload reports where to resume."""
+        upload_id = json.loads(self._init().data)['upload_id']
+        self._put(upload_id, 0, b'0123')
+
+        response = self.client.get(f'/api/uploads/{upload_id}')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['offset'], 4)
+        self.assertEqual(data['size'], 10)
+
+    def test_chunk_offset_mismatch(self):
+        """Test that a chunk at the wrong offset is rejected with the current offset."""
+        upload_id = json.loads(self._init().data)['upload_id']
+        self._put(upload_id, 0, b'0123')
+
+        response = self._put(upload_id, 0, b'0123')
+        data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(data['offset'], 4)
+
+    def test_chunk_exceeding_size_is_discarded(self):
+        """Test that data beyond the announced size is rejected and not kept."""
+        upload_id = json.loads(self._init(size=4).data)['upload_id']
+
+        response = self._put(upload_id, 0, b'0123456')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(self.client.get(f'/api/uploads/{upload_id}').data)['offset'], 0)
+
+    def test_finalize_incomplete_upload(self):
+        """Test that an incomplete upload cannot be finalized."""
+        upload_id = json.loads(self._init().data)['upload_id']
+        self._put(upload_id, 0, b'012')
+
+        response = self.client.post(f'/api/uploads/{upload_id}/finalize')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(json.loads(response.data)['offset'], 3)
+        self.mock_db.invalidate_library.assert_not_called()
+
+    def test_init_rejects_existing_file(self):
+        """Test that starting an upload for an existing file fails."""
+        open(os.path.join(self.mp3_dir, 'book.mp3'), 'wb').close()
+
+        response = self._init(target_folder='')
+
+        self.assertEqual(response.status_code, 409)
+
+    def test_init_rejects_path_traversal(self):
+        """Test that the target folder cannot escape the MP3 directory."""
+        response = self._init(target_folder='../outside')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_init_rejects_invalid_extension(self):
+        """Test that only allowed file types can be uploaded."""
+        response = self._init(filename='book.exe')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_size_rejected(self):
+        """Test that sizes that are not byte counts are rejected."""
+        for size in (True, -1, '10', 10.5):
+            self.assertEqual(self._init(size=size).status_code, 400)
+
+    def test_size_above_limit_rejected(self):
+        """Test that a file larger than the configured limit cannot be announced."""
+        response = self._init(size=101)
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(upload._upload_sessions, {})
+
+    def test_size_above_free_space_rejected(self):
+        """Test that uploads only start if the card can hold them and all running uploads."""
+        with patch('src.api.upload.shutil.disk_usage', return_value=Mock(free=15)):
+            self.assertEqual(self._init(filename='first.mp3', size=10).status_code, 200)
+
+            response = self._init(filename='second.mp3', size=10)
+
+        self.assertEqual(response.status_code, 507)
+        self.assertEqual(len(upload._upload_sessions), 1)
+        self.assertEqual(len(os.listdir(os.path.join(self.mp3_dir, '.uploads'))), 1)
+
+    def test_abort_removes_temp_file(self):
+        """Test that aborting an upload removes its temp file and session."""
+        upload_id = json.loads(self._init().data)['upload_id']
+        self._put(upload_id, 0, b'0123')
+
+        response = self.client.delete(f'/api/uploads/{upload_id}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(os.listdir(os.path.join(self.mp3_dir, 'audiobooks')), [])
+        self.assertEqual(os.listdir(os.path.join(self.mp3_dir, '.uploads')), [])
+        self.assertEqual(self.client.get(f'/api/uploads/{upload_id}').status_code, 404)
+
+    def test_idle_session_expires(self):
+        """Test that an upload idle for longer than the TTL is discarded with its temp file."""
+        with patch('src.api.upload.time.monotonic', return_value=1000.0):
+            idle_id = json.loads(self._init(filename='idle.mp3').data)['upload_id']
+            self._put(idle_id, 0, b'0123')
+        with patch('src.api.upload.time.monotonic', return_value=1030.0):
+            active_id = json.loads(self._init(filename='active.mp3').data)['upload_id']
+
+        with patch('src.api.upload.time.monotonic', return_value=1070.0):
+            self.assertEqual(self.client.get(f'/api/uploads/{idle_id}').status_code, 404)
+            self.assertEqual(self.client.get(f'/api/uploads/{active_id}').status_code, 200)
+
+        temp_files = os.listdir(os.path.join(self.mp3_dir, '.uploads'))
+        self.assertEqual(temp_files, [f'{active_id}.part'])
+
+    def test_access_keeps_session_alive(self):
+        """Test that every request to an upload restarts its idle time."""
+        with patch('src.api.upload.time.monotonic', return_value=1000.0):
+            upload_id = json.loads(self._init().data)['upload_id']
+        with patch('src.api.upload.time.monotonic', return_value=1050.0):
+            self._put(upload_id, 0, b'0123')
+
+        with patch('src.api.upload.time.monotonic', return_value=1100.0):
+            response = self.client.get(f'/api/uploads/{upload_id}')
+
+        self.assertEqual(json.loads(response.data)['offset'], 4)
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -71,6 +71,16 @@ class TestBertiBoxRefactored(unittest.TestCase):
         self.assertEqual(self.bertibox.sleep_timer, self.mock_sleep)
         self.assertEqual(self.bertibox.rfid_reader, self.mock_rfid)
     
+    def test_set_socketio(self):
+        """Test that a Socket.IO server attached later reaches all emitting components."""
+        socketio = MagicMock()
+        
+        self.bertibox.set_socketio(socketio)
+        
+        for component in (self.bertibox, self.mock_playback, self.mock_tag, self.mock_sleep,
+                          self.bertibox.status_publisher):
+            self.assertIs(component.socketio, socketio)
+    
     @patch('src.core.player.threading.Thread')
     def test_start(self, mock_thread_class):
         """Test starting the BertiBox."""
@@ -100,68 +110,70 @@ class TestBertiBoxRefactored(unittest.TestCase):
         self.mock_sleep.cancel.assert_called_once()
         self.mock_rfid.stop_reading.assert_called_once()
         self.mock_rfid.cleanup.assert_called_once()
+        # The position is checkpointed before the state is cleared and written right away
+        self.mock_playback.save_resume_position.assert_called_once()
+        self.mock_db.flush_resume_positions.assert_called_once()
     
-    @patch('src.core.player.time.sleep')
-    def test_main_loop_with_tag(self, mock_sleep):
-        """Test the main loop when a tag is detected."""
-        # Set up mock behavior
-        self.bertibox.running = True
-        self.mock_rfid.get_tag.return_value = "TEST_TAG"
-        self.mock_tag.current_tag_id = None
-        
-        # Run one iteration then stop
-        def stop_after_one(delay):
-            if mock_sleep.call_count >= 1:
-                self.bertibox.running = False
-        mock_sleep.side_effect = stop_after_one
+    def test_sleep_timer_expiry_saves_resume_position(self):
+        """Test that the position is checkpointed when the sleep timer stops playback."""
+        calls = []
+        self.mock_playback.save_resume_position.side_effect = lambda: calls.append('save')
+        self.mock_playback.clear_state.side_effect = lambda: calls.append('clear')
         
-        self.bertibox._main_loop()
+        self.bertibox._handle_sleep_timer_expired()
         
-        # Verify tag handling was called
-        self.mock_tag.handle_tag.assert_called_with(
-            "TEST_TAG", self.mock_playback
-        )
-        mock_sleep.assert_called_with(0.1)
+        self.assertEqual(calls, ['save', 'clear'])
+        self.mock_tag.clear_tag_state.assert_called_once()
     
-    @patch('src.core.player.time.sleep')
-    def test_main_loop_tag_removed(self, mock_sleep):
-        """Test the main loop when a tag is removed."""
-        # Set up mock behavior
+    def _run_main_loop_with_events(self, events):
+        """Run the dispatcher until the given events are consumed."""
         self.bertibox.running = True
-        self.mock_rfid.get_tag.return_value = None
-        self.mock_tag.current_tag_id = "OLD_TAG"
+        remaining = list(events)
         
-        # Run one iteration then stop
-        def stop_after_one(delay):
-            if mock_sleep.call_count >= 1:
+        def next_event(timeout=None):
+            if not remaining:
                 self.bertibox.running = False
-        mock_sleep.side_effect = stop_after_one
+                return None
+            return remaining.pop(0)
+        self.mock_rfid.get_event.side_effect = next_event
         
         self.bertibox._main_loop()
+    
+    def test_main_loop_with_tag(self):
+        """Test the dispatcher when a tag is detected."""
+        event = MagicMock(tag_id="TEST_TAG", timestamp=12.5)
+        
+        self._run_main_loop_with_events([event])
         
-        # Verify tag handling was called with None
-        self.mock_tag.handle_tag.assert_called_with(None, self.mock_playback)
-        mock_sleep.assert_called_with(0.1)
+        self.mock_tag.handle_tag.assert_called_once_with(
+            "TEST_TAG", self.mock_playback, detected_at=12.5
+        )
     
-    @patch('src.core.player.time.sleep')
-    def test_main_loop_no_tag_no_current(self, mock_sleep):
-        """Test the main loop when no tag and no current tag."""
-        # Set up mock behavior
-        self.bertibox.running = True
-        self.mock_rfid.get_tag.return_value = None
-        self.mock_tag.current_tag_id = None
+    def test_main_loop_tag_removed(self):
+        """Test the dispatcher when a tag is removed."""
+        event = MagicMock(tag_id=None, timestamp=20.0)
         
-        # Run one iteration then stop
-        def stop_after_one(delay):
-            if mock_sleep.call_count >= 1:
-                self.bertibox.running = False
-        mock_sleep.side_effect = stop_after_one
+        self._run_main_loop_with_events([event])
         
-        self.bertibox._main_loop()
+        self.mock_tag.handle_tag.assert_called_once_with(
+            None, self.mock_playback, detected_at=20.0
+        )
+    
+    def test_main_loop_no_event(self):
+        """Test the dispatcher ignores wakeups without an event."""
+        self._run_main_loop_with_events([None])
         
-        # Verify no tag handling was called (no tag and no current tag)
         self.mock_tag.handle_tag.assert_not_called()
-        mock_sleep.assert_called_with(0.1)
+    
+    def test_main_loop_survives_handler_error(self):
+        """Test the dispatcher keeps running after a handler error."""
+        first = MagicMock(tag_id="A", timestamp=1.0)
+        second = MagicMock(tag_id="B", timestamp=2.0)
+        self.mock_tag.handle_tag.side_effect = [Exception("boom"), True]
+        
+        self._run_main_loop_with_events([first, second])
+        
+        self.assertEqual(self.mock_tag.handle_tag.call_count, 2)
     
     
     def test_set_volume(self):
@@ -244,6 +256,21 @@ class TestBertiBoxRefactored(unittest.TestCase):
         self.assertEqual(result, 15)
         self.mock_sleep.get_remaining_minutes.assert_called_once()
     
+    def test_emit_player_status_is_coalesced(self):
+        """Test that status emits go through the coalescing publisher."""
+        with patch.object(self.bertibox.status_publisher, 'publish') as mock_publish:
+            self.bertibox.emit_player_status()
+        
+        mock_publish.assert_called_once()
+        self.mock_socketio.emit.assert_not_called()
+    
+    def test_send_player_status_snapshot(self):
+        """Test that a full snapshot is sent to a single client."""
+        with patch.object(self.bertibox.status_publisher, 'send_snapshot') as mock_snapshot:
+            self.bertibox.send_player_status('sid-1')
+        
+        mock_snapshot.assert_called_once_with(to='sid-1')
+    
     def test_get_player_status(self):
         """Test getting player status."""
         self.mock_playback.get_status.return_value = {
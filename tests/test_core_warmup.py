@@ -0,0 +1,101 @@
+"""Tests for the startup warm-up."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.core.warmup import warm_up, prefetch_file
+from src.database.manager import Database
+
+
+class TestWarmUp(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a test database with two tags and their MP3 files."""
+        self.test_db_fd, self.test_db_path = tempfile.mkstemp(suffix='.db')
+        self.mp3_dir = tempfile.mkdtemp()
+        
+        self.config_patcher = patch('src.database.manager.config')
+        self.mock_config = self.config_patcher.start()
+        self.mock_config.DATABASE_FILE = self.test_db_path
+        self.mock_config.DEFAULT_VOLUME = 0.5
+        
+        Database._instance = None
+        self.db = Database()
+        self.db.init_db()
+        
+        for name in ('a.mp3', 'b.mp3', 'c.mp3'):
+            with open(os.path.join(self.mp3_dir, name), 'wb') as f:
+                f.write(b'\x00' * 1024)
+        
+        self.db.add_tag('TAG1', 'Tag One')
+        self.playlist = self.db.add_playlist('TAG1', 'Playlist One')
+        self.db.add_playlist_items(self.playlist.id, ['a.mp3', 'b.mp3'])
+        self.db.add_tag('TAG2', 'Without Playlist Items')
+        self.db.add_playlist('TAG2', 'Empty')
+    
+    def tearDown(self):
+        """Clean up test database and files."""
+        self.db.cleanup()
+        self.config_patcher.stop()
+        self.db.engine.dispose()
+        os.close(self.test_db_fd)
+        os.unlink(self.test_db_path)
+        shutil.rmtree(self.mp3_dir)
+        Database._instance = None
+    
+    def _prefetched_files(self):
+        with patch('src.core.warmup.prefetch_file', return_value=True) as mock_prefetch:
+            result = warm_up(self.db, self.mp3_dir, readahead_bytes=4096)
+        return result, [os.path.basename(call.args[0]) for call in mock_prefetch.call_args_list]
+    
+    def test_preloads_tags_and_prefetches_first_tracks(self):
+        """Test that all tags are cached and each tag's first track is prefetched."""
+        result, files = self._prefetched_files()
+        
+        self.assertEqual(result, {'tags': 2, 'files': 1})
+        self.assertEqual(files, ['a.mp3'])
+        self.assertIn('TAG1', self.db.tag_cache._entries)
+        self.assertIn('TAG2', self.db.tag_cache._entries)
+    
+    def test_prefetches_resume_track(self):
+        """Test that a tag with a saved position prefetches the track it resumes with."""
+        self.db.set_resume_position('TAG1', self.playlist.id, 1, 'b.mp3', 30.0)
+        
+        _, files = self._prefetched_files()
+        
+        self.assertEqual(files, ['b.mp3'])
+    
+    def test_ignores_resume_position_of_other_playlist(self):
+        """Test that an outdated resume position does not pick the prefetched track."""
+        self.db.set_resume_position('TAG1', self.playlist.id + 100, 0, 'c.mp3', 30.0)
+        
+        _, files = self._prefetched_files()
+        
+        self.assertEqual(files, ['a.mp3'])
+
+
+class TestPrefetchFile(unittest.TestCase):
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'a.mp3')
+        with open(self.path, 'wb') as f:
+            f.write(b'\x00' * 1024)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    @unittest.skipUnless(hasattr(os, 'posix_fadvise'), 'posix_fadvise not available')
+    def test_uses_fadvise_willneed(self):
+        """Test that the start of the file is announced to the kernel."""
+        with patch('src.core.warmup.os.posix_fadvise') as mock_fadvise:
+            self.assertTrue(prefetch_file(self.path, 4096))
+        
+        args = mock_fadvise.call_args.args
+        self.assertEqual(args[1:], (0, 4096, os.POSIX_FADV_WILLNEED))
+    
+    def test_missing_file(self):
+        """Test that a missing file is skipped."""
+        self.assertFalse(prefetch_file(os.path.join(self.temp_dir, 'missing.mp3'), 4096))
@@ -0,0 +1,60 @@
+"""Tests for the SQLite engine profiles."""
+
+import os
+import tempfile
+import unittest
+from sqlalchemy import text
+from src.database.engine import create_db_engine
+
+
+class TestCreateDbEngine(unittest.TestCase):
+
+    def setUp(self):
+        """Create a temporary database directory."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'test.db')
+        self.engine = None
+
+    def tearDown(self):
+        """Dispose the engine and remove the database files."""
+        if self.engine is not None:
+            self.engine.dispose()
+        for name in os.listdir(self.tmp_dir):
+            os.unlink(os.path.join(self.tmp_dir, name))
+        os.rmdir(self.tmp_dir)
+
+    def _pragma(self, name):
+        with self.engine.connect() as connection:
+            return connection.execute(text(f'PRAGMA {name}')).scalar()
+
+    def test_tuned_profile_applies_pragmas(self):
+        """Test that the tuned profile enables WAL and the other PRAGMAs."""
+        self.engine = create_db_engine(self.db_path, 'tuned')
+
+        self.assertEqual(self._pragma('journal_mode'), 'wal')
+        self.assertEqual(self._pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self._pragma('busy_timeout'), 5000)
+        self.assertEqual(self._pragma('cache_size'), -8192)
+
+    def test_tuned_profile_configures_pool(self):
+        """Test that pool sizing from the profile is used."""
+        self.engine = create_db_engine(self.db_path, 'tuned')
+
+        self.assertEqual(self.engine.pool.size(), 5)
+        self.assertEqual(self.engine.pool._max_overflow, 10)
+
+    def test_default_profile_keeps_driver_defaults(self):
+        """Test that the default profile applies no PRAGMAs."""
+        self.engine = create_db_engine(self.db_path, 'default')
+
+        self.assertEqual(self._pragma('journal_mode'), 'delete')
+        self.assertEqual(self._pragma('synchronous'), 2)  # FULL
+
+    def test_unknown_profile(self):
+        """Test that an unknown profile name is rejected."""
+        with self.assertRaises(KeyError):
+            create_db_engine(self.db_path, 'nonexistent')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from src.database.manager import Database
 from src.database.models import Base, Tag, Playlist, PlaylistItem, Setting
+from src.database.resume_manager import ResumeManager
+from src.core.playback_controller import PlaybackController
 
 
 class TestDatabaseManager(unittest.TestCase):
@@ -31,6 +33,7 @@ class TestDatabaseManager(unittest.TestCase):
     
     def tearDown(self):
         """Clean up test database."""
+        self.db.flush_settings()
         self.config_patcher.stop()
         
         # Close and remove test database
@@ -325,6 +328,74 @@ class TestDatabaseManager(unittest.TestCase):
         value = self.db.get_setting("new_key")
         self.assertEqual(value, "new_value")
     
+    def test_flush_settings_persists(self):
+        """Test that flushed settings are written to the database."""
+        self.db.set_setting("persisted", "value")
+        self.assertTrue(self.db.flush_settings())
+        
+        session = self.db.get_session()
+        try:
+            setting = session.query(Setting).filter_by(key="persisted").first()
+            self.assertEqual(setting.value, "value")
+        finally:
+            session.close()
+    
+    def test_reorder_playlist_items(self):
+        """Test rewriting all positions of a playlist at once."""
+        self.db.add_tag("TAG", "Tag")
+        playlist = self.db.add_playlist("TAG", "Playlist")
+        items = self.db.add_playlist_items(playlist.id, ["a.mp3", "b.mp3", "c.mp3"])
+        new_order = [items[2]['id'], items[0]['id'], items[1]['id']]
+        
+        self.assertTrue(self.db.reorder_playlist_items(playlist.id, new_order))
+        
+        reordered = self.db.get_playlist_items(playlist.id)
+        self.assertEqual([item['mp3_file'] for item in reordered], ["c.mp3", "a.mp3", "b.mp3"])
+        self.assertEqual([item['position'] for item in reordered], [0, 1, 2])
+    
+    def test_reorder_playlist_items_rejects_mismatch(self):
+        """Test that reordering requires every item of the playlist exactly once."""
+        self.db.add_tag("TAG", "Tag")
+        playlist = self.db.add_playlist("TAG", "Playlist")
+        items = self.db.add_playlist_items(playlist.id, ["a.mp3", "b.mp3"])
+        
+        self.assertFalse(self.db.reorder_playlist_items(playlist.id, [items[0]['id']]))
+        self.assertFalse(self.db.reorder_playlist_items(playlist.id, [items[0]['id'], items[0]['id']]))
+        self.assertFalse(self.db.reorder_playlist_items(playlist.id, [items[0]['id'], 999]))
+        
+        unchanged = self.db.get_playlist_items(playlist.id)
+        self.assertEqual([item['mp3_file'] for item in unchanged], ["a.mp3", "b.mp3"])
+    
+    def test_delete_playlist_item_keeps_positions_contiguous(self):
+        """Test that positions stay 0-based and gapless after a delete."""
+        self.db.add_tag("TAG", "Tag")
+        playlist = self.db.add_playlist("TAG", "Playlist")
+        items = self.db.add_playlist_items(playlist.id, ["a.mp3", "b.mp3", "c.mp3"])
+        
+        self.assertTrue(self.db.delete_playlist_item(items[1]['id']))
+        
+        remaining = self.db.get_playlist_items(playlist.id)
+        self.assertEqual([item['mp3_file'] for item in remaining], ["a.mp3", "c.mp3"])
+        self.assertEqual([item['position'] for item in remaining], [0, 1])
+        self.assertEqual(self.db.add_playlist_item(playlist.id, "d.mp3")['position'], 2)
+    
+    def test_repeated_moves_into_same_gap(self):
+        """Test that moving items into the same gap until it is used up keeps the order right."""
+        self.db.add_tag("TAG", "Tag")
+        playlist = self.db.add_playlist("TAG", "Playlist")
+        files = [f"{i}.mp3" for i in range(15)]
+        self.db.add_playlist_items(playlist.id, files)
+        
+        # Keep moving the last item to position 1, more often than the gap can be halved
+        for _ in range(13):
+            last = self.db.get_playlist_items(playlist.id)[-1]
+            self.assertTrue(self.db.update_playlist_item_position(last['id'], 1))
+            files.insert(1, files.pop())
+        
+        items = self.db.get_playlist_items(playlist.id)
+        self.assertEqual([item['mp3_file'] for item in items], files)
+        self.assertEqual([item['position'] for item in items], list(range(15)))
+    
     def test_is_file_in_playlist(self):
         """Test checking if file is in a playlist linked to a tag."""
         tag = self.db.add_tag("TAG", "Tag")
@@ -373,7 +444,7 @@ class TestDatabaseManager(unittest.TestCase):
         
         # Rename folder
         result = self.db.update_path_references("folder", "new_folder")
-        self.assertTrue(result)
+        self.assertEqual(result, 2)
         
         # Verify updates
         items = self.db.get_playlist_items(playlist.id)
@@ -382,6 +453,54 @@ class TestDatabaseManager(unittest.TestCase):
         self.assertIn("new_folder/file2.mp3", mp3_files)
         self.assertIn("other.mp3", mp3_files)
     
+    def test_update_path_references_into_own_subfolder(self):
+        """Test that moving a path below itself rewrites every item exactly once."""
+        self.db.add_tag("TAG", "Tag")
+        playlist = self.db.add_playlist("TAG", "Playlist")
+        for mp3_file in ("a", "a/x.mp3", "a/b/y.mp3", "ab.mp3"):
+            self.db.add_playlist_item(playlist.id, mp3_file)
+        
+        result = self.db.update_path_references("a", "a/b")
+        
+        self.assertEqual(result, 3)
+        mp3_files = [item['mp3_file'] for item in self.db.get_playlist_items(playlist.id)]
+        self.assertEqual(mp3_files, ["a/b", "a/b/x.mp3", "a/b/b/y.mp3", "ab.mp3"])
+    
+    def test_update_path_references_moves_resume_positions(self):
+        """Test that a folder rename keeps the resume point of a tag in it."""
+        self.db.add_tag("BOOK", "Audiobook")
+        playlist = self.db.add_playlist("BOOK", "Audiobook")
+        for mp3_file in ("book/ch1.mp3", "book/ch2.mp3", "book/ch3.mp3"):
+            self.db.add_playlist_item(playlist.id, mp3_file)
+        self.db.set_resume_position("BOOK", playlist.id, 1, "book/ch2.mp3", 754.0)
+        self.db.flush_resume_positions()
+        
+        self.db.update_path_references("book", "Der Hobbit")
+        
+        expected = {'playlist_id': playlist.id, 'playlist_index': 1,
+                    'mp3_file': "Der Hobbit/ch2.mp3", 'offset_seconds': 754.0}
+        self.assertEqual(self.db.get_resume_position("BOOK"), expected)
+        # Stored row as well, e.g. after a restart
+        self.assertEqual(ResumeManager(self.db.get_session).get_position("BOOK"), expected)
+        
+        controller = PlaybackController(MagicMock(), self.db, None)
+        controller.load_playlist(playlist.id, tag_id="BOOK")
+        self.assertEqual(controller.current_playlist_index, 1)
+        self.assertEqual(controller.pending_start, 754.0)
+    
+    def test_delete_tag_deletes_resume_position(self):
+        """Test that a re-used tag UID does not inherit the position of a deleted tag."""
+        self.db.add_tag("TAG", "Tag")
+        self.db.set_resume_position("TAG", 1, 0, "a.mp3", 10.0)
+        self.db.flush_resume_positions()
+        self.db.set_resume_position("TAG", 1, 0, "a.mp3", 20.0)
+        
+        self.assertTrue(self.db.delete_tag("TAG"))
+        self.db.flush_resume_positions()
+        
+        self.assertIsNone(self.db.get_resume_position("TAG"))
+        self.assertIsNone(ResumeManager(self.db.get_session).get_position("TAG"))
+    
     def test_assign_tag_to_file(self):
         """Test assigning a tag to a file."""
         tag = self.db.add_tag("TAG", "Tag")
@@ -403,25 +522,20 @@ class TestDatabaseManager(unittest.TestCase):
         result = self.db.assign_tag_to_file(tag_db_id, "new_file.mp3")
         self.assertTrue(result)
     
-    @patch('src.database.file_manager.os.walk')
-    @patch('src.database.file_manager.os.path.isdir')
-    def test_are_files_in_folder_used(self, mock_isdir, mock_walk):
+    def test_are_files_in_folder_used(self):
         """Test checking if files in folder are used."""
-        # Setup mock filesystem
-        mock_isdir.return_value = True
-        mock_walk.return_value = [
-            ('/base/folder', ['subfolder'], ['file1.mp3', 'file2.mp3']),
-            ('/base/folder/subfolder', [], ['file3.mp3'])
-        ]
-        
-        # Add used file to database
         tag = self.db.add_tag("TAG", "Tag")
         playlist = self.db.add_playlist("TAG", "Playlist")
-        self.db.add_playlist_item(playlist.id, "folder/file1.mp3")
-        
-        # Test folder with used files
-        result = self.db.are_files_in_folder_used("folder", "/base")
-        self.assertTrue(result)
+        self.db.add_playlist_items(playlist.id, [
+            "folder/file1.mp3", "folder/subfolder/file3.mp3", "folder2/file.mp3", "folder_x.mp3"
+        ])
+        
+        self.assertTrue(self.db.are_files_in_folder_used("folder"))
+        self.assertEqual(
+            self.db.get_used_files_in_folder("folder"),
+            ["folder/file1.mp3", "folder/subfolder/file3.mp3"]
+        )
+        self.assertFalse(self.db.are_files_in_folder_used("other"))
     
     def test_get_playlists_for_file(self):
         """Test getting all tags that contain a specific file."""
@@ -454,6 +568,56 @@ class TestDatabaseManager(unittest.TestCase):
         # Test non-existent file
         tags = self.db.get_playlists_for_file("nonexistent.mp3")
         self.assertEqual(len(tags), 0)
+    
+    def test_get_assigned_files_in_folder(self):
+        """Test batched lookup of tag-linked files below a folder."""
+        self.db.add_tag("TAG1", "Tag One")
+        playlist = self.db.add_playlist("TAG1", "Playlist 1")
+        self.db.add_playlist_items(playlist.id, [
+            "books/ch1.mp3", "books/sub/ch2.mp3", "books2/other.mp3", "Books/upper.mp3", "root.mp3"
+        ])
+        
+        self.assertEqual(
+            self.db.get_assigned_files_in_folder("books"),
+            {"books/ch1.mp3", "books/sub/ch2.mp3"}
+        )
+        self.assertEqual(
+            self.db.get_assigned_files_in_folder("/books/"),
+            {"books/ch1.mp3", "books/sub/ch2.mp3"}
+        )
+        self.assertEqual(len(self.db.get_assigned_files_in_folder("")), 5)
+        self.assertEqual(self.db.get_assigned_files_in_folder("empty"), set())
+    
+    def test_get_all_tags_with_playlists(self):
+        """Test that get_all_tags groups playlists per tag."""
+        self.db.add_tag("TAG1", "Tag One")
+        self.db.add_playlist("TAG1", "First")
+        self.db.add_playlist("TAG1", "Second")
+        self.db.add_tag("TAG2", "Tag Two")
+        
+        tags = self.db.get_all_tags()
+        
+        self.assertEqual([t['tag_id'] for t in tags], ["TAG1", "TAG2"])
+        self.assertEqual([p['name'] for p in tags[0]['playlists']], ["First", "Second"])
+        self.assertEqual(tags[1]['playlists'], [])
+    
+    def test_tags_version_changes_on_tag_writes(self):
+        """Test that the tag list version only changes with tag list writes."""
+        self.db.add_tag("TAG1", "Tag One")
+        playlist = self.db.add_playlist("TAG1", "Playlist")
+        version = self.db.get_tags_version()
+        
+        self.db.add_playlist_item(playlist.id, "a.mp3")
+        self.assertEqual(self.db.get_tags_version(), version)
+        
+        self.db.update_tag("TAG1", "Renamed")
+        self.assertNotEqual(self.db.get_tags_version(), version)
+    
+    def test_mp3_file_index_exists(self):
+        """Test that playlist_items.mp3_file is indexed."""
+        from sqlalchemy import inspect
+        indexes = inspect(self.db.engine).get_indexes('playlist_items')
+        self.assertIn(['mp3_file'], [index['column_names'] for index in indexes])
 
 
 if __name__ == '__main__':
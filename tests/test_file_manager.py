@@ -84,107 +84,97 @@ class TestFileManager(unittest.TestCase):
         self.mock_session.close.assert_called_once()
     
     def test_update_path_references_file(self):
-        """Test updating path references for a single file."""
-        mock_item = MagicMock(spec=PlaylistItem)
-        mock_item.id = 1
-        mock_item.mp3_file = "old/path.mp3"
-        
-        self.mock_session.query().filter().all.side_effect = [
-            [mock_item],  # File match
-            []  # No directory matches
-        ]
+        """Test that a rename is one UPDATE per table in one transaction and returns the item count."""
+        self.mock_session.query().filter().distinct.return_value = [(1,), (2,)]
+        self.mock_session.execute.return_value.rowcount = 3
+        cache = MagicMock()
+        resume = MagicMock()
+        self.file_manager.cache = cache
+        self.file_manager.resume = resume
         
         result = self.file_manager.update_path_references("old/path.mp3", "new/path.mp3")
         
-        self.assertTrue(result)
-        self.assertEqual(mock_item.mp3_file, "new/path.mp3")
+        self.assertEqual(result, 3)
+        self.assertEqual(self.mock_session.execute.call_count, 2)
         self.mock_session.commit.assert_called_once()
+        self.assertEqual(sorted(c.args[0] for c in cache.invalidate_playlist.call_args_list), [1, 2])
+        resume.move_paths.assert_called_once_with("old/path.mp3", "new/path.mp3")
         self.mock_session.close.assert_called_once()
     
-    def test_update_path_references_directory(self):
-        """Test updating path references for a directory."""
-        mock_item1 = MagicMock(spec=PlaylistItem)
-        mock_item1.id = 1
-        mock_item1.mp3_file = "old/dir/file1.mp3"
-        
-        mock_item2 = MagicMock(spec=PlaylistItem)
-        mock_item2.id = 2
-        mock_item2.mp3_file = "old/dir/subdir/file2.mp3"
+    def test_update_path_references_statement(self):
+        """Test that the UPDATE rewrites exact matches and the folder prefix in SQL."""
+        self.mock_session.query().filter().distinct.return_value = [(1,)]
+        self.mock_session.execute.return_value.rowcount = 2
         
-        self.mock_session.query().filter().all.side_effect = [
-            [],  # No exact file match
-            [mock_item1, mock_item2]  # Directory matches
-        ]
-        
-        result = self.file_manager.update_path_references("old/dir", "new/dir")
+        self.file_manager.update_path_references("/old/dir", "new/dir")
         
-        self.assertTrue(result)
-        self.assertEqual(mock_item1.mp3_file, "new/dir/file1.mp3")
-        self.assertEqual(mock_item2.mp3_file, "new/dir/subdir/file2.mp3")
-        self.mock_session.commit.assert_called_once()
-        self.mock_session.close.assert_called_once()
+        items_sql, resume_sql = (str(c.args[0].compile(compile_kwargs={'literal_binds': True}))
+                                 for c in self.mock_session.execute.call_args_list)
+        self.assertIn("UPDATE playlist_items", items_sql)
+        self.assertIn("WHEN (playlist_items.mp3_file = 'old/dir') THEN 'new/dir'", items_sql)
+        self.assertIn("'new/dir/' || substr(playlist_items.mp3_file, 9)", items_sql)
+        self.assertIn("playlist_items.mp3_file >= 'old/dir/'", items_sql)
+        self.assertIn("playlist_items.mp3_file < 'old/dir0'", items_sql)
+        self.assertIn("UPDATE resume_positions", resume_sql)
+        self.assertIn("'new/dir/' || substr(resume_positions.mp3_file, 9)", resume_sql)
     
     def test_update_path_references_no_changes(self):
         """Test update_path_references with no matching items."""
-        self.mock_session.query().filter().all.return_value = []
+        self.mock_session.query().filter().distinct.return_value = []
         
         result = self.file_manager.update_path_references("old/path.mp3", "new/path.mp3")
         
-        self.assertTrue(result)
+        self.assertEqual(result, 0)
+        self.mock_session.execute.assert_not_called()
         self.mock_session.commit.assert_not_called()
         self.mock_session.close.assert_called_once()
     
     def test_update_path_references_exception(self):
         """Test update_path_references handles exceptions."""
-        self.mock_session.query().filter().all.side_effect = Exception("DB Error")
+        self.mock_session.query().filter().distinct.return_value = [(1,)]
+        self.mock_session.execute.side_effect = Exception("DB Error")
+        self.file_manager.resume = MagicMock()
         
         result = self.file_manager.update_path_references("old/path.mp3", "new/path.mp3")
         
-        self.assertFalse(result)
+        self.assertIsNone(result)
         self.mock_session.rollback.assert_called_once()
+        self.file_manager.resume.move_paths.assert_not_called()
         self.mock_session.close.assert_called_once()
     
-    @patch('src.database.file_manager.os.walk')
-    @patch('src.database.file_manager.os.path.isdir')
-    @patch('src.database.file_manager.os.path.abspath')
-    def test_are_files_in_folder_used_true(self, mock_abspath, mock_isdir, mock_walk):
-        """Test checking if files in a folder are used."""
-        mock_isdir.return_value = True
-        mock_abspath.side_effect = lambda x: x  # Return path as-is
-        mock_walk.return_value = [
-            ("/base/folder", [], ["file1.mp3", "file2.mp3"])
-        ]
+    def test_get_used_files_in_folder(self):
+        """Test that used files are fetched with one query."""
+        query_chain = self.mock_session.query.return_value
+        query_chain.filter.return_value = query_chain
+        query_chain.distinct.return_value = query_chain
+        query_chain.order_by.return_value = [("folder/a.mp3",), ("folder/sub/b.mp3",)]
         
-        # First file is not used, second is used
-        with patch.object(self.file_manager, 'is_file_used', side_effect=[False, True]):
-            result = self.file_manager.are_files_in_folder_used("folder", "/base")
+        result = self.file_manager.get_used_files_in_folder("/folder/")
+        
+        self.assertEqual(result, ["folder/a.mp3", "folder/sub/b.mp3"])
+        self.mock_session.query.assert_called_once()
+        self.mock_session.close.assert_called_once()
+    
+    def test_are_files_in_folder_used_true(self):
+        """Test checking if files in a folder are used."""
+        with patch.object(self.file_manager, 'get_used_files_in_folder', return_value=["folder/file2.mp3"]):
+            result = self.file_manager.are_files_in_folder_used("folder")
         
         self.assertTrue(result)
     
-    @patch('src.database.file_manager.os.walk')
-    @patch('src.database.file_manager.os.path.isdir')
-    @patch('src.database.file_manager.os.path.abspath')
-    def test_are_files_in_folder_used_false(self, mock_abspath, mock_isdir, mock_walk):
+    def test_are_files_in_folder_used_false(self):
         """Test checking if no files in a folder are used."""
-        mock_isdir.return_value = True
-        mock_abspath.side_effect = lambda x: x
-        mock_walk.return_value = [
-            ("/base/folder", [], ["file1.mp3", "file2.mp3"])
-        ]
-        
-        with patch.object(self.file_manager, 'is_file_used', return_value=False):
-            result = self.file_manager.are_files_in_folder_used("folder", "/base")
+        with patch.object(self.file_manager, 'get_used_files_in_folder', return_value=[]):
+            result = self.file_manager.are_files_in_folder_used("folder")
         
         self.assertFalse(result)
     
-    @patch('src.database.file_manager.os.path.isdir')
-    def test_are_files_in_folder_used_not_dir(self, mock_isdir):
-        """Test checking files in non-existent folder."""
-        mock_isdir.return_value = False
+    def test_are_files_in_folder_used_error(self):
+        """Test that a failed check reports the folder as used."""
+        with patch.object(self.file_manager, 'get_used_files_in_folder', side_effect=Exception("DB error")):
+            result = self.file_manager.are_files_in_folder_used("folder")
         
-        result = self.file_manager.are_files_in_folder_used("nonexistent", "/base")
-        
-        self.assertFalse(result)
+        self.assertTrue(result)
     
     def test_get_playlists_for_file(self):
         """Test getting playlists that contain a file."""
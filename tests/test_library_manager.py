@@ -0,0 +1,322 @@
+"""Tests for the media library index."""
+
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from sqlalchemy import text
+from src.database.manager import Database
+from src.database.models import MediaFile
+from src.database.search_index import drop_search_index
+
+
+class TestLibraryManager(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a test database and a small MP3 tree."""
+        self.test_db_fd, self.test_db_path = tempfile.mkstemp(suffix='.db')
+        self.mp3_dir = tempfile.mkdtemp()
+        
+        self.config_patcher = patch('src.database.manager.config')
+        self.mock_config = self.config_patcher.start()
+        self.mock_config.DATABASE_FILE = self.test_db_path
+        self.mock_config.DEFAULT_VOLUME = 0.5
+        
+        Database._instance = None
+        self.db = Database()
+        self.db.init_db()
+        
+        self._write('root.mp3')
+        self._write('books/ch1.mp3')
+        self._write('books/ch2.mp3')
+        self._write('books/notes.txt')
+        self._write('books/deep/ch3.mp3')
+    
+    def tearDown(self):
+        """Clean up test database and files."""
+        self.db.metadata.shutdown()
+        self.db.flush_settings()
+        self.config_patcher.stop()
+        self.db.engine.dispose()
+        os.close(self.test_db_fd)
+        os.unlink(self.test_db_path)
+        shutil.rmtree(self.mp3_dir)
+        Database._instance = None
+    
+    def _write(self, relative_path, content=b'x'):
+        full_path = os.path.join(self.mp3_dir, relative_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(content)
+    
+    def _touch_dir(self, relative_path):
+        """Bump a folder mtime so the change is visible regardless of timestamp granularity."""
+        full_path = os.path.join(self.mp3_dir, relative_path)
+        stat = os.stat(full_path)
+        os.utime(full_path, (stat.st_atime, stat.st_mtime + 1))
+    
+    def test_initial_scan_indexes_mp3_files(self):
+        """Test that a first scan indexes all MP3 files."""
+        self.db.refresh_library(self.mp3_dir)
+        
+        self.assertEqual(self.db.get_library_files(), [
+            'books/ch1.mp3', 'books/ch2.mp3', 'books/deep/ch3.mp3', 'root.mp3'
+        ])
+    
+    def test_list_folder(self):
+        """Test listing direct children of an indexed folder."""
+        self.db.refresh_library(self.mp3_dir)
+        
+        subfolders, files = self.db.list_library_folder('/books')
+        
+        self.assertEqual(subfolders, ['books/deep'])
+        self.assertEqual(sorted(f['name'] for f in files), ['ch1.mp3', 'ch2.mp3'])
+        self.assertEqual(files[0]['size'], 1)
+    
+    def test_unchanged_library_reads_no_folders(self):
+        """Test that a rescan of an unchanged library only stats folders."""
+        self.db.refresh_library(self.mp3_dir)
+        
+        with patch('src.database.library_manager.os.scandir') as mock_scandir:
+            changed = self.db.refresh_library(self.mp3_dir)
+        
+        self.assertEqual(changed, 0)
+        mock_scandir.assert_not_called()
+    
+    def test_rescan_picks_up_added_and_removed_files(self):
+        """Test that changed folders are reconciled."""
+        self.db.refresh_library(self.mp3_dir)
+        
+        self._write('books/deep/ch4.mp3')
+        os.remove(os.path.join(self.mp3_dir, 'root.mp3'))
+        self._touch_dir('books/deep')
+        self._touch_dir('')
+        
+        self.assertEqual(self.db.refresh_library(self.mp3_dir), 2)
+        self.assertEqual(self.db.get_library_files(), [
+            'books/ch1.mp3', 'books/ch2.mp3', 'books/deep/ch3.mp3', 'books/deep/ch4.mp3'
+        ])
+    
+    def test_rescan_drops_removed_folder_tree(self):
+        """Test that removing a folder removes it and its subfolders from the index."""
+        self.db.refresh_library(self.mp3_dir)
+        
+        shutil.rmtree(os.path.join(self.mp3_dir, 'books'))
+        self._touch_dir('')
+        self.db.refresh_library(self.mp3_dir)
+        
+        self.assertEqual(self.db.get_library_files(), ['root.mp3'])
+        self.assertEqual(self.db.list_library_folder('books'), ([], []))
+    
+    def test_upload_staging_folder_is_not_indexed(self):
+        """Test that the folder receiving uploads is not part of the library."""
+        self._write('.uploads/abc.part')
+        self._write('.uploads/stray.mp3')
+        
+        self.db.refresh_library(self.mp3_dir)
+        
+        self.assertEqual(self.db.list_library_folder('')[0], ['books'])
+        self.assertNotIn('.uploads/stray.mp3', self.db.get_library_files())
+    
+    def test_refresh_respects_max_age(self):
+        """Test that a fresh index is not rescanned until invalidated."""
+        self.db.refresh_library(self.mp3_dir)
+        self._write('new.mp3')
+        self._touch_dir('')
+        
+        self.assertEqual(self.db.refresh_library(self.mp3_dir, max_age=60), 0)
+        self.assertNotIn('new.mp3', self.db.get_library_files())
+        
+        self.db.invalidate_library()
+        self.assertEqual(self.db.refresh_library(self.mp3_dir, max_age=60), 1)
+        self.assertIn('new.mp3', self.db.get_library_files())
+    
+    def test_file_overwritten_in_place_found_by_file_check(self):
+        """Test that a re-encoded file in an unchanged folder is picked up by the periodic file check."""
+        self.db.refresh_library(self.mp3_dir)
+        folder = os.path.join(self.mp3_dir, 'books')
+        folder_stat = os.stat(folder)
+        self._write('books/ch1.mp3', b're-encoded')
+        os.utime(folder, ns=(folder_stat.st_atime_ns, folder_stat.st_mtime_ns))
+        
+        def indexed_size():
+            session = self.db.get_session()
+            try:
+                return session.query(MediaFile.size).filter_by(path='books/ch1.mp3').scalar()
+            finally:
+                session.close()
+        
+        self.db.invalidate_library()
+        self.assertEqual(self.db.refresh_library(self.mp3_dir), 0)
+        self.assertEqual(indexed_size(), 1)
+        
+        self.db.library.file_check_interval = 0
+        self.db.invalidate_library()
+        self.assertEqual(self.db.refresh_library(self.mp3_dir), 1)
+        self.assertEqual(indexed_size(), len(b're-encoded'))
+    
+    def test_invalidate_during_scan_forces_rescan(self):
+        """Test that a change reported while a scan runs is not hidden by that scan."""
+        library = self.db.library
+        scan = library.scan
+        
+        def scan_and_upload(base_dir, check_files):
+            changed = scan(base_dir, check_files)
+            # An upload finishes after the scan read the root folder
+            self._write('new.mp3')
+            self._touch_dir('')
+            self.db.invalidate_library()
+            return changed
+        
+        with patch.object(library, 'scan', side_effect=scan_and_upload):
+            self.db.refresh_library(self.mp3_dir, max_age=60)
+        
+        self.assertEqual(self.db.refresh_library(self.mp3_dir, max_age=60), 1)
+        self.assertIn('new.mp3', self.db.get_library_files())
+
+    
+    def _search_paths(self, query, limit=50, offset=0):
+        total, files = self.db.search_library(query, limit, offset)
+        return total, [f['path'] for f in files]
+    
+    def test_search_prefix_matches_name_and_folder(self):
+        """Test that every query word must prefix-match the name or folder."""
+        self.db.refresh_library(self.mp3_dir)
+        
+        self.assertTrue(self.db.library.search_available)
+        self.assertEqual(self._search_paths('ch'), (3, ['books/ch1.mp3', 'books/ch2.mp3', 'books/deep/ch3.mp3']))
+        self.assertEqual(self._search_paths('boo de'), (1, ['books/deep/ch3.mp3']))
+        self.assertEqual(self._search_paths('ROOT'), (1, ['root.mp3']))
+        self.assertEqual(self._search_paths('ooks'), (0, []))
+    
+    def test_search_empty_query(self):
+        """Test that a query without words returns nothing."""
+        self.db.refresh_library(self.mp3_dir)
+        
+        self.assertEqual(self.db.search_library('  "*- '), (0, []))
+    
+    def test_search_pagination(self):
+        """Test limit and offset with the total of all matches."""
+        self.db.refresh_library(self.mp3_dir)
+        
+        first_total, first_page = self._search_paths('ch', limit=2)
+        second_total, second_page = self._search_paths('ch', limit=2, offset=2)
+        
+        self.assertEqual((first_total, second_total), (3, 3))
+        self.assertEqual(len(first_page), 2)
+        self.assertEqual(len(second_page), 1)
+        self.assertFalse(set(first_page) & set(second_page))
+    
+    def test_search_follows_rescans(self):
+        """Test that the index drops deleted files and picks up renamed ones."""
+        self.db.refresh_library(self.mp3_dir)
+        
+        os.rename(os.path.join(self.mp3_dir, 'books'), os.path.join(self.mp3_dir, 'stories'))
+        self._touch_dir('')
+        self.db.invalidate_library()
+        self.db.refresh_library(self.mp3_dir)
+        
+        self.assertEqual(self._search_paths('books'), (0, []))
+        self.assertEqual(self._search_paths('stories ch2'), (1, ['stories/ch2.mp3']))
+    
+    def test_search_id3_tags(self):
+        """Test that title, artist and album are searchable once stored."""
+        self.db.refresh_library(self.mp3_dir)
+        # Let the background extraction finish so it cannot overwrite the tags below
+        self.db.metadata.shutdown()
+        session = self.db.get_session()
+        media_file = session.query(MediaFile).filter_by(path='root.mp3').one()
+        media_file.title = 'Der Räuber Hotzenplotz'
+        media_file.artist = 'Otfried Preußler'
+        session.commit()
+        session.close()
+        
+        # Diacritics are folded, so "rauber" finds "Räuber"
+        self.assertEqual(self._search_paths('rauber hotz'), (1, ['root.mp3']))
+        self.assertEqual(self._search_paths('otfried'), (1, ['root.mp3']))
+    
+    def test_search_index_built_for_existing_rows(self):
+        """Test that a newly created index covers files indexed before it existed."""
+        self.db.refresh_library(self.mp3_dir)
+        with self.db.engine.begin() as connection:
+            connection.execute(text('DROP TABLE media_fts'))
+        
+        self.db.library.init_search_index()
+        
+        self.assertEqual(self._search_paths('deep'), (1, ['books/deep/ch3.mp3']))
+    
+    def test_search_without_fts(self):
+        """Test the substring fallback when FTS5 is not available."""
+        self.db.refresh_library(self.mp3_dir)
+        self.db.library.search_available = False
+        
+        self.assertEqual(self._search_paths('BOOKS ch'), (3, ['books/ch1.mp3', 'books/ch2.mp3', 'books/deep/ch3.mp3']))
+    
+    def test_init_db_adds_missing_media_columns(self):
+        """Test that columns added to MediaFile later are created in old databases."""
+        with self.db.engine.begin() as connection:
+            connection.execute(text('DROP TABLE media_fts'))
+            connection.execute(text('DROP TABLE media_files'))
+            connection.execute(text('CREATE TABLE media_files (path VARCHAR(255) PRIMARY KEY, '
+                                    'folder VARCHAR(255) NOT NULL, name VARCHAR(255) NOT NULL, '
+                                    'size INTEGER NOT NULL, mtime FLOAT NOT NULL, duration FLOAT)'))
+        
+        self.db.init_db()
+        self.db.refresh_library(self.mp3_dir)
+        
+        with self.db.engine.connect() as connection:
+            columns = {row[1] for row in connection.execute(text('PRAGMA table_info(media_files)'))}
+        self.assertTrue({'title', 'artist', 'album'} <= columns)
+        self.assertEqual(self._search_paths('root'), (1, ['root.mp3']))
+    
+    def test_init_db_adds_ids_to_path_keyed_media_files(self):
+        """Test that an index keyed on path is rebuilt with ids and keeps its rows."""
+        self.db.refresh_library(self.mp3_dir)
+        self.db.metadata.shutdown()
+        with self.db.engine.begin() as connection:
+            connection.execute(text("UPDATE media_files SET title = 'Hotzenplotz' WHERE path = 'root.mp3'"))
+            drop_search_index(connection)
+            connection.execute(text('ALTER TABLE media_files RENAME TO media_files_new'))
+            connection.execute(text('DROP INDEX ix_media_files_folder'))
+            connection.execute(text(
+                'CREATE TABLE media_files (path VARCHAR(255) PRIMARY KEY, folder VARCHAR(255) NOT NULL, '
+                'name VARCHAR(255) NOT NULL, size INTEGER NOT NULL, mtime FLOAT NOT NULL, duration FLOAT, '
+                'title VARCHAR(255), artist VARCHAR(255), album VARCHAR(255), track_number INTEGER, '
+                'bitrate INTEGER, metadata_mtime FLOAT)'))
+            connection.execute(text('CREATE INDEX ix_media_files_folder ON media_files (folder)'))
+            connection.execute(text('INSERT INTO media_files SELECT path, folder, name, size, mtime, duration, '
+                                    'title, artist, album, track_number, bitrate, metadata_mtime '
+                                    'FROM media_files_new'))
+            connection.execute(text('DROP TABLE media_files_new'))
+        self.db.library.init_search_index()
+        
+        self.db.init_db()
+        
+        with self.db.engine.connect() as connection:
+            columns = {row[1] for row in connection.execute(text('PRAGMA table_info(media_files)'))}
+        self.assertIn('id', columns)
+        self.assertEqual(len(self.db.get_library_files()), 4)
+        self.assertEqual(self._search_paths('hotzenplotz'), (1, ['root.mp3']))
+        self.assertEqual(self._search_paths('deep'), (1, ['books/deep/ch3.mp3']))
+    
+    def test_search_survives_vacuum(self):
+        """Test that VACUUM does not detach search results from their files."""
+        self.db.refresh_library(self.mp3_dir)
+        # Leave gaps in the row ids, which VACUUM would close for an implicit rowid
+        os.remove(os.path.join(self.mp3_dir, 'books', 'ch1.mp3'))
+        os.remove(os.path.join(self.mp3_dir, 'root.mp3'))
+        self._touch_dir('')
+        self._touch_dir('books')
+        self.db.invalidate_library()
+        self.db.refresh_library(self.mp3_dir)
+        self.db.metadata.shutdown()
+        
+        with self.db.engine.connect() as connection:
+            connection.execute(text('VACUUM'))
+        
+        self.assertEqual(self._search_paths('ch2'), (1, ['books/ch2.mp3']))
+        self.assertEqual(self._search_paths('deep ch3'), (1, ['books/deep/ch3.mp3']))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Tests for the background media metadata extraction."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.database import Database
+from src.database.models import MediaFile
+from tests.test_utils_mp3_metadata import FRAME, id3v2
+
+
+class TestMetadataManager(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a test database and a small MP3 tree."""
+        self.test_db_fd, self.test_db_path = tempfile.mkstemp(suffix='.db')
+        self.mp3_dir = tempfile.mkdtemp()
+
+        self.config_patcher = patch('src.database.manager.config')
+        self.mock_config = self.config_patcher.start()
+        self.mock_config.DATABASE_FILE = self.test_db_path
+        self.mock_config.DEFAULT_VOLUME = 0.5
+
+        Database._instance = None
+        self.db = Database()
+        self.db.init_db()
+
+        self._write('tagged.mp3', id3v2([(b'TIT2', b'\x00Titel'), (b'TPE1', b'\x00Band'),
+                                         (b'TRCK', b'\x004')]) + FRAME * 100)
+        self._write('books/plain.mp3', FRAME * 200)
+
+    def tearDown(self):
+        """Clean up test database and files."""
+        self.db.metadata.shutdown()
+        self.db.flush_settings()
+        self.config_patcher.stop()
+        self.db.engine.dispose()
+        os.close(self.test_db_fd)
+        os.unlink(self.test_db_path)
+        shutil.rmtree(self.mp3_dir)
+        Database._instance = None
+
+    def _write(self, relative_path, content):
+        full_path = os.path.join(self.mp3_dir, relative_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(content)
+
+    def _refresh_and_wait(self):
+        self.db.refresh_library(self.mp3_dir)
+        self.db.metadata.shutdown()
+
+    def test_refresh_extracts_metadata_in_background(self):
+        """Test that the first refresh queues extraction for all indexed files."""
+        self._refresh_and_wait()
+
+        metadata = self.db.get_media_metadata(['tagged.mp3', 'books/plain.mp3'])
+
+        self.assertEqual(metadata['tagged.mp3']['title'], 'Titel')
+        self.assertEqual(metadata['tagged.mp3']['artist'], 'Band')
+        self.assertEqual(metadata['tagged.mp3']['track_number'], 4)
+        self.assertEqual(metadata['books/plain.mp3']['bitrate'], 128)
+        self.assertAlmostEqual(metadata['books/plain.mp3']['duration'], 200 * 417 * 8 / 128000, places=2)
+
+    def test_files_are_parsed_once(self):
+        """Test that unchanged files are not queued again."""
+        self._refresh_and_wait()
+
+        self.assertEqual(self.db.metadata.schedule(self.mp3_dir), 0)
+
+    def test_changed_file_is_parsed_again(self):
+        """Test that a file with a new size or mtime gets fresh metadata."""
+        self._refresh_and_wait()
+
+        self._write('tagged.mp3', id3v2([(b'TIT2', b'\x00Neu')]) + FRAME * 10)
+        full_path = os.path.join(self.mp3_dir, 'tagged.mp3')
+        stat = os.stat(full_path)
+        os.utime(full_path, (stat.st_atime, stat.st_mtime + 1))
+        os.utime(self.mp3_dir, (stat.st_atime, os.stat(self.mp3_dir).st_mtime + 1))
+        self._refresh_and_wait()
+
+        metadata = self.db.get_media_metadata(['tagged.mp3'])['tagged.mp3']
+        self.assertEqual(metadata['title'], 'Neu')
+        self.assertIsNone(metadata['artist'])
+
+    def test_result_for_outdated_file_is_dropped(self):
+        """Test that results are not stored if the file changed while it was parsed."""
+        self.db.library.refresh(self.mp3_dir)
+        session = self.db.get_session()
+        media_file = session.query(MediaFile).filter_by(path='tagged.mp3').one()
+        stale = (media_file.path, media_file.size, media_file.mtime - 1)
+        session.close()
+
+        self.db.metadata._extract_batch(self.mp3_dir, [stale])
+
+        self.assertIsNone(self.db.get_media_metadata(['tagged.mp3'])['tagged.mp3']['title'])
+
+    def test_unreadable_file_is_skipped(self):
+        """Test that a file deleted before extraction does not stop its batch."""
+        self.db.library.refresh(self.mp3_dir)
+        os.remove(os.path.join(self.mp3_dir, 'books/plain.mp3'))
+
+        self.db.metadata.schedule(self.mp3_dir)
+        self.db.metadata.shutdown()
+
+        self.assertEqual(self.db.get_media_metadata(['tagged.mp3'])['tagged.mp3']['title'], 'Titel')
+
+    def test_playlist_items_with_metadata(self):
+        """Test that playlist items carry the metadata of their files."""
+        self._refresh_and_wait()
+        self.db.add_tag('TAG1')
+        playlist = self.db.add_playlist('TAG1', 'Playlist')
+        self.db.add_playlist_items(playlist.id, ['tagged.mp3', 'missing.mp3'])
+
+        items = self.db.get_playlist_items_with_metadata(playlist.id)
+
+        self.assertEqual([item['mp3_file'] for item in items], ['tagged.mp3', 'missing.mp3'])
+        self.assertEqual(items[0]['title'], 'Titel')
+        self.assertIsNone(items[1]['title'])
+        self.assertIn('duration', items[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,393 @@
+"""Tests for PlaybackController class."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+import time
+from src.core.playback_controller import PlaybackController, MONITOR_WAKEUPS, TRANSITION_LAG
+
+
+class TestPlaybackController(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.pygame_patcher = patch('src.core.playback_controller.pygame')
+        self.exists_patcher = patch('src.core.playback_controller.os.path.exists', return_value=True)
+        self.mock_pygame = self.pygame_patcher.start()
+        self.exists_patcher.start()
+        
+        self.mock_audio = MagicMock()
+        self.mock_audio.is_initialized.return_value = True
+        self.mock_db = MagicMock()
+        self.mock_socketio = MagicMock()
+        
+        self.controller = PlaybackController(self.mock_audio, self.mock_db, self.mock_socketio)
+        self.controller.status_publisher = MagicMock()
+        self.items = [
+            {'id': 1, 'mp3_file': 'a.mp3', 'position': 0},
+            {'id': 2, 'mp3_file': 'b.mp3', 'position': 1},
+        ]
+    
+    def tearDown(self):
+        """Clean up patches."""
+        self.controller.stop_monitor()
+        self.pygame_patcher.stop()
+        self.exists_patcher.stop()
+    
+    def test_load_playlist_uses_given_items(self):
+        """Test that pre-resolved items skip the database."""
+        self.assertTrue(self.controller.load_playlist(5, self.items))
+        
+        self.mock_db.get_playlist_items.assert_not_called()
+        self.assertEqual(self.controller.current_playlist, 5)
+        self.assertEqual(len(self.controller.current_playlist_items), 2)
+    
+    def test_load_playlist_fetches_items(self):
+        """Test that items are fetched when not given."""
+        self.mock_db.get_playlist_items.return_value = self.items
+        
+        self.assertTrue(self.controller.load_playlist(5))
+        
+        self.mock_db.get_playlist_items.assert_called_once_with(5)
+    
+    def test_play_mp3_records_start_time(self):
+        """Test that playing a file records when play() was called."""
+        self.controller.check_interval = 10
+        
+        self.assertTrue(self.controller.play_mp3('a.mp3'))
+        
+        self.mock_pygame.mixer.music.play.assert_called_once()
+        self.assertIsNotNone(self.controller.last_play_started_at)
+        self.assertTrue(self.controller.is_playing)
+    
+    def test_monitor_thread_reused_across_tracks(self):
+        """Test that one monitor thread serves consecutive tracks."""
+        self.controller.check_interval = 10
+        
+        self.controller.play_mp3('a.mp3')
+        first_thread = self.controller.monitor_thread
+        self.controller.play_mp3('b.mp3')
+        
+        self.assertIs(self.controller.monitor_thread, first_thread)
+        self.assertTrue(first_thread.is_alive())
+    
+    def test_check_playback_still_busy(self):
+        """Test that a busy mixer keeps the current track."""
+        self.controller.load_playlist(5, self.items)
+        self.controller.is_playing = True
+        self.mock_pygame.mixer.music.get_busy.return_value = True
+        
+        self.controller._check_playback()
+        
+        self.assertEqual(self.controller.current_playlist_index, 0)
+        self.controller.status_publisher.publish.assert_not_called()
+    
+    def test_check_playback_advances_and_records_lag(self):
+        """Test that a finished track advances and records the transition lag."""
+        self.controller.check_interval = 10
+        self.controller.load_playlist(5, self.items)
+        self.controller.is_playing = True
+        self.controller.last_busy_at = time.monotonic()
+        self.mock_pygame.mixer.music.get_busy.return_value = False
+        count_before = TRANSITION_LAG.count
+        
+        self.controller._check_playback()
+        
+        self.assertEqual(self.controller.current_playlist_index, 1)
+        self.assertEqual(self.controller.current_track_filename, 'b.mp3')
+        self.assertEqual(TRANSITION_LAG.count, count_before + 1)
+        self.controller.status_publisher.publish.assert_called_once()
+    
+    def test_check_playback_ignores_paused(self):
+        """Test that a paused track is not treated as finished."""
+        self.controller.load_playlist(5, self.items)
+        self.controller.is_playing = True
+        self.controller.is_paused = True
+        self.mock_pygame.mixer.music.get_busy.return_value = False
+        
+        self.controller._check_playback()
+        
+        self.assertEqual(self.controller.current_playlist_index, 0)
+    
+    def test_check_playback_tag_removal(self):
+        """Test that a stop caused by tag removal clears state."""
+        self.controller.load_playlist(5, self.items)
+        self.controller.is_playing = True
+        self.controller.stop_requested_by_tag_removal = True
+        self.mock_pygame.mixer.music.get_busy.return_value = False
+        
+        self.controller._check_playback()
+        
+        self.assertIsNone(self.controller.current_playlist)
+        self.assertFalse(self.controller.stop_requested_by_tag_removal)
+        self.controller.status_publisher.publish.assert_not_called()
+    
+    def test_monitor_idle_when_stopped(self):
+        """Test that the monitor does not wake up while nothing plays."""
+        self.controller.check_interval = 0.001
+        self.mock_pygame.mixer.music.get_busy.return_value = True
+        self.controller.play_mp3('a.mp3')
+        time.sleep(0.02)
+        self.controller.stop_mp3()
+        time.sleep(0.02)
+        
+        wakeups = MONITOR_WAKEUPS.value
+        time.sleep(0.05)
+        
+        self.assertEqual(MONITOR_WAKEUPS.value, wakeups)
+        self.assertTrue(self.controller.monitor_thread.is_alive())
+    
+    def test_stop_monitor(self):
+        """Test stopping the monitor thread."""
+        self.controller.check_interval = 10
+        self.controller.play_mp3('a.mp3')
+        self.controller.stop_mp3()
+        thread = self.controller.monitor_thread
+        
+        self.controller.stop_monitor()
+        
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(self.controller.monitor_thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+
+class TestGaplessPlayback(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a controller with a three-item playlist and a mocked mixer."""
+        self.pygame_patcher = patch('src.core.playback_controller.pygame')
+        self.exists_patcher = patch('src.core.playback_controller.os.path.exists', return_value=True)
+        self.mock_pygame = self.pygame_patcher.start()
+        self.exists_patcher.start()
+        self.music = self.mock_pygame.mixer.music
+        self.music.get_busy.return_value = True
+        self.music.get_pos.return_value = 0
+        
+        self.mock_audio = MagicMock()
+        self.mock_audio.is_initialized.return_value = True
+        self.mock_socketio = MagicMock()
+        
+        self.controller = PlaybackController(self.mock_audio, MagicMock(), self.mock_socketio)
+        self.controller.status_publisher = MagicMock()
+        self.controller.gapless = True
+        self.controller.check_interval = 10
+        self.controller.load_playlist(5, [
+            {'id': 1, 'mp3_file': 'a.mp3', 'position': 0},
+            {'id': 2, 'mp3_file': 'b.mp3', 'position': 1},
+            {'id': 3, 'mp3_file': 'c.mp3', 'position': 2},
+        ])
+    
+    def tearDown(self):
+        """Clean up patches."""
+        self.controller.stop_monitor()
+        self.pygame_patcher.stop()
+        self.exists_patcher.stop()
+    
+    def test_play_queues_next_item(self):
+        """Test that starting a track queues the following item."""
+        self.controller.play_current_track()
+        
+        self.music.queue.assert_called_once_with(self.controller._full_path('b.mp3'))
+        self.assertEqual(self.controller.queued_index, 1)
+    
+    def test_last_item_queues_first(self):
+        """Test that the last item queues the start of the playlist."""
+        self.controller.current_playlist_index = 2
+        self.controller.play_current_track()
+        
+        self.assertEqual(self.controller.queued_index, 0)
+    
+    def test_gapless_disabled(self):
+        """Test that nothing is queued when gapless mode is off."""
+        self.controller.gapless = False
+        self.controller.play_current_track()
+        
+        self.music.queue.assert_not_called()
+        self.assertIsNone(self.controller.queued_index)
+    
+    def test_position_reset_adopts_queued_track(self):
+        """Test that a reset mixer position switches state to the queued track."""
+        self.controller.play_current_track()
+        self.music.get_pos.return_value = 5000
+        self.controller._check_playback()
+        self.music.queue.reset_mock()
+        
+        self.music.get_pos.return_value = 20
+        self.controller._check_playback()
+        
+        self.assertEqual(self.controller.current_playlist_index, 1)
+        self.assertEqual(self.controller.current_track_filename, 'b.mp3')
+        self.assertEqual(self.controller.queued_index, 2)
+        self.music.queue.assert_called_once()
+        self.music.load.assert_called_once()  # only the initial load
+        self.controller.status_publisher.publish.assert_called_once()
+    
+    def test_position_advancing_keeps_track(self):
+        """Test that a growing mixer position keeps the current track."""
+        self.controller.play_current_track()
+        self.music.get_pos.return_value = 100
+        self.controller._check_playback()
+        self.music.get_pos.return_value = 200
+        self.controller._check_playback()
+        
+        self.assertEqual(self.controller.current_playlist_index, 0)
+        self.controller.status_publisher.publish.assert_not_called()
+    
+    def test_update_playlist_items_keeps_current_track(self):
+        """Test that an edited playlist keeps the current track and requeues its successor."""
+        self.controller.play_current_track()
+        self.music.queue.reset_mock()
+        
+        self.controller.update_playlist_items([
+            {'id': 3, 'mp3_file': 'c.mp3', 'position': 0},
+            {'id': 1, 'mp3_file': 'a.mp3', 'position': 1},
+            {'id': 2, 'mp3_file': 'b.mp3', 'position': 2},
+        ])
+        
+        self.assertEqual(self.controller.current_playlist_index, 1)
+        self.assertEqual(self.controller.queued_index, 2)
+        self.music.queue.assert_called_once_with(self.controller._full_path('b.mp3'))
+    
+    def test_update_playlist_items_current_removed(self):
+        """Test that removing the current item keeps the index within the playlist."""
+        self.controller.current_playlist_index = 2
+        self.controller.play_current_track()
+        
+        self.controller.update_playlist_items([{'id': 1, 'mp3_file': 'a.mp3', 'position': 0}])
+        
+        self.assertEqual(self.controller.current_playlist_index, 0)
+    
+    def test_stop_clears_queue(self):
+        """Test that stopping forgets the queued track."""
+        self.controller.play_current_track()
+        self.controller.stop_mp3()
+        
+        self.assertIsNone(self.controller.queued_index)
+
+
+class TestResumePosition(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a controller with a mocked mixer and resume store."""
+        self.pygame_patcher = patch('src.core.playback_controller.pygame')
+        self.exists_patcher = patch('src.core.playback_controller.os.path.exists', return_value=True)
+        self.mock_pygame = self.pygame_patcher.start()
+        self.exists_patcher.start()
+        self.music = self.mock_pygame.mixer.music
+        self.music.get_busy.return_value = True
+        self.music.get_pos.return_value = 0
+        
+        self.mock_audio = MagicMock()
+        self.mock_audio.is_initialized.return_value = True
+        self.mock_db = MagicMock()
+        self.mock_db.get_resume_position.return_value = None
+        
+        self.controller = PlaybackController(self.mock_audio, self.mock_db, None)
+        self.controller.status_publisher = MagicMock()
+        self.controller.gapless = False
+        self.controller.check_interval = 10
+        self.items = [
+            {'id': 1, 'mp3_file': 'book/ch1.mp3', 'position': 0},
+            {'id': 2, 'mp3_file': 'book/ch2.mp3', 'position': 1},
+            {'id': 3, 'mp3_file': 'book/ch3.mp3', 'position': 2},
+        ]
+    
+    def tearDown(self):
+        """Clean up patches."""
+        self.controller.stop_monitor()
+        self.pygame_patcher.stop()
+        self.exists_patcher.stop()
+    
+    def _saved(self, playlist_id=5, index=1, mp3_file='book/ch2.mp3', offset=754.2):
+        self.mock_db.get_resume_position.return_value = {
+            'playlist_id': playlist_id, 'playlist_index': index,
+            'mp3_file': mp3_file, 'offset_seconds': offset
+        }
+    
+    def test_restores_track_and_offset(self):
+        """Test that a tag's playlist continues at the saved track and offset."""
+        self._saved()
+        
+        self.controller.load_playlist(5, self.items, tag_id='TAG1')
+        self.controller.play_current_track()
+        
+        self.mock_db.get_resume_position.assert_called_once_with('TAG1')
+        self.assertEqual(self.controller.current_playlist_index, 1)
+        self.music.play.assert_called_once_with(start=754.2)
+    
+    def test_offset_applies_to_first_track_only(self):
+        """Test that the next track starts from the beginning again."""
+        self._saved()
+        self.controller.load_playlist(5, self.items, tag_id='TAG1')
+        self.controller.play_current_track()
+        
+        self.controller.play_next()
+        
+        self.assertEqual(self.music.play.call_args_list[-1].kwargs, {'start': 0.0})
+    
+    def test_follows_moved_track(self):
+        """Test that the saved track is found after the playlist was reordered."""
+        self._saved(index=0)
+        
+        self.controller.load_playlist(5, self.items, tag_id='TAG1')
+        
+        self.assertEqual(self.controller.current_playlist_index, 1)
+        self.assertEqual(self.controller.pending_start, 754.2)
+    
+    def test_ignores_outdated_position(self):
+        """Test that positions of another playlist or of removed tracks are not used."""
+        for saved in ({'playlist_id': 6}, {'mp3_file': 'book/gone.mp3'}):
+            self._saved(**saved)
+            self.controller.load_playlist(5, self.items, tag_id='TAG1')
+            
+            self.assertEqual(self.controller.current_playlist_index, 0)
+            self.assertEqual(self.controller.pending_start, 0.0)
+    
+    def test_no_restore_without_tag(self):
+        """Test that playlists loaded without a tag start at the beginning."""
+        self._saved()
+        
+        self.controller.load_playlist(5, self.items)
+        
+        self.mock_db.get_resume_position.assert_not_called()
+        self.assertEqual(self.controller.current_playlist_index, 0)
+    
+    def test_save_adds_start_offset_to_mixer_position(self):
+        """Test that the checkpoint is the start offset plus the mixer position."""
+        self._saved(offset=100.0)
+        self.controller.load_playlist(5, self.items, tag_id='TAG1')
+        self.controller.play_current_track()
+        self.music.get_pos.return_value = 30500
+        
+        self.assertTrue(self.controller.save_resume_position())
+        
+        self.mock_db.set_resume_position.assert_called_once_with('TAG1', 5, 1, 'book/ch2.mp3', 130.5)
+    
+    def test_checkpoint_interval(self):
+        """Test that the monitor checkpoints every checkpoint_interval seconds, not per poll."""
+        self.controller.load_playlist(5, self.items, tag_id='TAG1')
+        self.controller.play_current_track()
+        self.controller.checkpoint_interval = 15
+        
+        with patch('src.core.playback_controller.time.monotonic') as mock_monotonic:
+            mock_monotonic.return_value = self.controller.last_checkpoint_at + 5
+            for _ in range(10):
+                self.controller._check_playback()
+            self.mock_db.set_resume_position.assert_not_called()
+            
+            mock_monotonic.return_value += 11
+            self.controller._check_playback()
+            self.controller._check_playback()
+        
+        self.mock_db.set_resume_position.assert_called_once()
+    
+    def test_clear_state_forgets_tag(self):
+        """Test that nothing is checkpointed after the state was cleared."""
+        self.controller.load_playlist(5, self.items, tag_id='TAG1')
+        self.controller.play_current_track()
+        self.controller.clear_state()
+        
+        self.assertFalse(self.controller.save_resume_position())
+        self.mock_db.set_resume_position.assert_not_called()
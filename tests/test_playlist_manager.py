@@ -2,7 +2,7 @@
 
 import unittest
 from unittest.mock import MagicMock, Mock, patch
-from src.database.playlist_manager import PlaylistManager
+from src.database.playlist_manager import PlaylistManager, POSITION_STEP
 from src.database.models import Tag, Playlist, PlaylistItem
 
 
@@ -82,21 +82,32 @@ class TestPlaylistManager(unittest.TestCase):
         mock_item.id = 1
         mock_item.playlist_id = 1
         mock_item.mp3_file = "test.mp3"
-        mock_item.position = 0
         
         self.mock_session.query().filter_by().first.return_value = mock_playlist
-        self.mock_session.query().filter_by().count.return_value = 0
+        self.mock_session.query().filter().one.return_value = (0, None)
         
-        with patch('src.database.playlist_manager.PlaylistItem', return_value=mock_item):
+        with patch('src.database.playlist_manager.PlaylistItem', return_value=mock_item) as MockItem:
             result = self.playlist_manager.add_playlist_item(1, "test.mp3")
         
         self.assertIsNotNone(result)
         self.assertEqual(result['mp3_file'], "test.mp3")
         self.assertEqual(result['position'], 0)
+        self.assertEqual(MockItem.call_args.kwargs['position'], 0)
         self.mock_session.add.assert_called_once()
         self.mock_session.commit.assert_called_once()
         self.mock_session.close.assert_called_once()
     
+    def test_add_playlist_item_appends_after_last_key(self):
+        """Test that a new item gets a sort key one step after the last item."""
+        self.mock_session.query().filter_by().first.return_value = MagicMock(spec=Playlist)
+        self.mock_session.query().filter().one.return_value = (3, 5000)
+        
+        with patch('src.database.playlist_manager.PlaylistItem') as MockItem:
+            result = self.playlist_manager.add_playlist_item(1, "test.mp3")
+        
+        self.assertEqual(result['position'], 3)
+        self.assertEqual(MockItem.call_args.kwargs['position'], 5000 + POSITION_STEP)
+    
     def test_add_playlist_item_invalid_playlist(self):
         """Test adding an item to a non-existent playlist."""
         self.mock_session.query().filter_by().first.return_value = None
@@ -131,25 +142,19 @@ class TestPlaylistManager(unittest.TestCase):
         self.mock_session.close.assert_called_once()
     
     def test_delete_playlist_item(self):
-        """Test deleting a playlist item."""
+        """Test deleting a playlist item touches only that row."""
         mock_item = MagicMock(spec=PlaylistItem)
         mock_item.playlist_id = 1
         mock_item.position = 1
         
-        remaining_item = MagicMock(spec=PlaylistItem)
-        remaining_item.id = 2
-        remaining_item.position = 2
-        remaining_item.mp3_file = "remaining.mp3"
-        
         self.mock_session.query().filter_by().first.return_value = mock_item
-        self.mock_session.query().filter_by().order_by().all.return_value = [remaining_item]
         
         result = self.playlist_manager.delete_playlist_item(1)
         
         self.assertTrue(result)
         self.mock_session.delete.assert_called_once_with(mock_item)
-        self.mock_session.commit.assert_called()
-        self.assertEqual(remaining_item.position, 0)  # Should be resequenced
+        self.mock_session.commit.assert_called_once()
+        self.mock_session.execute.assert_not_called()
         self.mock_session.close.assert_called_once()
     
     def test_delete_playlist_item_not_found(self):
@@ -169,11 +174,13 @@ class TestPlaylistManager(unittest.TestCase):
         mock_item.position = 0
         
         self.mock_session.query().filter_by().first.return_value = mock_item
+        self.mock_session.query().filter_by().order_by().all.return_value = [(1, 0), (2, 1024), (3, 2048), (4, 3072)]
         
         result = self.playlist_manager.update_playlist_item_position(1, 2)
         
         self.assertTrue(result)
-        self.assertEqual(mock_item.position, 2)
+        self.assertEqual(mock_item.position, 2560)  # Between items 3 and 4
+        self.mock_session.execute.assert_not_called()
         self.mock_session.commit.assert_called_once()
         self.mock_session.close.assert_called_once()
     
@@ -181,23 +188,42 @@ class TestPlaylistManager(unittest.TestCase):
         """Test moving an item up in the playlist."""
         mock_item = MagicMock(spec=PlaylistItem)
         mock_item.playlist_id = 1
-        mock_item.position = 3
+        mock_item.position = 3072
         
         self.mock_session.query().filter_by().first.return_value = mock_item
+        self.mock_session.query().filter_by().order_by().all.return_value = [(2, 0), (3, 1024), (4, 2048), (1, 3072)]
         
-        result = self.playlist_manager.update_playlist_item_position(1, 1)
+        result = self.playlist_manager.update_playlist_item_position(1, 0)
         
         self.assertTrue(result)
-        self.assertEqual(mock_item.position, 1)
+        self.assertEqual(mock_item.position, -POSITION_STEP)  # Before the first item
         self.mock_session.commit.assert_called_once()
         self.mock_session.close.assert_called_once()
     
+    def test_update_playlist_item_position_renumbers_without_gap(self):
+        """Test that the playlist is renumbered once neighbouring keys leave no room."""
+        mock_item = MagicMock(spec=PlaylistItem)
+        mock_item.playlist_id = 1
+        mock_item.position = 2
+        
+        self.mock_session.query().filter_by().first.return_value = mock_item
+        self.mock_session.query().filter_by().order_by().all.return_value = [(2, 0), (3, 1), (1, 2)]
+        
+        result = self.playlist_manager.update_playlist_item_position(1, 1)
+        
+        self.assertTrue(result)
+        self.assertEqual(mock_item.position, 2)  # Written by the renumbering statement instead
+        self.mock_session.execute.assert_called_once()
+        self.mock_session.commit.assert_called_once()
+    
     def test_update_playlist_item_position_same(self):
         """Test updating position to the same position."""
         mock_item = MagicMock(spec=PlaylistItem)
-        mock_item.position = 2
+        mock_item.playlist_id = 1
+        mock_item.position = 2048
         
         self.mock_session.query().filter_by().first.return_value = mock_item
+        self.mock_session.query().filter_by().order_by().all.return_value = [(2, 0), (3, 1024), (1, 2048)]
         
         result = self.playlist_manager.update_playlist_item_position(1, 2)
         
@@ -209,7 +235,7 @@ class TestPlaylistManager(unittest.TestCase):
         """Test adding multiple items at once."""
         mock_playlist = MagicMock(spec=Playlist)
         self.mock_session.query().filter_by().first.return_value = mock_playlist
-        self.mock_session.query().filter_by().count.return_value = 2  # Existing items
+        self.mock_session.query().filter().one.return_value = (2, 2048)  # Existing items
         
         mp3_files = ["song1.mp3", "song2.mp3", "song3.mp3"]
         
@@ -220,16 +246,17 @@ class TestPlaylistManager(unittest.TestCase):
             mock_item.id = i + 1
             mock_item.playlist_id = 1
             mock_item.mp3_file = mp3
-            mock_item.position = 2 + i
             mock_items.append(mock_item)
         
-        with patch('src.database.playlist_manager.PlaylistItem', side_effect=mock_items):
+        with patch('src.database.playlist_manager.PlaylistItem', side_effect=mock_items) as MockItem:
             result = self.playlist_manager.add_playlist_items(1, mp3_files)
         
         self.assertEqual(len(result), 3)
         self.assertEqual(result[0]['mp3_file'], "song1.mp3")
         self.assertEqual(result[0]['position'], 2)
         self.assertEqual(result[2]['position'], 4)
+        self.assertEqual([c.kwargs['position'] for c in MockItem.call_args_list],
+                         [2048 + POSITION_STEP, 2048 + 2 * POSITION_STEP, 2048 + 3 * POSITION_STEP])
         self.assertEqual(self.mock_session.add.call_count, 3)
         self.mock_session.flush.assert_called_once()
         self.mock_session.commit.assert_called_once()
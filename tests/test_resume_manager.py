@@ -0,0 +1,161 @@
+"""Tests for ResumeManager class."""
+
+import threading
+import unittest
+from unittest.mock import Mock, patch
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.database.models import Base, ResumePosition
+from src.database.resume_manager import ResumeManager
+
+
+class TestResumeManager(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an in-memory database and a manager that only flushes when asked."""
+        self.engine = create_engine('sqlite:///:memory:')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        # Long delay so tests decide when to flush
+        self.resume_manager = ResumeManager(self.Session, flush_delay=60)
+
+    def tearDown(self):
+        """Stop the flush thread."""
+        self.resume_manager.stop()
+        self.engine.dispose()
+
+    def _stored(self):
+        session = self.Session()
+        try:
+            return {row.tag_id: (row.playlist_index, row.mp3_file, row.offset_seconds)
+                    for row in session.query(ResumePosition)}
+        finally:
+            session.close()
+
+    def test_get_position_unknown_tag(self):
+        """Test that a tag without saved position has none."""
+        self.assertIsNone(self.resume_manager.get_position('TAG1'))
+
+    def test_set_position_is_written_on_flush(self):
+        """Test that positions are kept in memory until the batched write."""
+        self.resume_manager.set_position('TAG1', 5, 2, 'book/ch3.mp3', 754.2)
+
+        self.assertEqual(self.resume_manager.get_position('TAG1')['offset_seconds'], 754.2)
+        self.assertEqual(self._stored(), {})
+
+        self.assertTrue(self.resume_manager.flush())
+        self.assertEqual(self._stored(), {'TAG1': (2, 'book/ch3.mp3', 754.2)})
+
+    def test_checkpoints_are_batched(self):
+        """Test that repeated checkpoints of several tags cost one write with the latest values."""
+        for offset in (10.0, 20.0, 30.0):
+            self.resume_manager.set_position('TAG1', 5, 0, 'a.mp3', offset)
+        self.resume_manager.set_position('TAG2', 6, 1, 'b.mp3', 5.0)
+
+        with patch.object(self.resume_manager, 'get_session', wraps=self.Session) as get_session:
+            self.resume_manager.flush()
+            self.resume_manager.flush()
+
+        get_session.assert_called_once()
+        self.assertEqual(self._stored(), {'TAG1': (0, 'a.mp3', 30.0), 'TAG2': (1, 'b.mp3', 5.0)})
+
+    def test_overwrites_stored_position(self):
+        """Test that a later checkpoint replaces the stored row."""
+        self.resume_manager.set_position('TAG1', 5, 0, 'a.mp3', 10.0)
+        self.resume_manager.flush()
+        self.resume_manager.set_position('TAG1', 5, 1, 'b.mp3', 3.0)
+        self.resume_manager.flush()
+
+        self.assertEqual(self._stored(), {'TAG1': (1, 'b.mp3', 3.0)})
+
+    def test_positions_loaded_from_database(self):
+        """Test that a new manager serves positions written by an earlier one."""
+        self.resume_manager.set_position('TAG1', 5, 2, 'c.mp3', 42.0)
+        self.resume_manager.flush()
+
+        position = ResumeManager(self.Session).get_position('TAG1')
+
+        self.assertEqual(position, {'playlist_id': 5, 'playlist_index': 2,
+                                    'mp3_file': 'c.mp3', 'offset_seconds': 42.0})
+
+    def test_flush_not_postponed(self):
+        """Test that further checkpoints do not move the deadline of a pending flush."""
+        self.resume_manager.set_position('TAG1', 5, 0, 'a.mp3', 1.0)
+        deadline = self.resume_manager._pending_flush._deadline
+        self.resume_manager.set_position('TAG1', 5, 0, 'a.mp3', 2.0)
+
+        self.assertEqual(self.resume_manager._pending_flush._deadline, deadline)
+
+    def test_checkpoints_flush_on_one_thread(self):
+        """Test that checkpoints are written automatically without a new thread per write."""
+        flushed = threading.Semaphore(0)
+        session = Mock()
+        session.query.return_value = []
+        session.commit.side_effect = flushed.release
+        self.resume_manager = ResumeManager(Mock(return_value=session), flush_delay=0.01)
+
+        threads = set()
+        for offset in (1.0, 2.0, 3.0):
+            self.resume_manager.set_position('TAG1', 5, 0, 'a.mp3', offset)
+            self.assertTrue(flushed.acquire(timeout=2))
+            threads.add(self.resume_manager._pending_flush._thread)
+
+        self.assertEqual(session.merge.call_args[0][0].offset_seconds, 3.0)
+        self.assertEqual(len(threads), 1)
+
+    def test_failed_flush_is_retried(self):
+        """Test that positions of a failed flush are written by a scheduled retry."""
+        saved = threading.Event()
+        session = Mock()
+        session.query.return_value = []
+        session.commit.side_effect = [Exception("database is locked"), None]
+        session.close.side_effect = lambda: session.commit.call_count == 2 and saved.set()
+        self.resume_manager = ResumeManager(Mock(return_value=session), flush_delay=0.01)
+
+        self.resume_manager.set_position('TAG1', 5, 0, 'a.mp3', 1.0)
+
+        self.assertTrue(saved.wait(2))
+        session.rollback.assert_called_once()
+        self.assertEqual(session.merge.call_count, 2)
+        self.assertEqual(self.resume_manager._dirty, set())
+
+    def test_move_paths_rewrites_cached_positions(self):
+        """Test that a renamed folder is followed by the cached positions inside it only."""
+        self.resume_manager.set_position('TAG1', 5, 0, 'book/ch1.mp3', 1.0)
+        self.resume_manager.set_position('TAG2', 6, 0, 'bookmarks.mp3', 2.0)
+        self.resume_manager.flush()
+        
+        self.resume_manager.move_paths('book', 'Hobbit')
+        
+        self.assertEqual(self.resume_manager.get_position('TAG1')['mp3_file'], 'Hobbit/ch1.mp3')
+        self.assertEqual(self.resume_manager.get_position('TAG2')['mp3_file'], 'bookmarks.mp3')
+        self.assertEqual(self.resume_manager._dirty, {'TAG1'})
+    
+    def test_delete_position(self):
+        """Test that a deleted position is gone from memory, the database and pending writes."""
+        self.resume_manager.set_position('TAG1', 5, 0, 'a.mp3', 1.0)
+        self.resume_manager.flush()
+        self.resume_manager.set_position('TAG1', 5, 0, 'a.mp3', 2.0)
+        
+        self.assertTrue(self.resume_manager.delete_position('TAG1'))
+        self.resume_manager.flush()
+        
+        self.assertIsNone(self.resume_manager.get_position('TAG1'))
+        self.assertEqual(self._stored(), {})
+    
+    def test_failed_flush_keeps_positions_dirty(self):
+        """Test that a failed write is retried by the next flush."""
+        self.resume_manager.set_position('TAG1', 5, 0, 'a.mp3', 1.0)
+
+        session = self.Session()
+        session.commit = Mock(side_effect=RuntimeError('database is locked'))
+        with patch.object(self.resume_manager, 'get_session', return_value=session):
+            self.assertFalse(self.resume_manager.flush())
+
+        self.assertEqual(self._stored(), {})
+        self.assertTrue(self.resume_manager.flush())
+        self.assertEqual(self._stored(), {'TAG1': (0, 'a.mp3', 1.0)})
+
+
+if __name__ == '__main__':
+    unittest.main()
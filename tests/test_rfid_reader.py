@@ -3,7 +3,7 @@ from unittest.mock import Mock, MagicMock, patch, call
 import time
 import threading
 from queue import Queue
-from src.rfid_reader import RFIDReader
+from src.rfid_reader import RFIDReader, TagEvent
 
 
 class TestRFIDReader(unittest.TestCase):
@@ -26,6 +26,7 @@ class TestRFIDReader(unittest.TestCase):
         # Set up time mock
         self.current_time = 0
         self.mock_time.time.side_effect = lambda: self.current_time
+        self.mock_time.monotonic.side_effect = lambda: self.current_time
         self.mock_time.sleep = MagicMock()  # Don't actually sleep
         
         self.reader = RFIDReader()
@@ -47,7 +48,7 @@ class TestRFIDReader(unittest.TestCase):
         self.assertIsNone(self.reader.last_tag)
         self.assertEqual(self.reader.last_tag_time, 0)
         self.assertEqual(self.reader.tag_timeout, 1.0)
-        self.assertEqual(self.reader.debounce_time, 0.5)
+        self.assertEqual(self.reader.poll_interval, 0.05)
     
     @patch('src.rfid_reader.threading.Thread')
     def test_start_reading(self, mock_thread_class):
@@ -82,9 +83,9 @@ class TestRFIDReader(unittest.TestCase):
         self.reader.read_thread = mock_thread
         self.reader.running = True
         
-        with patch('builtins.print') as mock_print:
+        with self.assertLogs('src.rfid_reader', level='WARNING') as logs:
             self.reader.stop_reading()
-            mock_print.assert_called_with("Warnung: RFID-Reader-Thread konnte nicht ordnungsgemäß beendet werden")
+        self.assertIn("RFID-Reader-Thread konnte nicht ordnungsgemäß beendet werden", logs.output[-1])
     
     def test_read_loop_new_tag(self):
         """Test reading a new tag in the read loop."""
@@ -200,16 +201,68 @@ class TestRFIDReader(unittest.TestCase):
             mock_print.assert_called_with("Error reading RFID: Read error")
             self.mock_time.sleep.assert_called_with(1)
     
-    def test_get_tag_with_tag(self):
-        """Test getting a tag from the queue."""
-        self.reader.tag_queue.put("12345")
-        tag = self.reader.get_tag()
-        self.assertEqual(tag, "12345")
+    def test_poll_once_new_tag_publishes_event(self):
+        """Test that a newly read tag is published with its read timestamp."""
+        self.current_time = 10
+        self.mock_reader.read_no_block.return_value = (12345, "test")
+        
+        self.reader._poll_once()
+        
+        self.assertEqual(self.reader.get_event(timeout=0), TagEvent("12345", 10))
+        self.assertEqual(self.reader.last_tag, "12345")
+        self.assertEqual(self.reader.last_tag_time, 10)
+    
+    def test_poll_once_same_tag_not_republished(self):
+        """Test that a tag that stays on the reader only produces one event."""
+        self.mock_reader.read_no_block.return_value = (12345, "test")
+        
+        self.current_time = 10
+        self.reader._poll_once()
+        self.current_time = 15
+        self.reader._poll_once()
+        
+        self.assertEqual(self.reader.tag_queue.qsize(), 1)
+        self.assertEqual(self.reader.last_tag_time, 15)
+    
+    def test_poll_once_removal_after_timeout(self):
+        """Test that a removal event is published once the tag timed out."""
+        self.reader.last_tag = "12345"
+        self.reader.last_tag_time = 8
+        self.current_time = 10
+        self.mock_reader.read_no_block.return_value = (None, None)
+        
+        self.reader._poll_once()
+        
+        self.assertEqual(self.reader.get_event(timeout=0), TagEvent(None, 10))
+        self.assertIsNone(self.reader.last_tag)
+    
+    def test_poll_once_missed_read_within_timeout(self):
+        """Test that a single missed read does not count as removal."""
+        self.reader.last_tag = "12345"
+        self.reader.last_tag_time = 9.5
+        self.current_time = 10
+        self.mock_reader.read_no_block.return_value = (None, None)
+        
+        self.reader._poll_once()
+        
+        self.assertTrue(self.reader.tag_queue.empty())
+        self.assertEqual(self.reader.last_tag, "12345")
+    
+    def test_get_event_with_event(self):
+        """Test getting an event from the queue."""
+        event = TagEvent("12345", 1.0)
+        self.reader.tag_queue.put(event)
+        self.assertEqual(self.reader.get_event(timeout=0), event)
     
-    def test_get_tag_empty_queue(self):
-        """Test getting tag when queue is empty."""
-        tag = self.reader.get_tag()
-        self.assertIsNone(tag)
+    def test_get_event_timeout(self):
+        """Test getting an event when the queue stays empty."""
+        self.assertIsNone(self.reader.get_event(timeout=0))
+    
+    def test_stop_reading_wakes_consumer(self):
+        """Test that stopping the reader unblocks a waiting consumer."""
+        self.reader.running = True
+        self.reader.stop_reading()
+        self.assertIsNone(self.reader.get_event(timeout=0))
     
     def test_cleanup_with_gpio_initialized(self):
         """Test cleanup when GPIO is initialized."""
@@ -238,9 +291,9 @@ class TestRFIDReader(unittest.TestCase):
         """Test exception handling in cleanup."""
         self.mock_gpio.getmode.side_effect = Exception("GPIO error")
         
-        with patch('builtins.print') as mock_print:
+        with self.assertLogs('src.rfid_reader', level='WARNING') as logs:
             self.reader.cleanup()
-            mock_print.assert_called_with("Warnung bei GPIO-Cleanup: GPIO error")
+        self.assertIn("Warnung bei GPIO-Cleanup: GPIO error", logs.output[-1])
     
     def test_multiple_tags_in_sequence(self):
         """Test reading multiple different tags in sequence."""
@@ -0,0 +1,280 @@
+"""Tests for the web server worker model."""
+
+import http.client
+import io
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+from flask import Flask, Response, request, send_file
+from src import config
+from src.server import (EventLoopBridge, LoopInput, OffloadMiddleware, ThreadSafeEmitter, WorkerModel,
+                        resolve_async_mode)
+
+try:
+    import gevent
+    from gevent.pywsgi import WSGIServer
+except ImportError:
+    gevent = None
+
+
+class FakeLoop:
+    """Stands in for the gevent loop: runs callbacks on its own thread, like the hub would."""
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='fake-loop')
+        self.callbacks = 0
+
+    def run_callback_threadsafe(self, func, *args):
+        self.callbacks += 1
+        self.executor.submit(func, *args)
+
+    def thread_ident(self):
+        return self.executor.submit(threading.get_ident).result()
+
+
+def run_now(func):
+    """Stands in for gevent.spawn."""
+    func()
+
+
+class TestResolveAsyncMode(unittest.TestCase):
+
+    def test_explicit_modes(self):
+        """Test that explicit modes are used as configured."""
+        self.assertEqual(resolve_async_mode('threading'), 'threading')
+        self.assertEqual(resolve_async_mode('gevent'), 'gevent')
+
+    def test_unknown_mode(self):
+        """Test that a typo in the mode fails at startup instead of picking a server."""
+        with self.assertRaises(ValueError):
+            resolve_async_mode('eventlet')
+
+    def test_auto_falls_back_without_gevent(self):
+        """Test that 'auto' uses the development server when gevent is missing."""
+        with patch.dict('sys.modules', {'gevent': None}):
+            self.assertEqual(resolve_async_mode('auto'), 'threading')
+
+    def test_default_from_config(self):
+        """Test that the configured mode is used by default."""
+        with patch.object(config, 'ASYNC_MODE', 'threading'):
+            self.assertEqual(resolve_async_mode(), 'threading')
+
+
+class TestEventLoopBridge(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = FakeLoop()
+        self.bridge = EventLoopBridge(self.loop, run_now)
+
+    def tearDown(self):
+        self.loop.executor.shutdown()
+
+    def test_call_runs_on_loop(self):
+        """Test that call() runs the function on the loop's thread and returns its result."""
+        self.assertEqual(self.bridge.call(threading.get_ident), self.loop.thread_ident())
+
+    def test_call_raises_errors(self):
+        """Test that errors on the loop are raised in the calling thread."""
+        with self.assertRaises(OSError):
+            self.bridge.call(Mock(side_effect=OSError('connection reset')))
+
+    def test_emitter_hands_emits_to_loop(self):
+        """Test that player threads emit through the loop with all arguments."""
+        socketio = Mock()
+        emitted_on = []
+        socketio.emit.side_effect = lambda *args, **kwargs: emitted_on.append(threading.get_ident())
+        emitter = ThreadSafeEmitter(socketio, self.bridge)
+
+        emitter.emit('player_status', {'version': 1}, to='sid1')
+        self.loop.executor.shutdown(wait=True)
+
+        socketio.emit.assert_called_once_with('player_status', {'version': 1}, to='sid1')
+        self.assertNotEqual(emitted_on[0], threading.get_ident())
+
+    def test_loop_input_reads_through_loop(self):
+        """Test that the request body is read chunk by chunk on the loop."""
+        body = LoopInput(io.BytesIO(b'line1\nline2\n'), self.bridge)
+
+        self.assertEqual(body.read(3), b'lin')
+        self.assertEqual(list(body), [b'e1\n', b'line2\n'])
+        self.assertEqual(self.loop.callbacks, 4)
+
+
+class TestOffloadMiddleware(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.loop = FakeLoop()
+        self.threads = {}
+
+        @self.app.route('/where')
+        def where():
+            self.threads['view'] = threading.get_ident()
+            return 'ok'
+
+        @self.app.route('/echo', methods=['POST'])
+        def echo():
+            return {'received': request.get_json()}
+
+        def run(func, *args):
+            return self.executor.submit(func, *args).result()
+
+        self.app.wsgi_app = OffloadMiddleware(self.app.wsgi_app, run, EventLoopBridge(self.loop, run_now))
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.loop.executor.shutdown()
+
+    def test_view_runs_on_worker_thread(self):
+        """Test that views leave the thread that accepted the request."""
+        response = self.client.get('/where')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(self.threads['view'], threading.get_ident())
+
+    def test_streamed_body_is_read_on_worker_threads(self):
+        """Test that chunks of a large body and its close() leave the thread that sends them."""
+        closed_on = []
+
+        def body():
+            try:
+                for _ in range(3):
+                    self.threads.setdefault('chunks', []).append(threading.get_ident())
+                    yield b'x' * OffloadMiddleware.BUFFER_LIMIT
+            finally:
+                closed_on.append(threading.get_ident())
+
+        self.app.add_url_rule('/stream', 'stream', lambda: Response(body(), mimetype='audio/mpeg'))
+
+        response = self.client.get('/stream')
+
+        self.assertEqual(len(response.data), 3 * OffloadMiddleware.BUFFER_LIMIT)
+        self.assertEqual(len(self.threads['chunks']), 3)
+        self.assertNotIn(threading.get_ident(), self.threads['chunks'] + closed_on)
+
+    def test_small_body_is_collected_with_view(self):
+        """Test that a small response needs no extra worker calls for its body."""
+        run = Mock(side_effect=lambda func, *args: func(*args))
+        app = OffloadMiddleware(self.app.wsgi_app.wsgi_app, run)
+
+        body = app({'REQUEST_METHOD': 'GET', 'PATH_INFO': '/where', 'SERVER_NAME': 'localhost',
+                    'SERVER_PORT': '80', 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO()},
+                   Mock())
+
+        self.assertEqual(body, [b'ok'])
+        run.assert_called_once()
+
+    def test_request_body_is_passed_through(self):
+        """Test that a view on a worker thread can read the request body."""
+        response = self.client.post('/echo', json={'tag_id': 'TAG1'})
+
+        self.assertEqual(response.get_json(), {'received': {'tag_id': 'TAG1'}})
+        self.assertGreater(self.loop.callbacks, 0)
+
+
+@unittest.skipUnless(gevent, 'gevent is not installed')
+class TestGeventServer(unittest.TestCase):
+    """Run the worker model in a real gevent server."""
+
+    def setUp(self):
+        self.workers = WorkerModel('gevent', io_workers=2)
+        self.ping_served = threading.Event()
+        self.app = Flask(__name__)
+
+        class SlowFile(io.BytesIO):
+            """An MP3 on a slow SD card: reads after the first chunk wait for the ping."""
+
+            def read(inner, size=-1):
+                if inner.tell() > 0 and not self.ping_served.wait(5):
+                    raise OSError('ping was not served while the file streamed')
+                return super().read(size)
+
+        @self.app.route('/stream')
+        def stream():
+            return send_file(SlowFile(b'\xff' * 1024 * 1024), mimetype='audio/mpeg')
+
+        @self.app.route('/ping')
+        def ping():
+            return 'pong'
+
+        self.app.wsgi_app = self.workers.wrap_wsgi_app(self.app.wsgi_app)
+        self.server = WSGIServer(('127.0.0.1', 0), self.app, log=None)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+        self.workers.shutdown()
+
+    def _get(self, path, results):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_port, timeout=10)
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            results[path] = response.read()
+            if path == '/ping':
+                self.ping_served.set()
+        finally:
+            connection.close()
+
+    def test_ping_served_while_file_streams(self):
+        """Test that a blocking file read does not stall other requests."""
+        results = {}
+        clients = [threading.Thread(target=self._get, args=(path, results)) for path in ('/stream', '/ping')]
+        clients[0].start()
+        time.sleep(0.2)
+        clients[1].start()
+
+        deadline = time.monotonic() + 10
+        while any(client.is_alive() for client in clients) and time.monotonic() < deadline:
+            gevent.sleep(0.01)
+
+        self.assertEqual(results.get('/ping'), b'pong')
+        self.assertEqual(len(results.get('/stream', b'')), 1024 * 1024)
+
+
+class TestWorkerModel(unittest.TestCase):
+
+    def setUp(self):
+        self.workers = WorkerModel('threading')
+
+    def tearDown(self):
+        self.workers.shutdown()
+
+    def test_threading_mode_keeps_app_and_socketio(self):
+        """Test that the development server needs no offloading or emit hand-over."""
+        wsgi_app = Mock()
+        socketio = Mock()
+
+        self.assertIs(self.workers.wrap_wsgi_app(wsgi_app), wsgi_app)
+        self.assertIs(self.workers.player_socketio(socketio), socketio)
+        self.assertEqual(self.workers.run_options(), {'allow_unsafe_werkzeug': True})
+
+    def test_commands_run_in_order_on_one_thread(self):
+        """Test that player commands are serialized on the command thread."""
+        calls = []
+        futures = [self.workers.run_command(lambda number: calls.append((number, threading.get_ident())), n)
+                   for n in range(5)]
+        for future in futures:
+            future.result()
+
+        self.assertEqual([number for number, _ in calls], list(range(5)))
+        self.assertEqual(len({ident for _, ident in calls}), 1)
+        self.assertNotEqual(calls[0][1], threading.get_ident())
+
+    def test_failed_command_is_logged(self):
+        """Test that a failing command is logged and does not stop later commands."""
+        failing = Mock(side_effect=RuntimeError('mixer not initialized'), __name__='play_next')
+
+        with self.assertLogs('src.server', level='ERROR') as logs:
+            self.workers.run_command(failing).exception()
+            self.workers.shutdown()
+
+        self.assertIn('play_next', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 """Tests for SettingsManager class."""
 
+import threading
 import unittest
 from unittest.mock import MagicMock, Mock, patch
 from src.database.settings_manager import SettingsManager
@@ -7,127 +8,217 @@ from src.database.models import Setting
 
 
 class TestSettingsManager(unittest.TestCase):
-    
+
     def setUp(self):
         """Set up test fixtures."""
         self.mock_session = MagicMock()
+        self.stored = []
+        self.mock_session.query.return_value.__iter__.side_effect = lambda: iter(self.stored)
         self.get_session = Mock(return_value=self.mock_session)
-        self.settings_manager = SettingsManager(self.get_session)
-    
+        # Long delay so tests decide when to flush
+        self.settings_manager = SettingsManager(self.get_session, flush_delay=60)
+
+    def tearDown(self):
+        """Stop the flush thread."""
+        self.settings_manager.stop()
+
+    def _stored_setting(self, key, value):
+        setting = MagicMock(spec=Setting)
+        setting.key = key
+        setting.value = value
+        self.stored.append(setting)
+        return setting
+
     def test_get_setting_exists(self):
         """Test getting an existing setting."""
-        mock_setting = MagicMock(spec=Setting)
-        mock_setting.value = "test_value"
-        
-        self.mock_session.query().filter_by().first.return_value = mock_setting
-        
+        self._stored_setting("test_key", "test_value")
+
         result = self.settings_manager.get_setting("test_key")
-        
+
         self.assertEqual(result, "test_value")
         self.mock_session.close.assert_called_once()
-    
+
     def test_get_setting_not_exists_default(self):
         """Test getting a non-existent setting returns default."""
-        self.mock_session.query().filter_by().first.return_value = None
-        
         result = self.settings_manager.get_setting("test_key", default_value="default")
-        
+
         self.assertEqual(result, "default")
         self.mock_session.close.assert_called_once()
-    
+
     def test_get_setting_not_exists_no_default(self):
         """Test getting a non-existent setting without default."""
-        self.mock_session.query().filter_by().first.return_value = None
-        
         result = self.settings_manager.get_setting("test_key")
-        
+
         self.assertIsNone(result)
         self.mock_session.close.assert_called_once()
-    
-    def test_set_setting_new(self):
-        """Test setting a new setting value."""
-        self.mock_session.query().filter_by().first.return_value = None
-        
+
+    def test_get_setting_served_from_memory(self):
+        """Test that settings are loaded once and then read from memory."""
+        self._stored_setting("test_key", "test_value")
+
+        for _ in range(5):
+            self.settings_manager.get_setting("test_key")
+
+        self.get_session.assert_called_once()
+
+    def test_set_setting_is_write_behind(self):
+        """Test that setting a value does not write to the database immediately."""
+        result = self.settings_manager.set_setting("new_key", "new_value")
+
+        self.assertTrue(result)
+        self.assertEqual(self.settings_manager.get_setting("new_key"), "new_value")
+        self.mock_session.commit.assert_not_called()
+        self.assertTrue(self.settings_manager._pending_flush.pending)
+
+    def test_flush_new_setting(self):
+        """Test that flushing adds a new setting."""
+        self.settings_manager.set_setting("new_key", "new_value")
+        self.mock_session.query.return_value.filter.return_value = []
+
         with patch('src.database.settings_manager.Setting') as MockSetting:
             mock_new_setting = MagicMock()
             MockSetting.return_value = mock_new_setting
-            
-            result = self.settings_manager.set_setting("new_key", "new_value")
-        
+
+            result = self.settings_manager.flush()
+
         self.assertTrue(result)
         MockSetting.assert_called_once_with(key="new_key", value="new_value")
         self.mock_session.add.assert_called_once_with(mock_new_setting)
         self.mock_session.commit.assert_called_once()
-        self.mock_session.close.assert_called_once()
-    
-    def test_set_setting_update_existing(self):
-        """Test updating an existing setting."""
-        mock_setting = MagicMock(spec=Setting)
-        mock_setting.value = "old_value"
-        
-        self.mock_session.query().filter_by().first.return_value = mock_setting
-        
-        result = self.settings_manager.set_setting("test_key", "new_value")
-        
+
+    def test_flush_update_existing(self):
+        """Test that flushing updates an existing setting."""
+        mock_setting = self._stored_setting("test_key", "old_value")
+        self.settings_manager.set_setting("test_key", "new_value")
+        self.mock_session.query.return_value.filter.return_value = [mock_setting]
+
+        result = self.settings_manager.flush()
+
         self.assertTrue(result)
         self.assertEqual(mock_setting.value, "new_value")
+        self.mock_session.add.assert_not_called()
         self.mock_session.commit.assert_called_once()
-        self.mock_session.close.assert_called_once()
-    
+
+    def test_repeated_changes_flush_in_one_transaction(self):
+        """Test that many changes to one key are written once with the last value."""
+        mock_setting = self._stored_setting("global_volume", "0.5")
+        self.mock_session.query.return_value.filter.return_value = [mock_setting]
+
+        for step in range(20):
+            self.settings_manager.set_setting("global_volume", str(step / 20))
+        self.settings_manager.flush()
+
+        self.assertEqual(mock_setting.value, "0.95")
+        self.mock_session.commit.assert_called_once()
+
+    def test_flush_without_changes(self):
+        """Test that flushing without dirty keys does not open a session."""
+        self.settings_manager.get_setting("test_key")
+        self.get_session.reset_mock()
+
+        self.assertTrue(self.settings_manager.flush())
+
+        self.get_session.assert_not_called()
+
+    def test_unchanged_value_is_not_dirty(self):
+        """Test that setting the current value again schedules no write."""
+        self._stored_setting("test_key", "same")
+
+        self.settings_manager.set_setting("test_key", "same")
+
+        self.assertFalse(self.settings_manager._pending_flush.pending)
+
+    def test_flush_after_quiet_period(self):
+        """Test that dirty settings are flushed automatically after the delay."""
+        flushed = threading.Event()
+        self.mock_session.commit.side_effect = flushed.set
+        self.mock_session.query.return_value.filter.return_value = []
+        self.settings_manager = SettingsManager(self.get_session, flush_delay=0.01)
+
+        self.settings_manager.set_setting("new_key", "new_value")
+
+        self.assertTrue(flushed.wait(2))
+
+    def test_flushes_share_one_thread(self):
+        """Test that consecutive quiet periods do not start a thread each."""
+        flushed = threading.Semaphore(0)
+        self.mock_session.commit.side_effect = flushed.release
+        self.mock_session.query.return_value.filter.return_value = []
+        self.settings_manager = SettingsManager(self.get_session, flush_delay=0.01)
+
+        threads = set()
+        for value in range(3):
+            self.settings_manager.set_setting("volume", value)
+            self.assertTrue(flushed.acquire(timeout=2))
+            threads.add(self.settings_manager._pending_flush._thread)
+
+        self.assertEqual(self.mock_session.commit.call_count, 3)
+        self.assertEqual(len(threads), 1)
+
     def test_set_setting_if_not_exists_existing(self):
         """Test set_if_not_exists doesn't overwrite existing setting."""
-        mock_setting = MagicMock(spec=Setting)
-        mock_setting.value = "existing_value"
-        
-        self.mock_session.query().filter_by().first.return_value = mock_setting
-        
+        self._stored_setting("test_key", "existing_value")
+
         result = self.settings_manager.set_setting("test_key", "new_value", set_if_not_exists=True)
-        
+
         self.assertTrue(result)
-        self.assertEqual(mock_setting.value, "existing_value")  # Should not change
-        self.mock_session.commit.assert_not_called()
-        self.mock_session.close.assert_called_once()
-    
+        self.assertEqual(self.settings_manager.get_setting("test_key"), "existing_value")
+        self.assertFalse(self.settings_manager._pending_flush.pending)
+
     def test_set_setting_if_not_exists_new(self):
         """Test set_if_not_exists creates new setting if not exists."""
-        self.mock_session.query().filter_by().first.return_value = None
-        
-        with patch('src.database.settings_manager.Setting') as MockSetting:
-            mock_new_setting = MagicMock()
-            MockSetting.return_value = mock_new_setting
-            
-            result = self.settings_manager.set_setting("new_key", "new_value", set_if_not_exists=True)
-        
+        result = self.settings_manager.set_setting("new_key", "new_value", set_if_not_exists=True)
+
         self.assertTrue(result)
-        MockSetting.assert_called_once_with(key="new_key", value="new_value")
-        self.mock_session.add.assert_called_once_with(mock_new_setting)
-        self.mock_session.commit.assert_called_once()
-        self.mock_session.close.assert_called_once()
-    
+        self.assertEqual(self.settings_manager.get_setting("new_key"), "new_value")
+
     def test_set_setting_converts_to_string(self):
         """Test that setting values are converted to strings."""
-        self.mock_session.query().filter_by().first.return_value = None
-        
-        with patch('src.database.settings_manager.Setting') as MockSetting:
-            mock_new_setting = MagicMock()
-            MockSetting.return_value = mock_new_setting
-            
-            result = self.settings_manager.set_setting("number_key", 42)
-        
+        result = self.settings_manager.set_setting("number_key", 42)
+
         self.assertTrue(result)
-        MockSetting.assert_called_once_with(key="number_key", value="42")
-        self.mock_session.close.assert_called_once()
-    
+        self.assertEqual(self.settings_manager.get_setting("number_key"), "42")
+
     def test_set_setting_exception(self):
-        """Test set_setting handles exceptions."""
-        self.mock_session.query().filter_by().first.side_effect = Exception("DB Error")
-        
+        """Test set_setting handles exceptions while loading."""
+        self.mock_session.query.side_effect = Exception("DB Error")
+
         result = self.settings_manager.set_setting("test_key", "test_value")
-        
+
         self.assertFalse(result)
-        self.mock_session.rollback.assert_called_once()
         self.mock_session.close.assert_called_once()
 
+    def test_flush_failure_keeps_keys_dirty(self):
+        """Test that a failed flush rolls back and retries the keys later."""
+        self.settings_manager.set_setting("test_key", "test_value")
+        self.mock_session.commit.side_effect = Exception("DB Error")
+
+        result = self.settings_manager.flush()
+
+        self.assertFalse(result)
+        self.mock_session.rollback.assert_called_once()
+        self.assertEqual(self.settings_manager._dirty, {"test_key"})
+
+    def test_failed_flush_is_retried(self):
+        """Test that a failed flush schedules a retry that saves the value."""
+        saved = threading.Event()
+        commits = [Exception("database is locked"), None]
+
+        def commit():
+            error = commits.pop(0)
+            if error:
+                raise error
+            saved.set()
+        self.mock_session.commit.side_effect = commit
+        self.mock_session.query.return_value.filter.return_value = []
+        self.settings_manager = SettingsManager(self.get_session, flush_delay=0.01)
+        self.settings_manager.set_setting("volume", "0.7")
+
+        self.assertTrue(saved.wait(2))
+        self.mock_session.rollback.assert_called_once()
+        self.assertEqual(self.mock_session.add.call_args[0][0].value, "0.7")
+        self.assertEqual(self.settings_manager._dirty, set())
+
 
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
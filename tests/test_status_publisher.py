@@ -0,0 +1,128 @@
+"""Tests for the coalescing player status publisher."""
+
+import threading
+import unittest
+from unittest.mock import MagicMock
+from src.core.status_publisher import StatusPublisher
+from src.utils import metrics
+
+
+class TestStatusPublisher(unittest.TestCase):
+    """Test diffing, versioning and coalescing of status broadcasts."""
+
+    def setUp(self):
+        """Set up a publisher over a mutable status dict."""
+        self.mock_socketio = MagicMock()
+        self.status = {'is_playing': False, 'volume': 0.5, 'current_track': None}
+        self.publisher = StatusPublisher(self.mock_socketio, lambda: dict(self.status), interval=10)
+
+    def tearDown(self):
+        """Cancel pending broadcasts."""
+        self.publisher.cancel()
+
+    def _last_message(self):
+        return self.mock_socketio.emit.call_args[0][1]
+
+    def test_first_flush_sends_all_fields(self):
+        """Test that the first broadcast carries the complete status."""
+        self.assertTrue(self.publisher.flush())
+
+        message = self._last_message()
+        self.assertEqual(message['version'], 1)
+        self.assertFalse(message['full'])
+        self.assertEqual(message['changes'], self.status)
+
+    def test_flush_sends_only_changed_fields(self):
+        """Test that later broadcasts only carry changed fields."""
+        self.publisher.flush()
+        self.status['volume'] = 0.8
+
+        self.publisher.flush()
+
+        message = self._last_message()
+        self.assertEqual(message['version'], 2)
+        self.assertEqual(message['changes'], {'volume': 0.8})
+
+    def test_flush_without_changes_emits_nothing(self):
+        """Test that an unchanged status is not broadcast again."""
+        self.publisher.flush()
+        self.mock_socketio.emit.reset_mock()
+
+        self.assertFalse(self.publisher.flush())
+
+        self.mock_socketio.emit.assert_not_called()
+        self.assertEqual(self.publisher.version, 1)
+
+    def test_removed_fields_are_reported(self):
+        """Test that fields missing from the new status are listed as removed."""
+        self.publisher.flush()
+        del self.status['current_track']
+
+        self.publisher.flush()
+
+        self.assertEqual(self._last_message()['removed'], ['current_track'])
+
+    def test_counters_are_exported_with_total_suffix(self):
+        """Test that publish requests and broadcasts are counted under Prometheus counter names."""
+        requests = metrics.get_counter('player_status_publish_requests_total')
+        emits = metrics.get_counter('player_status_emits_total')
+        requests_before, emits_before = requests.value, emits.value
+
+        self.publisher.publish()
+        self.publisher.flush()
+
+        self.assertEqual(requests.value, requests_before + 1)
+        self.assertEqual(emits.value, emits_before + 1)
+        self.assertIn('player_status_emits_total ', metrics.render_prometheus())
+
+    def test_publish_coalesces_into_one_broadcast(self):
+        """Test that many publish calls within the window cause one broadcast."""
+        flushed = threading.Event()
+        self.mock_socketio.emit.side_effect = lambda *args, **kwargs: flushed.set()
+        publisher = StatusPublisher(self.mock_socketio, lambda: dict(self.status), interval=0.05)
+        self.addCleanup(publisher.cancel)
+
+        for step in range(50):
+            self.status['volume'] = step / 100
+            publisher.publish()
+
+        self.assertTrue(flushed.wait(2))
+        self.assertEqual(self.mock_socketio.emit.call_count, 1)
+        self.assertEqual(self._last_message()['changes']['volume'], 0.49)
+
+    def test_snapshot_includes_pending_changes(self):
+        """Test that a snapshot first publishes pending changes and matches their version."""
+        self.publisher.flush()
+        self.status['is_playing'] = True
+        self.publisher.publish()
+
+        message = self.publisher.send_snapshot(to='sid-1')
+
+        self.assertTrue(message['full'])
+        self.assertEqual(message['version'], 2)
+        self.assertTrue(message['status']['is_playing'])
+        self.mock_socketio.emit.assert_called_with('player_status', message, to='sid-1')
+        self.assertFalse(self.publisher._pending.pending)
+
+    def test_windows_share_one_thread(self):
+        """Test that consecutive coalescing windows do not start a thread each."""
+        flushed = threading.Semaphore(0)
+        self.mock_socketio.emit.side_effect = lambda *args, **kwargs: flushed.release()
+        publisher = StatusPublisher(self.mock_socketio, lambda: dict(self.status), interval=0.01)
+        self.addCleanup(publisher.cancel)
+
+        publisher.publish()
+        self.assertTrue(flushed.acquire(timeout=2))
+        thread = publisher._pending._thread
+        for step in range(3):
+            self.status['volume'] = step / 10
+            publisher.publish()
+            self.assertTrue(flushed.acquire(timeout=2))
+
+        self.assertEqual(self.mock_socketio.emit.call_count, 4)
+        self.assertIs(publisher._pending._thread, thread)
+        self.assertTrue(thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""Tests for the tag resolution cache."""
+
+import unittest
+from unittest.mock import patch
+import os
+import tempfile
+from src.database.manager import Database
+
+
+class TestTagCache(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a test database with one tag and a two-item playlist."""
+        self.test_db_fd, self.test_db_path = tempfile.mkstemp(suffix='.db')
+        
+        self.config_patcher = patch('src.database.manager.config')
+        self.mock_config = self.config_patcher.start()
+        self.mock_config.DATABASE_FILE = self.test_db_path
+        self.mock_config.DEFAULT_VOLUME = 0.5
+        
+        Database._instance = None
+        self.db = Database()
+        self.db.init_db()
+        
+        self.db.add_tag("TAG1", "Tag One")
+        self.playlist = self.db.add_playlist("TAG1", "Playlist One")
+        self.db.add_playlist_items(self.playlist.id, ["a.mp3", "b.mp3"])
+    
+    def tearDown(self):
+        """Clean up test database."""
+        self.db.flush_settings()
+        self.config_patcher.stop()
+        self.db.engine.dispose()
+        os.close(self.test_db_fd)
+        os.unlink(self.test_db_path)
+        Database._instance = None
+    
+    def test_resolve_known_tag(self):
+        """Test resolving a tag returns tag, playlist and ordered items."""
+        entry = self.db.resolve_tag("TAG1")
+        
+        self.assertEqual(entry['tag']['name'], "Tag One")
+        self.assertEqual(entry['playlist']['id'], self.playlist.id)
+        self.assertEqual([i['mp3_file'] for i in entry['items']], ["a.mp3", "b.mp3"])
+    
+    def test_resolve_unknown_tag(self):
+        """Test resolving an unknown tag returns None."""
+        self.assertIsNone(self.db.resolve_tag("UNKNOWN"))
+    
+    def test_resolve_hit_does_not_open_session(self):
+        """Test that a cached tag is served without touching the database."""
+        self.db.resolve_tag("TAG1")
+        
+        with patch.object(self.db.tag_cache, 'get_session') as mock_get_session:
+            entry = self.db.resolve_tag("TAG1")
+        
+        mock_get_session.assert_not_called()
+        self.assertEqual(entry['tag']['tag_id'], "TAG1")
+    
+    def test_update_tag_invalidates(self):
+        """Test that renaming a tag drops its cache entry."""
+        self.db.resolve_tag("TAG1")
+        self.db.update_tag("TAG1", "Renamed")
+        
+        self.assertEqual(self.db.resolve_tag("TAG1")['tag']['name'], "Renamed")
+    
+    def test_add_item_invalidates(self):
+        """Test that adding an item drops the entry of the owning tag."""
+        self.db.resolve_tag("TAG1")
+        self.db.add_playlist_item(self.playlist.id, "c.mp3")
+        
+        items = self.db.resolve_tag("TAG1")['items']
+        self.assertEqual([i['mp3_file'] for i in items], ["a.mp3", "b.mp3", "c.mp3"])
+    
+    def test_delete_item_invalidates(self):
+        """Test that deleting an item drops the entry of the owning tag."""
+        entry = self.db.resolve_tag("TAG1")
+        self.db.delete_playlist_item(entry['items'][0]['id'])
+        
+        items = self.db.resolve_tag("TAG1")['items']
+        self.assertEqual([i['mp3_file'] for i in items], ["b.mp3"])
+    
+    def test_move_item_invalidates(self):
+        """Test that moving an item drops the entry of the owning tag."""
+        entry = self.db.resolve_tag("TAG1")
+        self.db.update_playlist_item_position(entry['items'][1]['id'], 0)
+        
+        items = self.db.resolve_tag("TAG1")['items']
+        self.assertEqual([i['mp3_file'] for i in items], ["b.mp3", "a.mp3"])
+    
+    def test_update_path_references_invalidates(self):
+        """Test that renaming a referenced file drops the entry of the owning tag."""
+        self.db.resolve_tag("TAG1")
+        self.db.update_path_references("a.mp3", "renamed.mp3")
+        
+        items = self.db.resolve_tag("TAG1")['items']
+        self.assertEqual(items[0]['mp3_file'], "renamed.mp3")
+    
+    def test_delete_tag_invalidates(self):
+        """Test that deleting a tag drops its cache entry."""
+        self.db.resolve_tag("TAG1")
+        self.db.delete_tag("TAG1")
+        
+        self.assertIsNone(self.db.resolve_tag("TAG1"))
+    
+    def test_stale_load_not_stored(self):
+        """Test that a load racing with a write is not cached."""
+        cache = self.db.tag_cache
+        original_load = cache._load
+        
+        def load_then_write(tag_id):
+            entry = original_load(tag_id)
+            cache.invalidate_playlist(self.playlist.id)
+            return entry
+        
+        with patch.object(cache, '_load', side_effect=load_then_write):
+            cache.resolve("TAG1")
+        
+        self.assertNotIn("TAG1", cache._entries)
+    
+    def test_preload_matches_resolve(self):
+        """Test that preloaded entries equal the ones a lookup would load."""
+        self.db.add_tag("TAG2", "Tag Two")
+        self.db.add_tag("TAG3", "Without Playlist")
+        playlist = self.db.add_playlist("TAG2", "Playlist Two")
+        self.db.add_playlist_items(playlist.id, ["c.mp3"])
+        expected = {tag_id: self.db.tag_cache._load(tag_id) for tag_id in ("TAG1", "TAG2", "TAG3")}
+        
+        entries = self.db.preload_tags()
+        
+        self.assertEqual(entries, expected)
+    
+    def test_preload_serves_lookups_from_memory(self):
+        """Test that tags resolve without a session after the preload."""
+        self.db.preload_tags()
+        
+        with patch.object(self.db.tag_cache, 'get_session') as get_session:
+            entry = self.db.resolve_tag("TAG1")
+        
+        get_session.assert_not_called()
+        self.assertEqual([i['mp3_file'] for i in entry['items']], ["a.mp3", "b.mp3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
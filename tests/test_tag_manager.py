@@ -134,28 +134,27 @@ class TestTagManager(unittest.TestCase):
         self.mock_session.close.assert_called_once()
     
     def test_get_all_tags(self):
-        """Test getting all tags."""
-        mock_tag1 = MagicMock(spec=Tag)
-        mock_tag1.id = 1
-        mock_tag1.tag_id = "TAG1"
-        mock_tag1.name = "Tag 1"
-        mock_tag1.playlists = []
-        
-        mock_tag2 = MagicMock(spec=Tag)
-        mock_tag2.id = 2
-        mock_tag2.tag_id = "TAG2"
-        mock_tag2.name = "Tag 2"
-        mock_tag2.playlists = []
-        
-        self.mock_session.query().all.return_value = [mock_tag1, mock_tag2]
+        """Test getting all tags from joined tag/playlist rows."""
+        query_chain = self.mock_session.query.return_value
+        query_chain.outerjoin.return_value = query_chain
+        query_chain.order_by.return_value = [
+            (1, "TAG1", "Tag 1", 10, "Playlist A"),
+            (1, "TAG1", "Tag 1", 11, "Playlist B"),
+            (2, "TAG2", "Tag 2", None, None),
+        ]
         
         result = self.tag_manager.get_all_tags()
         
         self.assertEqual(len(result), 2)
         self.assertEqual(result[0]['tag_id'], "TAG1")
+        self.assertEqual(result[0]['playlists'], [
+            {'id': 10, 'name': "Playlist A"},
+            {'id': 11, 'name': "Playlist B"}
+        ])
         self.assertEqual(result[1]['tag_id'], "TAG2")
+        self.assertEqual(result[1]['playlists'], [])
+        self.mock_session.query.assert_called_once()
         self.mock_session.close.assert_called_once()
 
-
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
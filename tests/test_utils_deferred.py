@@ -0,0 +1,94 @@
+"""Tests for deferred calls on a long-lived thread."""
+
+import threading
+import time
+import unittest
+from src.utils.deferred import DeferredCall
+
+
+class TestDeferredCall(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.called = threading.Semaphore(0)
+        self.deferred = DeferredCall(self._record, 0.02, 'test-deferred')
+
+    def tearDown(self):
+        self.deferred.stop()
+
+    def _record(self):
+        self.calls.append((time.monotonic(), threading.current_thread()))
+        self.called.release()
+
+    def test_call_runs_after_delay(self):
+        """Test that the function runs once after the delay, on the deferred thread."""
+        scheduled_at = time.monotonic()
+        self.assertTrue(self.deferred.schedule())
+        self.assertFalse(self.deferred.schedule())
+
+        self.assertTrue(self.called.acquire(timeout=2))
+        self.assertFalse(self.called.acquire(timeout=0.05))
+        called_at, thread = self.calls[0]
+        self.assertGreaterEqual(called_at - scheduled_at, 0.02)
+        self.assertEqual(thread.name, 'test-deferred')
+        self.assertFalse(self.deferred.pending)
+
+    def test_thread_is_reused(self):
+        """Test that later calls run on the same thread."""
+        for _ in range(3):
+            self.deferred.schedule()
+            self.assertTrue(self.called.acquire(timeout=2))
+
+        self.assertEqual(len({thread for _, thread in self.calls}), 1)
+
+    def test_postpone_moves_deadline(self):
+        """Test that postponing schedules keep the call back until they stop."""
+        self.deferred.delay = 0.1
+        self.deferred.schedule()
+        time.sleep(0.06)
+        rescheduled_at = time.monotonic()
+        self.assertFalse(self.deferred.schedule(postpone=True))
+
+        self.assertTrue(self.called.acquire(timeout=2))
+        self.assertGreaterEqual(self.calls[0][0] - rescheduled_at, 0.1)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_cancel_drops_call(self):
+        """Test that a cancelled call does not run."""
+        self.deferred.schedule()
+        self.deferred.cancel()
+
+        self.assertFalse(self.called.acquire(timeout=0.1))
+        self.assertFalse(self.deferred.pending)
+
+    def test_schedule_after_stop_starts_new_thread(self):
+        """Test that a stopped deferred call works again on a new thread."""
+        self.deferred.schedule()
+        self.assertTrue(self.called.acquire(timeout=2))
+        self.deferred.stop()
+
+        self.deferred.schedule()
+
+        self.assertTrue(self.called.acquire(timeout=2))
+        self.assertFalse(self.calls[0][1].is_alive())
+        self.assertIsNot(self.calls[0][1], self.calls[1][1])
+
+    def test_failed_call_is_logged(self):
+        """Test that an exception is logged and later calls still run."""
+        def fail():
+            self.called.release()
+            raise OSError('disk full')
+
+        self.deferred.func = fail
+        with self.assertLogs('src.utils.deferred', level='ERROR') as logs:
+            self.deferred.schedule()
+            self.assertTrue(self.called.acquire(timeout=2))
+            self.deferred.func = self._record
+            self.deferred.schedule()
+            self.assertTrue(self.called.acquire(timeout=2))
+
+        self.assertIn('disk full', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
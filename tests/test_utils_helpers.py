@@ -1,13 +1,18 @@
 import unittest
 from unittest.mock import Mock, MagicMock, patch
 import os
+import shutil
+import tempfile
 from src.utils.helpers import (
     sanitize_path,
     is_safe_path,
     get_file_extension,
     format_file_size,
     validate_mp3_file,
-    ensure_directory_exists
+    ensure_directory_exists,
+    partial_upload_path,
+    remove_partial_uploads,
+    upload_staging_dir
 )
 
 
@@ -108,6 +113,43 @@ class TestUtilsHelpers(unittest.TestCase):
         self.assertFalse(result)
 
 
+class TestPartialUploads(unittest.TestCase):
+    """Test cleanup of unfinished upload temp files."""
+
+    def setUp(self):
+        self.mp3_dir = tempfile.mkdtemp()
+        os.makedirs(upload_staging_dir(self.mp3_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.mp3_dir)
+
+    def _touch(self, path):
+        open(path, 'wb').close()
+        return path
+
+    def test_remove_partial_uploads(self):
+        """Test that temp files in the staging folder are removed and the library is not searched."""
+        self._touch(partial_upload_path(self.mp3_dir, 'abc'))
+        self._touch(partial_upload_path(self.mp3_dir, 'def'))
+        track = self._touch(os.path.join(self.mp3_dir, 'track.mp3'))
+        library_part = self._touch(os.path.join(self.mp3_dir, 'notes.part'))
+
+        with patch('src.utils.helpers.os.walk') as mock_walk:
+            removed = remove_partial_uploads(self.mp3_dir)
+
+        self.assertEqual(removed, 2)
+        self.assertEqual(os.listdir(upload_staging_dir(self.mp3_dir)), [])
+        self.assertTrue(os.path.exists(track))
+        self.assertTrue(os.path.exists(library_part))
+        mock_walk.assert_not_called()
+
+    def test_remove_partial_uploads_without_staging_folder(self):
+        """Test that a library without uploads needs no cleanup."""
+        shutil.rmtree(upload_staging_dir(self.mp3_dir))
+
+        self.assertEqual(remove_partial_uploads(self.mp3_dir), 0)
+
+
 class TestPathNormalization(unittest.TestCase):
     """Test path normalization across different OS."""
     
@@ -191,5 +233,37 @@ class TestFileOperationHelpers(unittest.TestCase):
         self.assertFalse(is_valid_filename('file*with*asterisk.mp3'))
 
 
+
+class TestBertiBoxPlaylistHelpers(unittest.TestCase):
+    
+    def tearDown(self):
+        """Reset the BertiBox instance reference."""
+        from src.utils import helpers
+        helpers.set_berti_box_instance(None)
+    
+    @patch('src.utils.helpers.update_berti_box_playlist')
+    def test_update_current_playlist(self, mock_update):
+        """Test that the playlist held by the player is reloaded."""
+        from src.utils import helpers
+        berti_box = MagicMock()
+        berti_box.playback_controller.current_playlist = 7
+        helpers.set_berti_box_instance(berti_box)
+        
+        helpers.update_berti_box_current_playlist()
+        
+        mock_update.assert_called_once_with(7)
+    
+    @patch('src.utils.helpers.update_berti_box_playlist')
+    def test_update_current_playlist_without_playlist(self, mock_update):
+        """Test that nothing is reloaded when no playlist is loaded."""
+        from src.utils import helpers
+        berti_box = MagicMock()
+        berti_box.playback_controller.current_playlist = None
+        helpers.set_berti_box_instance(berti_box)
+        
+        helpers.update_berti_box_current_playlist()
+        
+        mock_update.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""Tests for the queue-based logging setup."""
+
+import logging
+import logging.handlers
+import unittest
+from unittest.mock import patch
+from src.utils import logging_setup
+
+
+class TestLoggingSetup(unittest.TestCase):
+
+    def setUp(self):
+        """Remember the root logger state."""
+        self.root = logging.getLogger()
+        self.saved_handlers = list(self.root.handlers)
+        self.saved_level = self.root.level
+
+    def tearDown(self):
+        """Stop the listener and restore the root logger."""
+        logging_setup.shutdown_logging()
+        self.root.handlers = self.saved_handlers
+        self.root.setLevel(self.saved_level)
+
+    def test_setup_installs_queue_handler(self):
+        """Test that records go through a QueueHandler to the listener."""
+        listener = logging_setup.setup_logging('DEBUG')
+
+        queue_handlers = [h for h in self.root.handlers if isinstance(h, logging.handlers.QueueHandler)]
+        self.assertEqual(len(queue_handlers), 1)
+        self.assertIs(queue_handlers[0].queue, listener.queue)
+        self.assertEqual(self.root.level, logging.DEBUG)
+
+    def test_setup_is_idempotent(self):
+        """Test that a second call only changes the level."""
+        first = logging_setup.setup_logging('INFO')
+        handler_count = len(self.root.handlers)
+
+        second = logging_setup.setup_logging('WARNING')
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.root.handlers), handler_count)
+        self.assertEqual(self.root.level, logging.WARNING)
+
+    def test_default_level_from_config(self):
+        """Test that the level defaults to config.LOG_LEVEL."""
+        with patch('src.utils.logging_setup.config.LOG_LEVEL', 'ERROR'):
+            logging_setup.setup_logging()
+        self.assertEqual(self.root.level, logging.ERROR)
+
+    def test_records_reach_stream_handler(self):
+        """Test that a logged record is written by the listener thread."""
+        listener = logging_setup.setup_logging('INFO')
+        stream_handler = listener.handlers[0]
+
+        with patch.object(stream_handler, 'emit') as mock_emit:
+            logging.getLogger('src.test').info("hello %s", 'world')
+            logging_setup.shutdown_logging()
+
+        mock_emit.assert_called_once()
+        self.assertEqual(mock_emit.call_args[0][0].getMessage(), "hello world")
+
+
+if __name__ == '__main__':
+    unittest.main()
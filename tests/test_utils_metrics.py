@@ -0,0 +1,165 @@
+"""Tests for the metrics utilities."""
+
+import unittest
+from src.utils import metrics
+
+
+class TestHistogram(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a histogram with small buckets."""
+        self.histogram = metrics.Histogram('test', buckets=(0.1, 0.5, 1.0))
+    
+    def test_observe_places_values_in_buckets(self):
+        """Test that observations land in the correct bucket."""
+        for value in (0.05, 0.1, 0.3, 2.0):
+            self.histogram.observe(value)
+        
+        self.assertEqual(self.histogram.bucket_counts, [2, 1, 0, 1])
+        self.assertEqual(self.histogram.count, 4)
+        self.assertAlmostEqual(self.histogram.total, 2.45)
+    
+    def test_snapshot_is_cumulative(self):
+        """Test that snapshot buckets are cumulative."""
+        for value in (0.05, 0.3, 0.7):
+            self.histogram.observe(value)
+        
+        snapshot = self.histogram.snapshot()
+        
+        self.assertEqual([b['count'] for b in snapshot['buckets']], [1, 2, 3, 3])
+        self.assertEqual(snapshot['buckets'][-1]['le'], '+Inf')
+        self.assertAlmostEqual(snapshot['mean'], 0.35)
+    
+    def test_snapshot_empty(self):
+        """Test snapshot of an empty histogram."""
+        snapshot = self.histogram.snapshot()
+        self.assertEqual(snapshot['count'], 0)
+        self.assertEqual(snapshot['mean'], 0.0)
+    
+    def test_reset(self):
+        """Test resetting a histogram."""
+        self.histogram.observe(0.2)
+        self.histogram.reset()
+        self.assertEqual(self.histogram.count, 0)
+        self.assertEqual(self.histogram.bucket_counts, [0, 0, 0, 0])
+
+
+class TestRegistry(unittest.TestCase):
+    
+    def test_get_histogram_returns_same_instance(self):
+        """Test that histograms are registered by name."""
+        first = metrics.get_histogram('registry_test')
+        second = metrics.get_histogram('registry_test')
+        self.assertIs(first, second)
+        self.assertIn('registry_test', metrics.get_all_histograms())
+    
+    def test_labels_register_separate_series(self):
+        """Test that each label set gets its own series."""
+        first = metrics.get_counter('labels_test_total', labels={'endpoint': 'a'})
+        second = metrics.get_counter('labels_test_total', labels={'endpoint': 'b'})
+        
+        self.assertIsNot(first, second)
+        self.assertIs(first, metrics.get_counter('labels_test_total', labels={'endpoint': 'a'}))
+        self.assertIn('labels_test_total{endpoint="a"}', metrics.get_all_counters())
+    
+    def test_snapshot_contains_counters_and_histograms(self):
+        """Test the combined JSON snapshot."""
+        metrics.get_counter('snapshot_test_total').inc(3)
+        metrics.get_histogram('snapshot_test_seconds').observe(0.01)
+        
+        snapshot = metrics.snapshot()
+        
+        self.assertEqual(snapshot['counters']['snapshot_test_total'], 3)
+        self.assertEqual(snapshot['histograms']['snapshot_test_seconds']['count'], 1)
+
+
+class TestTimed(unittest.TestCase):
+    
+    def test_timed_records_duration(self):
+        """Test that a decorated call is observed in the histogram."""
+        @metrics.timed('timed_test', step='ok')
+        def work(value):
+            return value * 2
+        
+        histogram = metrics.get_histogram('timed_test_seconds', labels={'step': 'ok'})
+        before = histogram.count
+        
+        self.assertEqual(work(21), 42)
+        self.assertEqual(histogram.count, before + 1)
+        self.assertEqual(work.__name__, 'work')
+    
+    def test_timed_counts_errors(self):
+        """Test that exceptions are counted and re-raised."""
+        @metrics.timed('timed_error_test')
+        def fail():
+            raise ValueError("boom")
+        
+        errors = metrics.get_counter('timed_error_test_errors_total')
+        histogram = metrics.get_histogram('timed_error_test_seconds')
+        
+        with self.assertRaises(ValueError):
+            fail()
+        self.assertEqual(errors.value, 1)
+        self.assertEqual(histogram.count, 1)
+    
+    def test_instrument_class_wraps_public_methods(self):
+        """Test that only public methods are timed, labelled by class and method."""
+        @metrics.instrument_class('instrument_test')
+        class Sample:
+            def public(self):
+                return self._private()
+            
+            def _private(self):
+                return 'done'
+        
+        self.assertEqual(Sample().public(), 'done')
+        
+        series = metrics.get_all_histograms()
+        self.assertEqual(series['instrument_test_seconds{method="Sample.public"}']['count'], 1)
+        self.assertNotIn('instrument_test_seconds{method="Sample._private"}', series)
+    
+    def test_instrument_class_wraps_inherited_methods(self):
+        """Test that public methods of a base class are labelled with the subclass."""
+        class Base:
+            def flush(self):
+                return 'flushed'
+        
+        @metrics.instrument_class('instrument_test')
+        class Store(Base):
+            pass
+        
+        self.assertEqual(Store().flush(), 'flushed')
+        
+        series = metrics.get_all_histograms()
+        self.assertEqual(series['instrument_test_seconds{method="Store.flush"}']['count'], 1)
+        self.assertNotIn('instrument_test_seconds{method="Base.flush"}', series)
+
+
+class TestRenderPrometheus(unittest.TestCase):
+    
+    def test_render_counters_and_histograms(self):
+        """Test the Prometheus text format."""
+        metrics.get_counter('render_test_total', labels={'status': 200}).inc(2)
+        histogram = metrics.get_histogram('render_test_seconds', buckets=(0.1, 1.0), labels={'endpoint': 'x'})
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        
+        lines = metrics.render_prometheus().splitlines()
+        
+        self.assertIn('# TYPE render_test_total counter', lines)
+        self.assertIn('render_test_total{status="200"} 2', lines)
+        self.assertIn('# TYPE render_test_seconds histogram', lines)
+        self.assertIn('render_test_seconds_bucket{endpoint="x",le="0.1"} 1', lines)
+        self.assertIn('render_test_seconds_bucket{endpoint="x",le="1.0"} 2', lines)
+        self.assertIn('render_test_seconds_bucket{endpoint="x",le="+Inf"} 2', lines)
+        self.assertIn('render_test_seconds_count{endpoint="x"} 2', lines)
+    
+    def test_label_values_are_escaped(self):
+        """Test that quotes in label values are escaped."""
+        metrics.get_counter('escape_test_total', labels={'path': 'a"b'}).inc()
+        
+        self.assertIn('escape_test_total{path="a\\"b"} 1', metrics.render_prometheus())
+
+
+if __name__ == '__main__':
+    unittest.main()
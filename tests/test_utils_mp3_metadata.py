@@ -0,0 +1,118 @@
+"""Tests for the ID3 tag and MPEG header parser."""
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from src.utils.mp3_metadata import read_mp3_metadata
+
+# MPEG1 Layer III, 128 kbit/s, 44.1 kHz, stereo: 417 bytes per frame
+FRAME = b'\xff\xfb\x90\x00' + b'\x00' * 413
+
+
+def id3v2(frames, major=3):
+    """Build an ID3v2.3 or v2.4 tag from (frame ID, body) pairs."""
+    def size_bytes(size, syncsafe):
+        if syncsafe:
+            return bytes([(size >> 21) & 0x7F, (size >> 14) & 0x7F, (size >> 7) & 0x7F, size & 0x7F])
+        return struct.pack('>I', size)
+
+    body = b''.join(frame_id + size_bytes(len(data), major == 4) + b'\x00\x00' + data
+                    for frame_id, data in frames)
+    body += b'\x00' * 16  # Padding
+    return b'ID3' + bytes([major, 0, 0]) + size_bytes(len(body), True) + body
+
+
+def id3v1(title, artist, album, track):
+    return (b'TAG' + title.ljust(30, b'\x00') + artist.ljust(30, b'\x00') + album.ljust(30, b'\x00')
+            + b'2020' + b'\x00' * 28 + b'\x00' + bytes([track]) + b'\x00')
+
+
+class TestReadMp3Metadata(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, content):
+        path = os.path.join(self.temp_dir, 'test.mp3')
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_id3v23_text_frames(self):
+        """Test title, artist, album and track of an ID3v2.3 tag in different encodings."""
+        tag = id3v2([
+            (b'TIT2', b'\x00R\xe4uber'),
+            (b'TPE1', b'\x01' + 'Preußler'.encode('utf-16')),
+            (b'TALB', b'\x00Hotzenplotz'),
+            (b'TRCK', b'\x003/12'),
+        ])
+        metadata = read_mp3_metadata(self._write(tag + FRAME * 100))
+
+        self.assertEqual(metadata['title'], 'Räuber')
+        self.assertEqual(metadata['artist'], 'Preußler')
+        self.assertEqual(metadata['album'], 'Hotzenplotz')
+        self.assertEqual(metadata['track_number'], 3)
+
+    def test_id3v24_utf8_and_syncsafe_sizes(self):
+        """Test an ID3v2.4 tag, whose frame sizes are syncsafe."""
+        tag = id3v2([(b'TIT2', b'\x03' + 'Grüffelo'.encode('utf-8') + b' ' * 200)], major=4)
+        metadata = read_mp3_metadata(self._write(tag + FRAME * 10))
+
+        self.assertEqual(metadata['title'], 'Grüffelo')
+        self.assertEqual(metadata['bitrate'], 128)
+
+    def test_cbr_duration(self):
+        """Test that a file without VBR header is timed from its size and bitrate."""
+        metadata = read_mp3_metadata(self._write(FRAME * 1000))
+
+        self.assertEqual(metadata['bitrate'], 128)
+        self.assertAlmostEqual(metadata['duration'], 1000 * 417 * 8 / 128000, places=2)
+        self.assertIsNone(metadata['title'])
+
+    def test_xing_frame_count(self):
+        """Test that the frame count of a Xing header determines the duration."""
+        first = bytearray(FRAME)
+        first[36:48] = b'Xing' + struct.pack('>II', 1, 500)
+        metadata = read_mp3_metadata(self._write(bytes(first) + FRAME * 100))
+
+        self.assertAlmostEqual(metadata['duration'], 500 * 1152 / 44100, places=3)
+
+    def test_id3v1_fallback(self):
+        """Test that an ID3v1.1 tag at the end is used without ID3v2 tag."""
+        metadata = read_mp3_metadata(self._write(FRAME * 10 + id3v1(b'Titel', b'Band', b'Album', 7)))
+
+        self.assertEqual(metadata['title'], 'Titel')
+        self.assertEqual(metadata['artist'], 'Band')
+        self.assertEqual(metadata['album'], 'Album')
+        self.assertEqual(metadata['track_number'], 7)
+        # The ID3v1 tag is not counted as audio
+        self.assertAlmostEqual(metadata['duration'], 10 * 417 * 8 / 128000, places=2)
+
+    def test_id3v2_takes_precedence_over_id3v1(self):
+        """Test that ID3v1 only fills fields the ID3v2 tag lacks."""
+        content = id3v2([(b'TIT2', b'\x00Neu')]) + FRAME * 10 + id3v1(b'Alt', b'Band', b'', 0)
+        metadata = read_mp3_metadata(self._write(content))
+
+        self.assertEqual(metadata['title'], 'Neu')
+        self.assertEqual(metadata['artist'], 'Band')
+        self.assertIsNone(metadata['album'])
+
+    def test_not_an_mp3(self):
+        """Test that unparseable content yields empty metadata instead of an error."""
+        metadata = read_mp3_metadata(self._write(b'\xff\x00 no audio here' * 10))
+
+        self.assertEqual(set(metadata.values()), {None})
+
+    def test_missing_file(self):
+        """Test that an unreadable file raises OSError."""
+        with self.assertRaises(OSError):
+            read_mp3_metadata(os.path.join(self.temp_dir, 'missing.mp3'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Tests for the startup phase timer."""
+
+import sys
+import unittest
+from unittest.mock import patch
+from src.utils.startup_timer import StartupTimer
+
+
+class TestStartupTimer(unittest.TestCase):
+
+    def test_phase_records_duration(self):
+        """Test that each phase is recorded with its wall time."""
+        timer = StartupTimer()
+        with patch('src.utils.startup_timer.time.monotonic', side_effect=[10.0, 10.25]):
+            with timer.phase('open database'):
+                pass
+
+        name, duration, modules = timer.phases[0]
+        self.assertEqual(name, 'open database')
+        self.assertAlmostEqual(duration, 0.25)
+        self.assertEqual(modules, set())
+
+    def test_phase_records_imported_modules(self):
+        """Test that modules imported inside a phase are attributed to it."""
+        sys.modules.pop('colorsys', None)
+        timer = StartupTimer()
+        with timer.phase('import colors'):
+            import colorsys  # noqa: F401
+
+        self.assertIn('colorsys', timer.phases[0][2])
+
+    def test_phase_recorded_on_error(self):
+        """Test that a failing phase still shows up in the report."""
+        timer = StartupTimer()
+        with self.assertRaises(RuntimeError):
+            with timer.phase('start player'):
+                raise RuntimeError('no audio device')
+
+        self.assertEqual([phase[0] for phase in timer.phases], ['start player'])
+
+    def test_report_groups_modules_by_package(self):
+        """Test that the report lists each phase with its heaviest packages."""
+        timer = StartupTimer()
+        timer.phases = [
+            ('import web interface', 0.2, {'flask', 'flask.app', 'flask.json', 'jinja2', 'werkzeug.routing'}),
+            ('attach web interface', 0.0, set()),
+        ]
+
+        with self.assertLogs('src.utils.startup_timer', level='INFO') as logs:
+            lines = timer.report(top_packages=2)
+
+        self.assertEqual(len(lines), 3)
+        self.assertIn('200.0 ms', lines[1])
+        self.assertIn('5 modules', lines[1])
+        self.assertIn('[flask (3), jinja2 (1)]', lines[1])
+        self.assertNotIn('[', lines[2])
+        self.assertEqual(len(logs.output), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
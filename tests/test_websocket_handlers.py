@@ -3,6 +3,7 @@ from unittest.mock import Mock, MagicMock, patch
 from flask import Flask
 from flask_socketio import SocketIO
 from src.websocket.handlers import register_handlers
+from src.utils import metrics
 
 
 class TestWebSocketHandlers(unittest.TestCase):
@@ -20,7 +21,8 @@ class TestWebSocketHandlers(unittest.TestCase):
         self.mock_berti.resume_playback = Mock()
         self.mock_berti.play_next = Mock()
         self.mock_berti.play_previous = Mock()
-        self.mock_berti.set_volume_internal = Mock()
+        self.mock_berti.set_volume = Mock()
+        self.mock_berti.send_player_status = Mock()
         self.mock_berti.set_sleep_timer = Mock()
         self.mock_berti.cancel_sleep_timer = Mock()
         self.mock_berti.play_current_track = Mock()
@@ -55,6 +57,17 @@ class TestWebSocketHandlers(unittest.TestCase):
         # Should call get_berti_box and trigger emit_player_status
         self.get_berti_box.assert_called()
     
+    def test_handlers_are_timed(self):
+        """Test that socket events are recorded in the event histogram."""
+        histogram = metrics.get_histogram('socketio_event_seconds', labels={'event': 'pause'})
+        errors = metrics.get_counter('socketio_event_errors_total', labels={'event': 'connect'})
+        before = histogram.count
+        
+        self.client.emit('pause')
+        
+        self.assertEqual(histogram.count, before + 1)
+        self.assertEqual(errors.value, 0)
+    
     def test_play_pause_command(self):
         """Test play/pause toggle command."""
         # Test when not playing - should resume
@@ -92,12 +105,14 @@ class TestWebSocketHandlers(unittest.TestCase):
         """Test setting valid volume."""
         self.client.emit('set_volume', {'volume': 0.5})
         self.get_berti_box.assert_called()
+        self.mock_berti.set_volume.assert_called_once_with(0.5)
     
     def test_set_volume_invalid(self):
         """Test setting invalid volume."""
         self.client.emit('set_volume', {'volume': 1.5})
         # Handler still gets called but should validate internally
         self.get_berti_box.assert_called()
+        self.mock_berti.set_volume.assert_not_called()
     
     def test_play_track(self):
         """Test playing specific track."""
@@ -134,6 +149,38 @@ class TestWebSocketHandlers(unittest.TestCase):
         self.get_berti_box.assert_called()
 
 
+class TestWebSocketCommandRunner(unittest.TestCase):
+    """Test that player commands go to the given command runner."""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['TESTING'] = True
+        self.socketio = SocketIO(self.app)
+        self.socketio.start_background_task = Mock()
+        self.mock_berti = Mock()
+        self.run_command = Mock()
+
+        register_handlers(self.socketio, Mock(return_value=self.mock_berti), self.run_command)
+
+        self.client = self.socketio.test_client(self.app)
+
+    def test_connect_queues_status_snapshot(self):
+        """Test that the snapshot for a new client is sent by the command runner."""
+        self.run_command.assert_called_once()
+        self.assertEqual(self.run_command.call_args[0][0], self.mock_berti.send_player_status)
+
+    def test_commands_use_runner(self):
+        """Test that commands are queued instead of started as background tasks."""
+        self.run_command.reset_mock()
+
+        self.client.emit('next_track')
+        self.client.emit('play_track', {'index': '2'})
+
+        self.assertEqual(self.run_command.call_args_list[0][0], (self.mock_berti.play_next,))
+        self.assertEqual(self.run_command.call_args_list[1][0], (self.mock_berti.play_track_at_index, 2))
+        self.socketio.start_background_task.assert_not_called()
+
+
 class TestWebSocketBroadcasts(unittest.TestCase):
     """Test WebSocket broadcast functionality."""
     